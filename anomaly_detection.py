@@ -0,0 +1,113 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+DETECTORS = ("EWMA", "CUSUM", "Robust Z")
+# Scales the median absolute deviation to a standard deviation for normal data
+MAD_SCALE = 0.6745
+
+
+class StreamingAnomalyDetector:
+    def __init__(self, keys, alpha=0.1, ewma_threshold=3.0, cusum_slack=0.5, cusum_limit=5.0, window=30,
+                 robust_threshold=3.5, warmup=20, max_anomalies=10000):
+        # State is a handful of arrays over all series, so each new point costs the same however long the history
+        self.keys = list(keys)
+        self.alpha = alpha
+        self.ewma_threshold = ewma_threshold
+        self.cusum_slack = cusum_slack
+        self.cusum_limit = cusum_limit
+        self.robust_threshold = robust_threshold
+        self.warmup = warmup
+        num_series = len(self.keys)
+        self.count = np.zeros(num_series, dtype=np.int64)
+        self.mean = np.zeros(num_series)
+        self.var = np.zeros(num_series)
+        self.cusum_high = np.zeros(num_series)
+        self.cusum_low = np.zeros(num_series)
+        self.recent = np.full((num_series, window), np.nan)  # Ring buffer of the last `window` values per series
+        self.anomalies = deque(maxlen=max_anomalies)
+        self.last_timestamp = None
+        self.last_values = None
+
+    def update(self, timestamp, values):
+        # One new point per series; NaN marks a series without a point at this timestamp
+        values = np.asarray(values, dtype=float)
+        valid = np.isfinite(values)
+        ready = valid & (self.count >= self.warmup)
+        rows = np.flatnonzero(ready)
+        scores = {detector: np.zeros(len(values)) for detector in DETECTORS}
+
+        # EWMA: distance from the smoothed mean in smoothed standard deviations
+        std = np.sqrt(self.var[rows])
+        z = np.divide(values[rows] - self.mean[rows], std, out=np.zeros(len(rows)), where=std > 0)
+        scores["EWMA"][rows] = z
+
+        # Two-sided CUSUM of the standardized deviations, restarted after each alarm
+        self.cusum_high[rows] = np.maximum(0, self.cusum_high[rows] + z - self.cusum_slack)
+        self.cusum_low[rows] = np.maximum(0, self.cusum_low[rows] - z - self.cusum_slack)
+        scores["CUSUM"][rows] = np.where(self.cusum_high[rows] >= self.cusum_low[rows],
+                                         self.cusum_high[rows], -self.cusum_low[rows])
+
+        # Robust z-score against the median and MAD of the preceding window
+        recent = self.recent[rows]
+        median_of = np.median if np.all(self.count[rows] >= recent.shape[1]) else np.nanmedian
+        median = median_of(recent, axis=1)
+        mad = median_of(np.abs(recent - median[:, None]), axis=1)
+        scores["Robust Z"][rows] = np.divide(MAD_SCALE * (values[rows] - median), mad,
+                                             out=np.zeros(len(rows)), where=mad > 0)
+
+        flags = {
+            "EWMA": np.abs(scores["EWMA"]) > self.ewma_threshold,
+            "CUSUM": np.abs(scores["CUSUM"]) > self.cusum_limit,
+            "Robust Z": np.abs(scores["Robust Z"]) > self.robust_threshold,
+        }
+        self.cusum_high[flags["CUSUM"]] = 0
+        self.cusum_low[flags["CUSUM"]] = 0
+        for detector in DETECTORS:
+            for index in np.flatnonzero(flags[detector]):
+                self.anomalies.append((timestamp, self.keys[index], values[index], detector, scores[detector][index]))
+
+        # Fold the new points into the state
+        rows = np.flatnonzero(valid)
+        first = self.count[rows] == 0
+        diff = values[rows] - self.mean[rows]
+        self.mean[rows] = np.where(first, values[rows], self.mean[rows] + self.alpha * diff)
+        self.var[rows] = np.where(first, 0, (1 - self.alpha) * (self.var[rows] + self.alpha * diff ** 2))
+        self.recent[rows, self.count[rows] % self.recent.shape[1]] = values[rows]
+        self.count[rows] += 1
+        self.last_timestamp = timestamp
+        self.last_values = values
+        return flags
+
+    def anomaly_frame(self):
+        return pd.DataFrame(list(self.anomalies), columns=["Timestamp", "Series", "Value", "Detector", "Score"])
+
+
+_detector_lock = threading.Lock()
+
+
+def update_detector(cache, key, history, **detector_kwargs):
+    # history is a frame indexed by ascending timestamp with one column per series. Only rows after the last
+    # one the cached detector saw are fed; a history that no longer contains that row unchanged starts over.
+    with _detector_lock:
+        detector = cache.get(key)
+        if detector is not None and (
+            detector.keys != list(history.columns)
+            or detector.last_timestamp not in history.index
+            or not np.array_equal(history.loc[detector.last_timestamp].to_numpy(dtype=float),
+                                  detector.last_values, equal_nan=True)
+        ):
+            detector = None
+        if detector is None:
+            detector = StreamingAnomalyDetector(history.columns, **detector_kwargs)
+            cache[key] = detector
+            new_rows = history
+        else:
+            new_rows = history[history.index > detector.last_timestamp]
+
+        values = new_rows.to_numpy(dtype=float)
+        for timestamp, row in zip(new_rows.index, values):
+            detector.update(timestamp, row)
+        return detector
@@ -0,0 +1,152 @@
+import multiprocessing
+import threading
+import weakref
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+def process_context():
+    # Forking the multithreaded server could copy a lock held by another thread into the child and deadlock it, so
+    # workers start from a single-threaded fork server (spawn where there is none). Both import the Streamlit script as
+    # __mp_main__, which main.py guards so that the import only defines the app.
+    start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(start_method)
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobProgress:
+    def __init__(self):
+        self.fraction = 0.0
+        self.partial = None
+        self.cancelled = False
+
+    def update(self, fraction, partial=None):
+        # Called from inside a thread job; raising here stops a superseded job between batches
+        if self.cancelled:
+            raise JobCancelled()
+        self.fraction = fraction
+        self.partial = partial
+
+
+class JobRunner:
+    def __init__(self, max_threads=4, max_processes=None):
+        # Threads for I/O and GIL-releasing NumPy work, processes for CPU-bound model fits
+        self.thread_pool = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="dashboard-job")
+        self.max_processes = max_processes
+        self._process_pool = None
+        self._slots = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    @property
+    def process_pool(self):
+        if self._process_pool is None:
+            self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes, mp_context=process_context())
+        return self._process_pool
+
+    def submit(self, slot, fn, *args, kind="thread", with_progress=False, **kwargs):
+        progress = None
+        if with_progress:
+            if kind != "thread":
+                raise ValueError("Progress reporting is only available for thread jobs.")
+            progress = JobProgress()
+            kwargs["progress"] = progress
+
+        pool = self.thread_pool if kind == "thread" else self.process_pool
+        with self._lock:
+            self.cancel(slot)
+            future = pool.submit(fn, *args, **kwargs)
+            future.progress = progress
+            self._slots[slot] = future
+        return future
+
+    def submit_after(self, slot, upstream, fn, *args, kind="thread", **kwargs):
+        # Job running fn(upstream result, *args) in the given pool once upstream finishes; no pool thread waits for it
+        # in the meantime. An upstream failure or cancellation is passed on to the returned future.
+        future = Future()
+        future.progress = None
+
+        def finish(inner):
+            if inner.cancelled():
+                future.cancel()
+            elif future.set_running_or_notify_cancel():
+                if inner.exception() is not None:
+                    future.set_exception(inner.exception())
+                else:
+                    future.set_result(inner.result())
+
+        def start(upstream):
+            if upstream.cancelled():
+                future.cancel()
+            elif upstream.exception() is not None:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(upstream.exception())
+            elif not future.cancelled():
+                pool = self.thread_pool if kind == "thread" else self.process_pool
+                inner = pool.submit(fn, upstream.result(), *args, **kwargs)
+                # Superseding the chained job drops the queued inner one
+                future.add_done_callback(lambda _: future.cancelled() and inner.cancel())
+                inner.add_done_callback(finish)
+
+        with self._lock:
+            self.cancel(slot)
+            self._slots[slot] = future
+        upstream.add_done_callback(start)
+        return future
+
+    def cancel(self, slot):
+        # Queued jobs are dropped; running thread jobs stop at their next progress update
+        future = self._slots.pop(slot, None)
+        if future is None:
+            return
+        if future.progress is not None:
+            future.progress.cancelled = True
+        future.cancel()
+
+
+@st.cache_resource
+def get_job_runner():
+    return JobRunner()
+
+
+def session_slot(name):
+    ctx = get_script_run_ctx()
+    return (ctx.session_id if ctx is not None else None, name)
+
+
+def job_result(future):
+    # The result of a job that finished successfully, otherwise None
+    if future.done() and not future.cancelled() and future.exception() is None:
+        return future.result()
+    return None
+
+
+def render_job_result(future, render, placeholder="Computing...", render_partial=None, poll_interval=0.5):
+    if future.done():
+        # A failed job only takes down its own panel
+        error = None if future.cancelled() else future.exception()
+        if future.cancelled() or isinstance(error, JobCancelled):
+            st.warning("This result was superseded before it finished.")
+        elif error is not None:
+            st.error(f"This result could not be computed: {type(error).__name__}: {error}")
+        else:
+            render(future.result())
+        return
+
+    @st.fragment(run_every=poll_interval)
+    def poll():
+        if future.done():
+            st.rerun()
+        progress = future.progress
+        if progress is not None:
+            st.progress(progress.fraction, text=placeholder)
+            if render_partial is not None and progress.partial is not None:
+                render_partial(progress.partial)
+        else:
+            st.info(placeholder)
+
+    poll()
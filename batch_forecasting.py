@@ -0,0 +1,139 @@
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.stats import norm
+from statsmodels.tsa.arima.model import ARIMA
+
+SMOOTHING_GRID = np.linspace(0.05, 0.95, 19)
+TREND_GRID = np.linspace(0.05, 0.5, 10)
+
+
+def _fit_ses(Y):
+    # Run simple exponential smoothing for every (series, alpha) pair at once
+    alphas = SMOOTHING_GRID[None, :]
+    level = np.repeat(Y[:, :1], len(SMOOTHING_GRID), axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, Y.shape[1]):
+        error = Y[:, t:t + 1] - level
+        sse += error ** 2
+        level = level + alphas * error
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(Y.shape[0])
+    sigma2 = sse[rows, best] / max(Y.shape[1] - 1, 1)
+    return level[rows, best], SMOOTHING_GRID[best], sigma2
+
+
+def _fit_holt(Y):
+    # Run Holt's linear trend method for every (series, alpha, beta) triple at once
+    alphas = np.repeat(SMOOTHING_GRID, len(TREND_GRID))[None, :]
+    betas = np.tile(TREND_GRID, len(SMOOTHING_GRID))[None, :]
+    level = np.repeat(Y[:, :1], alphas.shape[1], axis=1)
+    trend = np.repeat(Y[:, 1:2] - Y[:, :1], alphas.shape[1], axis=1)
+    sse = np.zeros_like(level)
+    for t in range(1, Y.shape[1]):
+        error = Y[:, t:t + 1] - (level + trend)
+        sse += error ** 2
+        new_level = level + trend + alphas * error
+        trend = trend + alphas * betas * error
+        level = new_level
+
+    best = np.argmin(sse, axis=1)
+    rows = np.arange(Y.shape[0])
+    sigma2 = sse[rows, best] / max(Y.shape[1] - 2, 1)
+    return level[rows, best], trend[rows, best], alphas[0, best], betas[0, best], sigma2
+
+
+def _forecast_ses(Y, horizon, z):
+    level, alpha, sigma2 = _fit_ses(Y)
+    steps = np.arange(1, horizon + 1)[None, :]
+    forecast = np.repeat(level[:, None], horizon, axis=1)
+    variance = sigma2[:, None] * (1 + (steps - 1) * alpha[:, None] ** 2)
+    half_width = z * np.sqrt(variance)
+    return forecast, forecast - half_width, forecast + half_width
+
+
+def _forecast_holt(Y, horizon, z):
+    level, trend, alpha, beta, sigma2 = _fit_holt(Y)
+    steps = np.arange(1, horizon + 1)[None, :]
+    forecast = level[:, None] + steps * trend[:, None]
+
+    # Additive-error variance: sigma^2 * (1 + sum_{j<h} (alpha * (1 + beta * j))^2)
+    j = np.arange(horizon)[None, :]
+    increments = (alpha[:, None] * (1 + beta[:, None] * j)) ** 2
+    increments[:, 0] = 0
+    variance = sigma2[:, None] * (1 + np.cumsum(increments, axis=1))
+    half_width = z * np.sqrt(variance)
+    return forecast, forecast - half_width, forecast + half_width
+
+
+def forecast_arima_series(args):
+    series, order, horizon, alpha = args
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        results = ARIMA(series, order=order).fit()
+        prediction = results.get_forecast(steps=horizon)
+    interval = np.asarray(prediction.conf_int(alpha=alpha))
+    return np.asarray(prediction.predicted_mean), interval[:, 0], interval[:, 1]
+
+
+def _forecast_arima(Y, horizon, level, order, max_workers):
+    tasks = [(series, order, horizon, 1 - level) for series in Y]
+    chunksize = max(1, len(tasks) // ((max_workers or 8) * 4))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        outputs = list(executor.map(forecast_arima_series, tasks, chunksize=chunksize))
+
+    forecast, lower, upper = (np.vstack(part) for part in zip(*outputs))
+    return forecast, lower, upper
+
+
+def batch_forecast(Y, horizon=12, method="ses", level=0.95, order=(1, 1, 1), max_workers=None):
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    if Y.shape[1] < 3:
+        raise ValueError("Each series needs at least 3 observations to be forecast.")
+    if np.isnan(Y).any():
+        raise ValueError("Series must not contain missing values.")
+
+    z = norm.ppf(0.5 + level / 2)
+    if method == "ses":
+        return _forecast_ses(Y, horizon, z)
+    if method == "holt":
+        return _forecast_holt(Y, horizon, z)
+    if method == "arima":
+        return _forecast_arima(Y, horizon, level, order, max_workers)
+    raise ValueError(f"Unknown forecasting method: {method}")
+
+
+def build_summing_matrix(groups, n_bottom):
+    # One row per aggregate (listing the bottom-level series it sums), followed by the bottom-level identity
+    aggregates = np.zeros((len(groups), n_bottom))
+    for row, members in enumerate(groups):
+        aggregates[row, list(members)] = 1
+    return np.vstack([aggregates, np.eye(n_bottom)])
+
+
+def reconcile_forecasts(forecast, S, lower=None, upper=None, method="ols", weights=None):
+    forecast = np.asarray(forecast, dtype=float)
+    n_bottom = S.shape[1]
+
+    if method == "bottom_up":
+        reconciled = S @ forecast[-n_bottom:]
+    elif method in ("ols", "wls"):
+        if method == "wls":
+            if weights is None:
+                weights = S.sum(axis=1)
+            W_inv = np.diag(1 / np.asarray(weights, dtype=float))
+        else:
+            W_inv = np.eye(S.shape[0])
+        P = np.linalg.solve(S.T @ W_inv @ S, S.T @ W_inv)
+        reconciled = S @ (P @ forecast)
+    else:
+        raise ValueError(f"Unknown reconciliation method: {method}")
+
+    if lower is None or upper is None:
+        return reconciled
+
+    # Shift the base intervals by the reconciliation adjustment
+    adjustment = reconciled - forecast
+    return reconciled, np.asarray(lower) + adjustment, np.asarray(upper) + adjustment
@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import gc
+import math
+import multiprocessing
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from memory_accounting import current_rss, estimate_session_bytes  # noqa: E402
+
+SIDEBAR_SLIDERS = {
+    "Number of Agents:": (1, 2000),
+    "Calls per Day (per agent):": (1, 500),
+    "Mean Call Duration (minutes):": (1.0, 30.0),
+}
+# Switching tabs happens in the browser without a rerun, so sessions use the widgets inside the tabs instead
+TAB_WIDGETS = [("radio", "llm_radio"), ("radio", "stt_radio"), ("radio", "tts_radio"), ("selectbox", "baseline_service")]
+
+# AppTest installs a process-global mock runtime for the duration of each run, so sessions sharing a process take
+# turns to rerun through this lock, much as script threads of one server share the GIL. Latency is the response
+# time a user would see, from the interaction to the finished rerun, so it includes the wait for a turn. With
+# --processes every session has a process of its own instead, and reruns really run at the same time.
+RERUN_LOCK = threading.Lock()
+
+
+class SessionDriver:
+    def __init__(self, script, seed, timeout, lock=RERUN_LOCK):
+        self.app = AppTest.from_file(script, default_timeout=timeout)
+        self.rng = random.Random(seed)
+        self.lock = lock if lock is not None else contextlib.nullcontext()
+        self.initial_latency = None
+        self.latencies = []
+        self.run_times = []
+
+    def _run(self):
+        queued = time.perf_counter()
+        with self.lock:
+            start = time.perf_counter()
+            self.app.run()
+            self.run_times.append(time.perf_counter() - start)
+        latency = time.perf_counter() - queued
+        if self.app.exception:
+            raise RuntimeError(f"Script raised: {self.app.exception[0].value}")
+        return latency
+
+    def start(self):
+        self.initial_latency = self._run()
+
+    def step(self):
+        if self.rng.random() < 0.6:
+            label = self.rng.choice(list(SIDEBAR_SLIDERS))
+            low, high = SIDEBAR_SLIDERS[label]
+            value = self.rng.randint(low, high) if isinstance(low, int) else round(self.rng.uniform(low, high), 1)
+            next(slider for slider in self.app.sidebar.slider if slider.label == label).set_value(value)
+        else:
+            kind, key = self.rng.choice(TAB_WIDGETS)
+            widget = getattr(self.app, kind)(key=key)
+            widget.set_value(self.rng.choice([option for option in widget.options if option != widget.value]))
+        self.latencies.append(self._run())
+
+    def session_bytes(self):
+        return sum(estimate_session_bytes(self.app.session_state.filtered_state).values())
+
+    def drive(self, steps, think_time, barrier):
+        self.start()
+        barrier.wait()  # Interactive reruns start together, so the sessions actually compete
+        for _ in range(steps):
+            time.sleep(think_time * self.rng.uniform(0.5, 1.5))
+            self.step()
+
+    def measurements(self):
+        return {"initial": self.initial_latency, "latencies": self.latencies, "run_times": self.run_times[1:],
+                "session_bytes": self.session_bytes()}
+
+
+def _session_process(script, seed, timeout, steps, think_time, barrier, results):
+    # One session with a process to itself; memory growth is counted from its first finished run
+    try:
+        cpu_before = time.process_time()
+        driver = SessionDriver(script, seed, timeout, lock=None)
+        driver.start()
+        rss_loaded = current_rss()
+        barrier.wait()
+        for _ in range(steps):
+            time.sleep(think_time * driver.rng.uniform(0.5, 1.5))
+            driver.step()
+        results.put({**driver.measurements(), "cpu": time.process_time() - cpu_before, "rss_loaded": rss_loaded,
+                     "rss_growth": current_rss() - rss_loaded})
+    except BaseException as exc:
+        results.put({"error": f"{type(exc).__name__}: {exc}"})
+        raise
+
+
+def _run_sessions_in_processes(num_sessions, steps, script, think_time, timeout, seed):
+    # Spawned, so no child inherits the parent's threads or locks
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(num_sessions)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_session_process,
+                        args=(script, seed * 1000 + i, timeout, steps, think_time, barrier, results))
+        for i in range(num_sessions)
+    ]
+    for process in processes:
+        process.start()
+    sessions = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    errors = [session["error"] for session in sessions if "error" in session]
+    if errors:
+        raise RuntimeError(f"Session failed: {errors[0]}")
+    return sessions
+
+
+def run_level(num_sessions, steps, script, think_time=0.0, timeout=120, seed=0, processes=False):
+    gc.collect()
+    rss_before = current_rss()
+    cpu_before = time.process_time()
+    wall_before = time.perf_counter()
+    if processes:
+        sessions = _run_sessions_in_processes(num_sessions, steps, script, think_time, timeout, seed)
+        cpu = sum(session["cpu"] for session in sessions)
+        # One replica would hold the loaded app once and every session's growth on top of it
+        rss_growth = np.mean([session["rss_growth"] for session in sessions])
+        rss = np.mean([session["rss_loaded"] for session in sessions]) + num_sessions * rss_growth
+    else:
+        drivers = [SessionDriver(script, seed * 1000 + i, timeout) for i in range(num_sessions)]
+        barrier = threading.Barrier(num_sessions)
+        with ThreadPoolExecutor(max_workers=num_sessions) as executor:
+            list(executor.map(lambda driver: driver.drive(steps, think_time, barrier), drivers))
+        sessions = [driver.measurements() for driver in drivers]
+        del drivers
+        # Process-wide CPU, so background jobs started by the reruns are included
+        cpu = time.process_time() - cpu_before
+        rss = current_rss()
+        rss_growth = (rss - rss_before) / num_sessions
+    wall = time.perf_counter() - wall_before
+
+    latencies = np.array([latency for session in sessions for latency in session["latencies"]]) * 1000
+    run_times = np.array([run_time for session in sessions for run_time in session["run_times"]]) * 1000
+    initial = np.array([session["initial"] for session in sessions]) * 1000
+    reruns = len(latencies) + len(initial)
+    return {
+        "Sessions": num_sessions,
+        "Reruns": reruns,
+        "Initial Load p50 (ms)": np.percentile(initial, 50),
+        # Response times, from the interaction until its rerun finished
+        "p50 (ms)": np.percentile(latencies, 50),
+        "p90 (ms)": np.percentile(latencies, 90),
+        "p95 (ms)": np.percentile(latencies, 95),
+        "p99 (ms)": np.percentile(latencies, 99),
+        "Max (ms)": latencies.max(),
+        # Time spent inside the rerun itself, without waiting for a turn
+        "Run p95 (ms)": np.percentile(run_times, 95),
+        "Reruns per Second": reruns / wall,
+        "CPU per Rerun (ms)": cpu / reruns * 1000,
+        "CPU per Session (s)": cpu / num_sessions,
+        "RSS Growth per Session (MB)": rss_growth / 1024 ** 2,
+        "Session State (MB)": np.mean([session["session_bytes"] for session in sessions]) / 1024 ** 2,
+        "RSS (MB)": rss / 1024 ** 2,
+    }
+
+
+def capacity_report(df, slo_ms, memory_limit_mb, target_users):
+    # Sessions where the p95 response time curve first crosses the target, interpolated between tested levels
+    levels = df["Sessions"].to_numpy()
+    p95 = df["p95 (ms)"].to_numpy()
+    over = np.flatnonzero(p95 > slo_ms)
+    if len(over) == 0:
+        sessions_by_latency = int(levels[-1])
+    elif over[0] == 0:
+        sessions_by_latency = 0
+    else:
+        i = over[0]
+        sessions_by_latency = int(levels[i - 1] + (slo_ms - p95[i - 1]) * (levels[i] - levels[i - 1])
+                                  / (p95[i] - p95[i - 1]))
+
+    # Memory per session from the largest level, where the shared caches are amortised best
+    largest = df.iloc[-1]
+    baseline_mb = largest["RSS (MB)"] - largest["Sessions"] * largest["RSS Growth per Session (MB)"]
+    per_session_mb = max(largest["RSS Growth per Session (MB)"], largest["Session State (MB)"], 1e-3)
+    sessions_by_memory = max(int((memory_limit_mb - baseline_mb) / per_session_mb), 0)
+
+    sessions_per_replica = min(sessions_by_latency, sessions_by_memory)
+    lines = [
+        f"Sessions within the p95 < {slo_ms:.0f} ms response time target: {sessions_by_latency}"
+        + (" (the largest level tested; capacity may be higher)" if len(over) == 0 else ""),
+        f"Sessions within {memory_limit_mb:.0f} MB: {sessions_by_memory} "
+        f"({baseline_mb:.0f} MB baseline + {per_session_mb:.1f} MB per session)",
+        f"Sessions per replica: {sessions_per_replica}",
+    ]
+    if sessions_per_replica > 0:
+        lines.append(f"Replicas for {target_users} concurrent users: {math.ceil(target_users / sessions_per_replica)}")
+    else:
+        lines.append("A single session does not meet the latency or memory target.")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the dashboard")
+    parser.add_argument("--script", default=os.path.join(ROOT, "main.py"))
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--steps", type=int, default=10, help="Interactions per session after the initial load")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between interactions (seconds)")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--slo-ms", type=float, default=1000, help="p95 response time target")
+    parser.add_argument("--processes", action="store_true",
+                        help="Run every session in its own process, so reruns overlap instead of taking turns")
+    parser.add_argument("--memory-limit-mb", type=float, default=2048, help="Memory available to one replica")
+    parser.add_argument("--target-users", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the per-level results to this CSV file")
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    rows = []
+    for num_sessions in sorted(args.sessions):
+        rows.append(run_level(num_sessions, args.steps, args.script, args.think_time, args.timeout, args.seed,
+                              args.processes))
+        print(f"{num_sessions} sessions: p95 response time {rows[-1]['p95 (ms)']:.0f} ms", file=sys.stderr)
+
+    df = pd.DataFrame(rows)
+    if args.output:
+        df.to_csv(args.output, index=False)
+    pd.set_option("display.width", 250)
+    print(df.round(1).to_string(index=False))
+    print()
+    print(capacity_report(df, args.slo_ms, args.memory_limit_mb, args.target_users))
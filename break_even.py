@@ -0,0 +1,111 @@
+import numpy as np
+
+DAYS_PER_MONTH = 30
+MINUTES_PER_MONTH = DAYS_PER_MONTH * 24 * 60
+
+
+def cost_structure(config, num_agents, mean_call_duration):
+    structure = config["cost_structure"]
+    return {
+        "fixed_costs": structure["fixed_costs_per_month"] + structure["fixed_costs_per_agent"] * np.asarray(num_agents),
+        "cost_per_step": structure["cost_per_step"],
+        # A step (e.g. one more server) is added for every N concurrent calls at the peak
+        "calls_per_step": structure["concurrent_calls_per_step"] * MINUTES_PER_MONTH
+        / (np.asarray(mean_call_duration) * structure["peak_to_average"]),
+    }
+
+
+def pricing_tiers(config):
+    # Graduated tiers as (calls per month from which the tier applies, price per call), sorted by threshold
+    return sorted((tier["from_calls"], tier["price_per_call"]) for tier in config.get("pricing_tiers", ()))
+
+
+def tiered_revenue(calls, base_price, tiers=()):
+    # Calls above each threshold are billed at that tier's price instead of the one below it
+    calls = np.asarray(calls, dtype=float)
+    revenue = calls * base_price
+    previous_price = base_price
+    for threshold, price in tiers:
+        revenue = revenue + np.maximum(calls - threshold, 0) * (price - previous_price)
+        previous_price = price
+    return revenue
+
+
+def monthly_cost(calls, variable_cost_per_call, fixed_costs=0.0, cost_per_step=0.0, calls_per_step=np.inf):
+    calls = np.asarray(calls, dtype=float)
+    steps = np.ceil(calls / calls_per_step)
+    return calls * variable_cost_per_call + fixed_costs + steps * cost_per_step
+
+
+def _ceil(values):
+    # Ceiling that ignores the last few bits of round-off, so 500.0000000001 from exact arithmetic is still 500
+    values = np.asarray(values, dtype=float)
+    return np.ceil(values - 1e-12 * np.maximum(np.abs(values), 1))
+
+
+def solve_volume(base_price, variable_cost_per_call, fixed_costs=0.0, cost_per_step=0.0, calls_per_step=np.inf,
+                 tiers=(), target_margin=0.0, max_calls=1e12):
+    # Smallest monthly call volume whose profit reaches target_margin of revenue, for every point of the
+    # broadcast parameter grid at once; NaN where no volume up to max_calls gets there.
+    # Step costs make profit a sawtooth, so it is solved in closed form piece by piece: between tier thresholds
+    # revenue is linear, and inside step k the shortfall crosses zero at (fixed + k * cost_per_step) / margin.
+    def shortfall(calls):
+        revenue = tiered_revenue(calls, base_price, tiers)
+        cost = monthly_cost(calls, variable_cost_per_call, fixed_costs, cost_per_step, calls_per_step)
+        return revenue * (1 - target_margin) - cost
+
+    shape = np.broadcast_shapes(*(np.shape(value) for value in (
+        base_price, variable_cost_per_call, fixed_costs, cost_per_step, calls_per_step, target_margin,
+        *(price for _, price in tiers),
+    )))
+    retained = 1 - np.asarray(target_margin, dtype=float)
+    # Without steps, one step wider than max_calls and free of charge covers every volume
+    stepped = np.isfinite(calls_per_step)
+    step_size = np.where(stepped, calls_per_step, 2 * max_calls)
+    step_cost = np.where(stepped, cost_per_step, 0.0)
+
+    # Revenue on each tier segment [start, end) is price * calls + intercept
+    segments = []
+    start, price, intercept = 0.0, np.asarray(base_price, dtype=float), 0.0
+    for threshold, tier_price in tiers:
+        segments.append((start, threshold, price, intercept))
+        intercept = intercept - threshold * (tier_price - price)
+        start, price = threshold, tier_price
+    segments.append((start, np.inf, price, intercept))
+
+    volume = np.full(shape, np.nan)
+    # Later segments first, so the earliest segment with a solution has the last word
+    for start, end, price, intercept in reversed(segments):
+        margin = retained * price - variable_cost_per_call
+        offset = retained * intercept - fixed_costs
+        first_step = np.maximum(np.ceil(start / step_size), 1)
+        last_step = np.ceil(end / step_size)
+        # The shortfall at the end of step k, for the steps ending inside the segment, is offset + k * gain
+        gain = margin * step_size - step_cost
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = np.where(gain > 0, np.maximum(first_step, _ceil(-offset / gain)), first_step)
+            reached = (margin > 0) & (step < last_step) & (offset + step * gain >= 0)
+            if np.isfinite(end):
+                # Otherwise the crossing can only be in the step cut off by the end of the segment
+                reached_at_end = ~reached & (margin > 0) & (shortfall(end) >= 0)
+                step = np.where(reached_at_end, last_step, step)
+                reached = reached | reached_at_end
+            # Profit rises within a step, so the crossing is where that step's extra cost is earned back
+            crossing = np.clip((fixed_costs + step * step_cost - retained * intercept) / margin,
+                               np.maximum(start, (step - 1) * step_size), np.minimum(step * step_size, end))
+        segment_volume = np.where(shortfall(start) >= 0, start, np.where(reached, crossing, np.nan))
+        volume = np.where(np.isnan(segment_volume), volume, segment_volume)
+
+    # Whole calls where rounding up does not cross into another step
+    whole = _ceil(volume)
+    volume = np.where(shortfall(whole) >= 0, whole, volume)
+    return np.where(volume <= max_calls, volume, np.nan)
+
+
+def minimum_price(calls, base_price, variable_cost_per_call, fixed_costs=0.0, cost_per_step=0.0,
+                  calls_per_step=np.inf, tiers=(), target_margin=0.0):
+    # Revenue is linear in a common scaling of every tier price, so the minimum scales the base price directly
+    revenue = tiered_revenue(calls, base_price, tiers)
+    cost = monthly_cost(calls, variable_cost_per_call, fixed_costs, cost_per_step, calls_per_step)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(revenue > 0, base_price * cost / ((1 - target_margin) * revenue), np.nan)
@@ -0,0 +1,97 @@
+import numpy as np
+import pandas as pd
+
+from break_even import DAYS_PER_MONTH
+
+HOURS_PER_MONTH = DAYS_PER_MONTH * 24
+SECONDS_PER_MONTH = HOURS_PER_MONTH * 3600
+# Agent workers run the voice pipeline for each session; media servers route its audio
+ROLES = {"agent_worker": "Agent Workers", "media_server": "Media Servers"}
+
+
+def sessions_per_instance(profile, instance_types, target_utilisation):
+    # Whole sessions that fit on each instance type without passing the target utilisation of CPU or memory
+    cpu = np.array([instance["cpu_cores"] for instance in instance_types], dtype=float)
+    memory = np.array([instance["memory_gb"] for instance in instance_types], dtype=float)
+    with np.errstate(divide="ignore"):
+        fit = np.minimum(cpu * target_utilisation / profile["cpu_cores"],
+                         memory * target_utilisation / profile["memory_gb"])
+    return np.floor(fit)
+
+
+def pack_sessions(sessions, capacity, hourly_cost):
+    # Cheapest fleet for every session count: an unbounded covering knapsack over the instance types. Trading
+    # capacity[best] instances of another type for capacity[type] of the type cheapest per session never costs more,
+    # so some cheapest fleet has fewer than capacity[best] of every other type. Past that many sessions the fleet
+    # only grows by the cheapest type, and the rest is solved exactly by dynamic programming over session counts.
+    # Returns instance counts (sessions, types) and the hourly cost.
+    sessions = np.ceil(np.asarray(sessions, dtype=float)).astype(np.int64)
+    usable = np.flatnonzero(capacity > 0)
+    if len(usable) == 0:
+        raise ValueError("No instance type can hold a single session.")
+    caps = capacity[usable].astype(np.int64)
+    costs = hourly_cost[usable]
+    best = np.argmin(costs / caps)
+    bound = (caps[best] - 1) * (caps.sum() - caps[best]) + caps[best]
+    bulk = np.maximum(0, -((bound - sessions) // caps[best]))
+    residual = sessions - bulk * caps[best]
+
+    # table[n] is the cheapest cost of n sessions; a run of caps.min() counts only reads smaller ones
+    size = int(residual.max(initial=0)) + 1
+    table = np.zeros(size)
+    choice = np.zeros(size, dtype=np.int64)
+    step = int(caps.min())
+    for start in range(1, size, step):
+        needed = np.arange(start, min(start + step, size))
+        options = table[np.maximum(needed[:, None] - caps, 0)] + costs
+        choice[needed] = options.argmin(axis=1)
+        table[needed] = options[np.arange(len(needed)), choice[needed]]
+
+    counts = np.zeros((len(sessions), len(capacity)))
+    counts[:, usable[best]] = bulk
+    for row, remaining in enumerate(residual):
+        while remaining > 0:
+            counts[row, usable[choice[remaining]]] += 1
+            remaining -= caps[choice[remaining]]
+    return counts, counts @ hourly_cost
+
+
+def describe_fleet(counts, instance_types):
+    return [
+        " + ".join(f"{int(count)}× {instance['name']}" for count, instance in zip(row, instance_types) if count)
+        or "-"
+        for row in counts
+    ]
+
+
+def plan_capacity(config, peak_sessions, mean_sessions):
+    # Fleets sized for the peak and kept running all month; egress follows the mean concurrency
+    infrastructure = config["infrastructure"]
+    instance_types = list(infrastructure["instance_types"])
+    cpu = np.array([instance["cpu_cores"] for instance in instance_types], dtype=float)
+    memory = np.array([instance["memory_gb"] for instance in instance_types], dtype=float)
+    hourly_cost = np.array([instance["hourly_cost"] for instance in instance_types], dtype=float)
+
+    plan = {}
+    compute_cost = 0
+    for role, label in ROLES.items():
+        capacity = sessions_per_instance(infrastructure["session_profiles"][role], instance_types,
+                                         infrastructure["target_utilisation"])
+        if not np.any(capacity > 0):
+            raise ValueError(f"No instance type fits a single session of the {label} at the target utilisation.")
+        counts, hourly = pack_sessions(peak_sessions, capacity, hourly_cost)
+        plan[label] = describe_fleet(counts, instance_types)
+        plan[f"{label} vCPUs"] = counts @ cpu
+        plan[f"{label} Memory (GB)"] = counts @ memory
+        compute_cost = compute_cost + hourly * HOURS_PER_MONTH
+
+    egress_gb = (np.asarray(mean_sessions, dtype=float) * infrastructure["egress_kbps_per_session"] * 1000 / 8
+                 * SECONDS_PER_MONTH / 1e9)
+    egress_cost = egress_gb * infrastructure["egress_cost_per_gb"]
+    return pd.DataFrame({
+        **plan,
+        "Egress (GB per Month)": egress_gb,
+        "Compute Cost": compute_cost,
+        "Egress Cost": egress_cost,
+        "Infrastructure Cost": compute_cost + egress_cost,
+    })
@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+
+DAYS_PER_MONTH = 30
+GRANULARITIES = {"Monthly": 1, "Daily": DAYS_PER_MONTH}
+
+
+def age_curves(num_periods, monthly_churn=0.0, ramp_months=0, periods_per_month=1):
+    # Share of a cohort still active, and the share of full usage it has reached, by age in periods
+    ages = np.arange(num_periods)
+    survival = (1 - monthly_churn) ** (ages / periods_per_month)
+    ramp_periods = ramp_months * periods_per_month
+    ramp = np.minimum((ages + 1) / ramp_periods, 1.0) if ramp_periods > 0 else np.ones(num_periods)
+    return survival, ramp
+
+
+def price_index(num_periods, annual_price_change=0.0, periods_per_month=1):
+    # Prices move once a year, on each anniversary of the projection start
+    years = np.arange(num_periods) // (12 * periods_per_month)
+    return (1 + annual_price_change) ** years
+
+
+def cohort_matrix(sizes, starts, num_periods, survival, ramp, ramped=None):
+    # Rows are cohorts, columns periods; ages are looked up in the curves instead of looping over cohorts
+    sizes = np.asarray(sizes, dtype=float)
+    ages = np.arange(num_periods)[None, :] - np.asarray(starts)[:, None]
+    started = ages >= 0
+    ages = np.clip(ages, 0, num_periods - 1)
+
+    active = np.where(started, sizes[:, None] * survival[ages], 0.0)
+    ramp = ramp[ages]
+    if ramped is not None:
+        ramp[np.asarray(ramped)] = 1.0
+    return active, active * ramp
+
+
+def project_cohorts(initial_clients, new_clients_per_month, revenue_per_client_month, cost_per_client_month,
+                    months=60, monthly_churn=0.0, ramp_months=0, annual_price_change=0.0, periods_per_month=1,
+                    start_date=None):
+    num_periods = months * periods_per_month
+    # The existing book is one fully ramped cohort; new clients arrive as one cohort per period
+    sizes = np.concatenate([[initial_clients], np.full(num_periods, new_clients_per_month / periods_per_month)])
+    starts = np.concatenate([[0], np.arange(num_periods)])
+    ramped = np.zeros(len(sizes), dtype=bool)
+    ramped[0] = True
+
+    survival, ramp = age_curves(num_periods, monthly_churn, ramp_months, periods_per_month)
+    active, usage = cohort_matrix(sizes, starts, num_periods, survival, ramp, ramped)
+
+    # Revenue and cost scale with full-usage clients, so ramping cohorts contribute only part of a client
+    revenue_rate = revenue_per_client_month / periods_per_month * price_index(num_periods, annual_price_change,
+                                                                              periods_per_month)
+    cost_rate = np.full(num_periods, cost_per_client_month / periods_per_month)
+    usage_total = usage.sum(axis=0)
+    start_date = pd.Timestamp.now().normalize() if start_date is None else pd.Timestamp(start_date)
+    dates = (pd.date_range(start_date, periods=num_periods, freq="D") if periods_per_month > 1
+             else pd.date_range(start_date.to_period("M").to_timestamp(), periods=num_periods, freq="MS"))
+    periods = pd.DataFrame({
+        "Date": dates,
+        "Active Clients": active.sum(axis=0),
+        "Revenue": usage_total * revenue_rate,
+        "Cost": usage_total * cost_rate,
+    })
+    periods["Profit"] = periods["Revenue"] - periods["Cost"]
+
+    # Cohorts and periods are summed into calendar months for the cohort view
+    cohort_months = np.concatenate([[-1], np.arange(num_periods) // periods_per_month])
+    row_bounds = np.flatnonzero(np.diff(cohort_months, prepend=-2))
+    column_bounds = np.arange(0, num_periods, periods_per_month)
+    revenue_by_month = np.add.reduceat(np.add.reduceat(usage * revenue_rate, row_bounds, axis=0), column_bounds,
+                                       axis=1)
+    cost_by_month = np.add.reduceat(np.add.reduceat(usage * cost_rate, row_bounds, axis=0), column_bounds, axis=1)
+
+    cohorts = pd.DataFrame({
+        "Cohort": ["Existing"] + [f"Month {month + 1}" for month in range(months)],
+        "Clients Acquired": np.add.reduceat(sizes, row_bounds),
+        "Projected Revenue": revenue_by_month.sum(axis=1),
+        "Projected Cost": cost_by_month.sum(axis=1),
+    })
+    cohorts["Projected Profit"] = cohorts["Projected Revenue"] - cohorts["Projected Cost"]
+    return periods, cohorts, revenue_by_month
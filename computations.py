@@ -0,0 +1,88 @@
+import copy
+
+from background_jobs import get_job_runner, session_slot
+from compute_graph import ComputeGraph
+from concurrency import scale_concurrency
+from financial_overview import calculate_costs
+from forecast_trends import load_backtest_summary, load_forecast_data
+from random_streams import get_random_streams
+from risk_assessment import load_monte_carlo_results
+from scalability_analysis import SCALE_FACTORS, calculate_scale_data
+
+SIMULATION_INPUTS = ("num_agents", "calls_per_day", "mean_call_duration")
+
+
+def load_backtest_for_forecast(forecast_data):
+    return load_backtest_summary(forecast_data["historical_revenue"], executor=get_job_runner().process_pool)
+
+
+def build_compute_graph():
+    graph = ComputeGraph()
+
+    @graph.node(
+        "cost_breakdown",
+        reads=SIMULATION_INPUTS + ("total_cost_per_minute", "config.service_costs"),
+    )
+    def cost_breakdown(inputs):
+        return calculate_costs(
+            inputs["config"], inputs["num_agents"], inputs["calls_per_day"],
+            inputs["mean_call_duration"], inputs["total_cost_per_minute"],
+        )
+
+    @graph.node(
+        "scale_table",
+        reads=SIMULATION_INPUTS + (
+            "total_cost_per_minute", "config.financial_metrics", "config.cost_structure", "config.pricing_tiers"
+        ),
+    )
+    def scale_table(inputs):
+        return calculate_scale_data(
+            inputs["config"], inputs["num_agents"], inputs["calls_per_day"],
+            inputs["mean_call_duration"], inputs["total_cost_per_minute"],
+        )
+
+    @graph.node("peak_concurrency", reads=SIMULATION_INPUTS)
+    def peak_concurrency(inputs):
+        return scale_concurrency(
+            inputs["num_agents"], inputs["calls_per_day"], inputs["mean_call_duration"], SCALE_FACTORS,
+            rng=get_random_streams().generator("peak_concurrency"),
+        )
+
+    # The heavy nodes below return futures of background jobs; rerunning a node supersedes its previous job
+    @graph.node(
+        "monte_carlo",
+        reads=SIMULATION_INPUTS + (
+            "config.financial_metrics.price_per_call", "config.service_costs", "monte_carlo_settings"
+        ),
+    )
+    def monte_carlo(inputs):
+        return get_job_runner().submit(
+            session_slot("monte_carlo"),
+            load_monte_carlo_results,
+            copy.deepcopy(inputs["config"]), inputs["num_agents"], inputs["calls_per_day"],
+            inputs["mean_call_duration"], inputs["monte_carlo_settings"],
+            streams=get_random_streams(), with_progress=True,
+        )
+
+    @graph.node(
+        "revenue_forecast",
+        reads=SIMULATION_INPUTS + ("config.financial_metrics.price_per_call",),
+    )
+    def revenue_forecast(inputs):
+        # A thread job, so the forecast extends the models cached in this process rather than a worker's copy
+        return get_job_runner().submit(
+            session_slot("revenue_forecast"),
+            load_forecast_data,
+            inputs["config"], inputs["num_agents"], inputs["calls_per_day"], inputs["mean_call_duration"],
+            streams=get_random_streams(),
+        )
+
+    @graph.node("forecast_backtest", deps=("revenue_forecast",))
+    def forecast_backtest(inputs, revenue_forecast):
+        # Started by the forecast job as it finishes, so no pool thread sits waiting for it. The fold fits need no
+        # model cache of this process, so the job spreads them over the process pool rather than holding the GIL.
+        return get_job_runner().submit_after(
+            session_slot("forecast_backtest"), revenue_forecast, load_backtest_for_forecast
+        )
+
+    return graph
@@ -0,0 +1,102 @@
+import time
+
+import pandas as pd
+
+from snapshot_store import fingerprint
+
+
+class ComputeNode:
+    def __init__(self, name, func, reads=(), deps=()):
+        self.name = name
+        self.func = func
+        self.reads = tuple(reads)
+        self.deps = tuple(deps)
+
+
+def resolve_input(inputs, path):
+    # "num_agents" reads a sidebar input, "config.market_data.our_market_share" a config path
+    keys = path.split(".")
+    value = inputs
+    for key in keys:
+        if value is None:
+            return None
+        value = value.get(key) if hasattr(value, "get") else None
+    return value
+
+
+class ComputeGraph:
+    def __init__(self):
+        self.nodes = {}
+        self.values = {}
+        self.read_fingerprints = {}
+        self.node_fingerprints = {}
+        self.run_log = {}
+
+    def add_node(self, name, func, reads=(), deps=()):
+        missing = [dep for dep in deps if dep not in self.nodes]
+        if missing:
+            raise ValueError(f"Node '{name}' depends on unknown nodes: {', '.join(missing)}")
+        self.nodes[name] = ComputeNode(name, func, reads, deps)
+
+    def node(self, name, reads=(), deps=()):
+        def register(func):
+            self.add_node(name, func, reads, deps)
+            return func
+        return register
+
+    def evaluate(self, name, inputs, _evaluated=None):
+        evaluated = {} if _evaluated is None else _evaluated
+        if name in evaluated:
+            return evaluated[name]
+
+        node = self.nodes[name]
+        dep_values = {dep: self.evaluate(dep, inputs, evaluated) for dep in node.deps}
+        read_fingerprints = {path: fingerprint(resolve_input(inputs, path)) for path in node.reads}
+        node_fingerprint = fingerprint(
+            read_fingerprints, [self.node_fingerprints[dep] for dep in node.deps]
+        )
+
+        if self.node_fingerprints.get(name) == node_fingerprint:
+            self.run_log[name] = {"status": "cached", "reason": "inputs unchanged", "duration_ms": 0.0}
+        else:
+            previous = self.read_fingerprints.get(name)
+            if previous is None:
+                reason = "first run"
+            else:
+                changed = [path for path, fp in read_fingerprints.items() if previous.get(path) != fp]
+                changed += [f"node:{dep}" for dep in node.deps if self.run_log[dep]["status"] == "ran"]
+                reason = "changed: " + ", ".join(changed)
+
+            start = time.perf_counter()
+            self.values[name] = node.func(inputs, **dep_values)
+            self.run_log[name] = {
+                "status": "ran",
+                "reason": reason,
+                "duration_ms": (time.perf_counter() - start) * 1000,
+            }
+            self.read_fingerprints[name] = read_fingerprints
+            self.node_fingerprints[name] = node_fingerprint
+
+        evaluated[name] = self.values[name]
+        return evaluated[name]
+
+    def evaluate_all(self, inputs):
+        evaluated = {}
+        for name in self.nodes:
+            self.evaluate(name, inputs, evaluated)
+        return evaluated
+
+    def describe(self):
+        return pd.DataFrame(
+            [
+                {
+                    "Node": name,
+                    "Reads": ", ".join(node.reads),
+                    "Depends On": ", ".join(node.deps),
+                    "Status": self.run_log.get(name, {}).get("status", "pending"),
+                    "Reason": self.run_log.get(name, {}).get("reason", ""),
+                    "Duration (ms)": self.run_log.get(name, {}).get("duration_ms", 0.0),
+                }
+                for name, node in self.nodes.items()
+            ]
+        )
@@ -0,0 +1,134 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_MINUTE = 60
+SIMULATION_DAYS = 7
+# Larger volumes are simulated on a sample and scaled up, which slightly overstates the random part of the peaks
+MAX_SIMULATED_CALLS = 1_000_000
+QUANTILES = (0.5, 0.95, 0.99)
+# Share of a day's calls starting in each hour, for a contact centre busiest in business hours
+HOURLY_CALL_SHARE = np.array([
+    0.5, 0.3, 0.2, 0.2, 0.3, 0.6, 1.5, 3.5, 6.0, 8.0, 8.5, 8.0,
+    7.0, 7.5, 8.0, 7.5, 7.0, 6.0, 4.5, 3.0, 2.0, 1.5, 1.0, 0.7,
+])
+HOURLY_CALL_SHARE = HOURLY_CALL_SHARE / HOURLY_CALL_SHARE.sum()
+
+
+def concurrency_series(starts, ends):
+    # Sweep line: +1 at every start and -1 at every end, in time order; at equal times ends come first, so a
+    # call starting as another ends does not overlap it. Returns event times and the concurrency after each.
+    times = np.concatenate([np.asarray(ends, dtype=float), np.asarray(starts, dtype=float)])
+    deltas = np.concatenate([-np.ones(len(ends), dtype=np.int64), np.ones(len(starts), dtype=np.int64)])
+    order = np.argsort(times, kind="stable")  # Ends are listed first, and a stable sort keeps them first on ties
+    return times[order], np.cumsum(deltas[order])
+
+
+def minute_maxima(times, levels, start, num_minutes):
+    # Highest concurrency within each minute, counting calls carried over from earlier minutes
+    # The level at the start of each minute is the one after every event up to and including that instant
+    last_before = np.searchsorted(times, start + np.arange(num_minutes) * SECONDS_PER_MINUTE, side="right") - 1
+    maxima = np.where(last_before >= 0, levels[np.maximum(last_before, 0)], 0)
+    # Only the level after the last of several events at the same instant was ever actually reached
+    settled = np.append(times[1:] != times[:-1], True)
+    times, levels = times[settled], levels[settled]
+    minutes = np.floor((times - start) / SECONDS_PER_MINUTE).astype(np.int64)
+    inside = (minutes >= 0) & (minutes < num_minutes)
+    np.maximum.at(maxima, minutes[inside], levels[inside])
+    return maxima
+
+
+def concurrency_stats(starts, ends, start, num_minutes):
+    # Per-minute maxima over [start, start + num_minutes) and the mean concurrency over the same window
+    times, levels = concurrency_series(starts, ends)
+    maxima = minute_maxima(times, levels, start, num_minutes)
+    end = start + num_minutes * SECONDS_PER_MINUTE
+    busy_seconds = np.clip(np.minimum(ends, end) - np.maximum(starts, start), 0, None).sum()
+    return maxima, busy_seconds / (end - start)
+
+
+def simulate_calls(calls_per_day, mean_call_duration, days=SIMULATION_DAYS, rng=None):
+    # Poisson arrivals following the hourly profile, uniform within each hour, with exponential durations
+    rng = np.random.default_rng() if rng is None else rng
+    counts = rng.poisson(calls_per_day * HOURLY_CALL_SHARE, size=(days, len(HOURLY_CALL_SHARE))).ravel()
+    starts = np.repeat(np.arange(len(counts)) * 3600.0, counts) + rng.uniform(0, 3600, counts.sum())
+    return starts, starts + rng.exponential(mean_call_duration * SECONDS_PER_MINUTE, len(starts))
+
+
+def summarize(maxima, mean_concurrency, scale=1.0):
+    p50, p95, p99 = np.quantile(maxima, QUANTILES) * scale
+    peak = maxima.max() * scale
+    mean_concurrency = mean_concurrency * scale
+    return {
+        "Mean Concurrent Calls": mean_concurrency,
+        "p50 Minute Peak": p50,
+        "p95 Minute Peak": p95,
+        "p99 Minute Peak": p99,
+        "Peak Concurrent Calls": peak,
+        "Peak-to-Average": peak / mean_concurrency if mean_concurrency > 0 else np.nan,
+    }
+
+
+def scale_concurrency(num_agents, calls_per_day, mean_call_duration, scale_factors, rng=None):
+    # Simulated concurrency at every scale, plus the per-minute maxima at the unscaled volume
+    rng = np.random.default_rng() if rng is None else rng
+    rows = []
+    base_maxima = None
+    for scale in scale_factors:
+        agents = int(num_agents * scale)
+        daily_calls = agents * calls_per_day
+        days = int(np.clip(MAX_SIMULATED_CALLS // max(daily_calls, 1), 1, SIMULATION_DAYS))
+        share = min(1.0, MAX_SIMULATED_CALLS / max(daily_calls * days, 1))
+        starts, ends = simulate_calls(daily_calls * share, mean_call_duration, days, rng)
+        maxima, mean_concurrency = concurrency_stats(starts, ends, 0.0, days * 24 * 60)
+        rows.append({"Scale": f"{agents} Agents", "Calls per Day": daily_calls,
+                     **summarize(maxima, mean_concurrency, 1 / share), "Simulated Share (%)": share * 100})
+        if scale == 1:
+            base_maxima = maxima / share
+    return pd.DataFrame(rows), base_maxima
+
+
+def parse_call(line):
+    # One record per finished call, e.g. {"type": "call", "started_at": "2024-05-01T12:00:03Z", "ended_at": ...};
+    # timestamps are ISO 8601 or epoch seconds
+    try:
+        event = json.loads(line)
+        return event["started_at"], event["ended_at"]
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def call_intervals(paths):
+    # Start and end times in epoch seconds of every call record in the given JSONL logs
+    records = []
+    for path in paths:
+        with open(path, errors="replace") as f:
+            records.extend(record for record in map(parse_call, f) if record is not None)
+    if not records:
+        return np.empty(0), np.empty(0)
+
+    def seconds(values):
+        values = pd.Series(values, dtype=object)
+        numeric = pd.to_numeric(values, errors="coerce")
+        text = numeric.isna()
+        if text.any():
+            parsed = pd.to_datetime(values[text], utc=True, format="ISO8601", errors="coerce")
+            numeric[text] = (parsed - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+        return numeric.to_numpy(dtype=float)
+
+    starts, ends = (seconds(values) for values in zip(*records))
+    valid = np.isfinite(starts) & np.isfinite(ends) & (ends >= starts)
+    return starts[valid], ends[valid]
+
+
+def measured_concurrency(paths):
+    # Concurrency over the whole minutes spanned by the logged calls; None without call records
+    starts, ends = call_intervals(paths)
+    if len(starts) == 0:
+        return None
+    start = np.floor(starts.min() / SECONDS_PER_MINUTE) * SECONDS_PER_MINUTE
+    num_minutes = int(np.ceil((ends.max() - start) / SECONDS_PER_MINUTE)) or 1
+    maxima, mean_concurrency = concurrency_stats(starts, ends, start, num_minutes)
+    return {"Scale": "Measured (logs)", "Calls per Day": len(starts) / (num_minutes / (24 * 60)),
+            **summarize(maxima, mean_concurrency), "Simulated Share (%)": np.nan}
@@ -0,0 +1,133 @@
+import os
+import re
+import tempfile
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+EXPORT_CHUNK_ROWS = 100_000
+EXCEL_MAX_ROWS = 1_048_576
+EXPORT_FORMATS = {"Excel workbook (.xlsx)": "xlsx", "Parquet bundle (.zip)": "zip"}
+# Streamlit holds download button data in server memory, so larger exports stay on disk on the server
+EXPORT_DOWNLOAD_MAX_BYTES = int(os.environ.get("EXPORT_DOWNLOAD_MAX_BYTES", 200 * 1024 ** 2))
+
+
+def reset_export_frames():
+    st.session_state.export_frames = {}
+
+
+def register_export_frame(name, frame):
+    # frame is a DataFrame, or a callable yielding DataFrame chunks for results too large to materialize
+    st.session_state.setdefault("export_frames", {})[name] = frame
+
+
+def iter_frame_chunks(frame, chunk_rows=EXPORT_CHUNK_ROWS):
+    if callable(frame):
+        yield from frame()
+        return
+    for start in range(0, max(len(frame), 1), chunk_rows):
+        yield frame.iloc[start:start + chunk_rows]
+
+
+def _sheet_name(name, used):
+    base = re.sub(r"[\[\]:*?/\\]", "-", name)[:31]
+    sheet, suffix = base, 2
+    while sheet.lower() in used:
+        sheet = f"{base[:31 - len(str(suffix)) - 1]} {suffix}"
+        suffix += 1
+    used.add(sheet.lower())
+    return sheet
+
+
+def write_excel(frames, f):
+    import xlsxwriter
+
+    # constant_memory flushes each row to disk as soon as the next one starts
+    workbook = xlsxwriter.Workbook(f, {
+        "constant_memory": True,
+        "nan_inf_to_errors": True,
+        "default_date_format": "yyyy-mm-dd hh:mm",
+    })
+    used = set()
+    for name, frame in frames.items():
+        worksheet, row = None, 0
+        for chunk in iter_frame_chunks(frame):
+            header = [str(column) for column in chunk.columns]
+            for values in chunk.astype(object).where(chunk.notna(), None).itertuples(index=False):
+                # Frames longer than a sheet continue on numbered sheets
+                if row == EXCEL_MAX_ROWS:
+                    worksheet = None
+                if worksheet is None:
+                    worksheet = workbook.add_worksheet(_sheet_name(name, used))
+                    worksheet.write_row(0, 0, header)
+                    row = 1
+                worksheet.write_row(row, 0, values)
+                row += 1
+            if worksheet is None:
+                worksheet = workbook.add_worksheet(_sheet_name(name, used))
+                worksheet.write_row(0, 0, header)
+                row = 1
+    workbook.close()
+
+
+def write_parquet_bundle(frames, f):
+    used = set()
+    with zipfile.ZipFile(f, "w", compression=zipfile.ZIP_STORED) as bundle:
+        for name, frame in frames.items():
+            with bundle.open(f"{_sheet_name(name, used)}.parquet", "w", force_zip64=True) as member:
+                writer = None
+                # Each chunk becomes one row group, written straight into the archive
+                for chunk in iter_frame_chunks(frame):
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(member, table.schema)
+                    writer.write_table(table.cast(writer.schema))
+                if writer is not None:
+                    writer.close()
+
+
+def write_export(frames, f, export_format="xlsx"):
+    if export_format == "xlsx":
+        write_excel(frames, f)
+    elif export_format == "zip":
+        write_parquet_bundle(frames, f)
+    else:
+        raise ValueError(f"Unknown export format: {export_format}")
+
+
+def render_export_controls():
+    # Every run registers its tables again, so they are not kept in the session between runs
+    frames = st.session_state.pop("export_frames", {})
+    with st.sidebar.expander("Export Data"):
+        st.caption(f"{len(frames)} tables from all tabs; results still computing are left out.")
+        export_format = EXPORT_FORMATS[st.radio("Format", list(EXPORT_FORMATS), key="export_format")]
+        st.caption(f"Exports over {EXPORT_DOWNLOAD_MAX_BYTES / 1024 ** 2:,.0f} MB are saved on the server rather than "
+                   "downloaded, since Streamlit keeps downloads in server memory.")
+        if st.button("Prepare Export", disabled=not frames):
+            export_dir = os.environ.get("EXPORT_DIR", ".exports")
+            os.makedirs(export_dir, exist_ok=True)
+            stem = f"dashboard_export_{datetime.now():%Y%m%d_%H%M%S}"
+            # Unique on disk, as other sessions may export in the same second
+            with tempfile.NamedTemporaryFile(dir=export_dir, prefix=f"{stem}_", suffix=f".{export_format}",
+                                             delete=False) as f:
+                write_export(frames, f, export_format)
+            path = f.name
+            size = os.path.getsize(path)
+            if size > EXPORT_DOWNLOAD_MAX_BYTES:
+                st.info(f"The export is {size / 1024 ** 2:,.0f} MB and was saved on the server as "
+                        f"{os.path.abspath(path)}.")
+                return
+            # The open file is handed over, but Streamlit reads it into memory to serve it
+            with open(path, "rb") as f:
+                st.download_button(
+                    "Download",
+                    f,
+                    file_name=f"{stem}.{export_format}",
+                    mime="application/zip" if export_format == "zip"
+                    else "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                )
+            os.remove(path)
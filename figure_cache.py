@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+import threading
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+from cachetools import LRUCache
+
+from snapshot_store import CODE_VERSION, fingerprint
+
+FIGURE_CACHE_BYTES = int(os.environ.get("FIGURE_CACHE_BYTES", 128 * 1024 ** 2))
+
+
+def _digest(value):
+    # Frames are hashed by content, including index, column names and dtypes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            hashed = pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        except TypeError:
+            hashed = value.to_json(date_format="iso").encode()
+        if isinstance(value, pd.DataFrame):
+            meta = ([str(column) for column in value.columns], [str(dtype) for dtype in value.dtypes])
+        else:
+            meta = (str(value.name), str(value.dtype))
+        return hashlib.sha256(hashed + json.dumps(meta).encode()).hexdigest()
+    return value
+
+
+class FigureCache:
+    def __init__(self, max_bytes=FIGURE_CACHE_BYTES):
+        # Figures are kept as their JSON, bounded by total size, least recently used first out
+        self._figures = LRUCache(maxsize=max_bytes, getsizeof=len)
+        self._lock = threading.Lock()
+        self.counts = {}
+
+    def figure(self, name, build, *inputs):
+        key = f"{name}-{fingerprint(CODE_VERSION, name, *(_digest(value) for value in inputs))}"
+        with self._lock:
+            spec = self._figures.get(key)
+            counts = self.counts.setdefault(name, {"hits": 0, "misses": 0})
+            counts["hits" if spec is not None else "misses"] += 1
+        if spec is not None:
+            # The spec was validated when it was built, so validation is skipped on the way back
+            return go.Figure(json.loads(spec), _validate=False)
+
+        fig = build()
+        spec = fig.to_json()
+        with self._lock:
+            try:
+                self._figures[key] = spec
+            except ValueError:
+                pass  # Larger than the whole cache
+        return fig
+
+    def stats(self):
+        with self._lock:
+            counts = {name: dict(chart) for name, chart in self.counts.items()}
+            size = self._figures.currsize
+            entries = len(self._figures)
+        df = pd.DataFrame(
+            [{"Chart": name, "Hits": chart["hits"], "Misses": chart["misses"]} for name, chart in counts.items()],
+            columns=["Chart", "Hits", "Misses"],
+        )
+        df["Hit Rate"] = df["Hits"] / (df["Hits"] + df["Misses"])
+        return df, size, entries
+
+
+@st.cache_resource
+def get_figure_cache():
+    # Shared by every session, so one session's figures are reused by others with the same inputs
+    return FigureCache()
+
+
+def cached_figure(name, build, *inputs):
+    # build takes no arguments; inputs must include every frame and parameter it reads
+    return get_figure_cache().figure(name, build, *inputs)
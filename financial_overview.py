@@ -2,7 +2,11 @@ import streamlit as st
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
-from datetime import datetime, timedelta
+import numpy as np
+from break_even import DAYS_PER_MONTH, cost_structure, minimum_price, pricing_tiers, solve_volume, tiered_revenue
+from cohort_projection import GRANULARITIES, project_cohorts
+from data_export import register_export_frame
+from result_tables import CURRENCY, CURRENCY_PRECISE, PERCENT, render_table
 
 
 def calculate_costs(
@@ -46,24 +50,21 @@ def calculate_costs(
 
 
 def calculate_revenue(config, num_agents, calls_per_day):
-    DAYS_PER_MONTH = 30
-    monthly_revenue = (
-        num_agents
-        * calls_per_day
-        * config["financial_metrics"]["price_per_call"]
-        * DAYS_PER_MONTH
-    )
-    return monthly_revenue
+    monthly_calls = num_agents * calls_per_day * DAYS_PER_MONTH
+    return float(tiered_revenue(monthly_calls, config["financial_metrics"]["price_per_call"], pricing_tiers(config)))
 
 
 def render_financial_overview(
-    config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute
+    config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute,
+    df_costs=None
 ):
     st.header("Financial Overview")
 
-    df_costs = calculate_costs(
-        config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute
-    )
+    if df_costs is None:
+        df_costs = calculate_costs(
+            config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute
+        )
+    register_export_frame("Cost Breakdown", df_costs)
     total_monthly_cost = df_costs["Monthly Cost ($)"].sum()
     monthly_revenue = calculate_revenue(config, num_agents, calls_per_day)
     monthly_profit = monthly_revenue - total_monthly_cost
@@ -91,25 +92,55 @@ def render_financial_overview(
     )
     st.plotly_chart(fig_revenue_cost)
 
-    # Profit Trend Projection
+    # Cohort Projection
     growth_rate = config["financial_metrics"]["expected_growth_rate"]
-    dates = [datetime.now() + timedelta(days=x) for x in range(365)]
-    profit_trend = pd.DataFrame(
-        {
-            "Date": dates,
-            "Projected Profit": [
-                monthly_profit * (1 + (i / 365) * growth_rate) for i in range(365)
-            ],
-        }
-    )
+    st.subheader("Cohort Projection")
+    with st.expander("Cohort Assumptions"):
+        col1, col2, col3 = st.columns(3)
+        horizon_months = col1.slider("Horizon (months)", 12, 60, 36, step=12, key="cohort_horizon")
+        granularity = col1.radio("Granularity", list(GRANULARITIES), horizontal=True, key="cohort_granularity")
+        new_agents = col2.number_input(
+            "New Agents per Month", min_value=0.0, value=float(num_agents * growth_rate / 12), key="cohort_new_agents"
+        )
+        ramp_months = col2.slider("Ramp-up (months)", 0, 12, 2, key="cohort_ramp_months")
+        monthly_churn = col3.slider("Monthly Churn (%)", 0.0, 20.0, 2.0, step=0.5, key="cohort_churn") / 100
+        annual_price_change = col3.slider(
+            "Annual Price Change (%)", -20.0, 20.0, 0.0, step=1.0, key="cohort_price_change"
+        ) / 100
+
+    profit_trend, cohorts, cohort_revenue = project_cohorts(
+        num_agents,
+        new_agents,
+        monthly_revenue / num_agents,
+        total_monthly_cost / num_agents,
+        months=horizon_months,
+        monthly_churn=monthly_churn,
+        ramp_months=ramp_months,
+        annual_price_change=annual_price_change,
+        periods_per_month=GRANULARITIES[granularity],
+    )
+    register_export_frame("Profit Projection", profit_trend)
+    register_export_frame("Cohort Summary", cohorts)
     fig_profit_trend = px.line(
         profit_trend,
         x="Date",
-        y="Projected Profit",
-        title=f"Projected Annual Profit Trend (Growth Rate: {growth_rate:.1%})",
+        y=["Revenue", "Cost", "Profit"],
+        title=f"Projected {granularity} Revenue, Cost and Profit ({horizon_months} Months)",
     )
     st.plotly_chart(fig_profit_trend)
 
+    # One column per projection month, labelled by the date its first period starts
+    month_starts = profit_trend["Date"].iloc[::GRANULARITIES[granularity]]
+    fig_cohorts = px.imshow(
+        cohort_revenue,
+        x=month_starts.dt.strftime("%Y-%m-%d"),
+        y=cohorts["Cohort"],
+        labels={"x": "Month", "y": "Cohort", "color": "Revenue ($)"},
+        aspect="auto",
+        title="Revenue by Cohort and Month",
+    )
+    st.plotly_chart(fig_cohorts)
+
     # Cost Breakdown
     fig_cost_breakdown = px.pie(
         df_costs,
@@ -120,23 +151,44 @@ def render_financial_overview(
     st.plotly_chart(fig_cost_breakdown)
 
     # Financial Metrics Table
+    monthly_calls = num_agents * calls_per_day * DAYS_PER_MONTH
+    price_per_call = config["financial_metrics"]["price_per_call"]
+    target_margin = config["financial_metrics"]["target_margin"]
+    variable_cost_per_call = total_monthly_cost / monthly_calls
+    structure = cost_structure(config, num_agents, mean_call_duration)
+    tiers = pricing_tiers(config)
+    break_even_calls = float(solve_volume(price_per_call, variable_cost_per_call, tiers=tiers, **structure))
+    target_margin_calls = float(solve_volume(
+        price_per_call, variable_cost_per_call, tiers=tiers, target_margin=target_margin, **structure
+    ))
+    min_price = float(minimum_price(
+        monthly_calls, price_per_call, variable_cost_per_call, tiers=tiers, target_margin=target_margin, **structure
+    ))
     financial_metrics = pd.DataFrame(
         {
             "Metric": [
                 "Revenue per Call",
                 "Cost per Call",
                 "Profit per Call",
+                f"Minimum Price per Call for a {target_margin:.0%} Margin",
                 "Break-even Calls per Month",
+                f"Calls per Month for a {target_margin:.0%} Margin",
             ],
             "Value": [
-                f"${config['financial_metrics']['price_per_call']:.2f}",
-                f"${(total_monthly_cost / (num_agents * calls_per_day * 30)):.2f}",
-                f"${(monthly_profit / (num_agents * calls_per_day * 30)):.2f}",
-                f"{int(total_monthly_cost / config['financial_metrics']['price_per_call']):,}",
+                monthly_revenue / monthly_calls,
+                total_monthly_cost / monthly_calls,
+                monthly_profit / monthly_calls,
+                min_price,
+                break_even_calls,
+                target_margin_calls,
             ],
         }
     )
-    st.table(financial_metrics)
+    register_export_frame("Financial Metrics", financial_metrics)
+    render_table(financial_metrics.head(4), {"Value": CURRENCY})
+    col1, col2 = st.columns(2)
+    for col, (metric, calls) in zip((col1, col2), financial_metrics.tail(2).itertuples(index=False)):
+        col.metric(metric, f"{calls:,.0f}" if np.isfinite(calls) else "Not reachable")
 
     # Cost per Minute Breakdown
     st.subheader("Cost per Minute Breakdown")
@@ -176,13 +228,8 @@ def render_financial_overview(
         / cost_per_minute["Cost per Minute ($)"].sum()
         * 100
     )
-    cost_per_minute["Cost per Minute ($)"] = cost_per_minute[
-        "Cost per Minute ($)"
-    ].apply(lambda x: f"${x:.4f}")
-    cost_per_minute["Percentage"] = cost_per_minute["Percentage"].apply(
-        lambda x: f"{x:.2f}%"
-    )
-    st.table(cost_per_minute)
+    register_export_frame("Cost per Minute", cost_per_minute)
+    render_table(cost_per_minute, {"Cost per Minute ($)": CURRENCY_PRECISE, "Percentage": PERCENT})
 
     # Key Insights
     st.subheader("Key Financial Insights")
@@ -193,10 +240,11 @@ def render_financial_overview(
         f"2. The largest cost component is {df_costs.iloc[df_costs['Monthly Cost ($)'].idxmax()]['Service']}, accounting for {df_costs['Monthly Cost ($)'].max() / total_monthly_cost * 100:.2f}% of total costs."
     )
     st.write(
-        f"3. To break even, we need to handle at least {int(total_monthly_cost / config['financial_metrics']['price_per_call']):,} calls per month."
+        f"3. To break even, we need to handle at least {break_even_calls:,.0f} calls per month, including fixed and step costs." if np.isfinite(break_even_calls)
+        else "3. The price per call does not cover the variable cost of a call, so no call volume breaks even."
     )
     st.write(
-        f"4. The projected annual profit trend shows {'an increasing' if growth_rate > 0 else 'a decreasing'} pattern, with an expected growth rate of {growth_rate:.1%}."
+        f"4. Over the next {horizon_months} months the cohorts project a cumulative profit of ${profit_trend['Profit'].sum():,.2f}, with {profit_trend['Active Clients'].iloc[-1]:,.0f} active agents at the end after {monthly_churn:.1%} monthly churn."
     )
     st.write(
         "5. Consider strategies to reduce costs or increase revenue to improve overall financial performance."
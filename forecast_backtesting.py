@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+from batch_forecasting import forecast_arima_series, batch_forecast
+
+FORECAST_METHODS = ["naive", "ses", "holt", "arima"]
+
+
+def rolling_origin_folds(n_obs, initial, horizon, step=1, window="expanding"):
+    # (train_start, train_end, test_end) triples; the test set is [train_end, test_end)
+    folds = []
+    for train_end in range(initial, n_obs - horizon + 1, step):
+        train_start = 0 if window == "expanding" else train_end - initial
+        folds.append((train_start, train_end, train_end + horizon))
+    return folds
+
+
+def _naive_forecast(train, horizon, level):
+    steps = np.arange(1, horizon + 1)
+    forecast = np.full(horizon, train[-1])
+    sigma = np.std(np.diff(train), ddof=1) if len(train) > 2 else 0.0
+    half_width = norm.ppf(0.5 + level / 2) * sigma * np.sqrt(steps)
+    return forecast, forecast - half_width, forecast + half_width
+
+
+def _forecast_folds(series, method, folds, level):
+    horizon = folds[0][2] - folds[0][1]
+    train_lengths = {train_end - train_start for train_start, train_end, _ in folds}
+
+    # Equal-length training windows can be smoothed together as one batch
+    if method in ("ses", "holt") and len(train_lengths) == 1:
+        windows = np.vstack([series[start:end] for start, end, _ in folds])
+        return batch_forecast(windows, horizon=horizon, method=method, level=level)
+
+    outputs = []
+    for train_start, train_end, _ in folds:
+        train = series[train_start:train_end]
+        if method == "naive":
+            outputs.append(_naive_forecast(train, horizon, level))
+        elif method == "arima":
+            outputs.append(forecast_arima_series((train, (1, 1, 1), horizon, 1 - level)))
+        else:
+            forecast, lower, upper = batch_forecast(train, horizon=horizon, method=method, level=level)
+            outputs.append((forecast[0], lower[0], upper[0]))
+    return tuple(np.vstack(part) for part in zip(*outputs))
+
+
+def _score_folds(series, folds, forecast, lower, upper):
+    actual = np.vstack([series[train_end:test_end] for _, train_end, test_end in folds])
+    error = actual - forecast
+
+    # MASE scales by the in-sample one-step naive error of each fold's training window
+    naive_scale = np.array([
+        np.mean(np.abs(np.diff(series[train_start:train_end]))) for train_start, train_end, _ in folds
+    ])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return {
+            "MAPE": np.mean(np.abs(error / actual)) * 100,
+            "sMAPE": np.mean(2 * np.abs(error) / (np.abs(actual) + np.abs(forecast))) * 100,
+            "MASE": np.mean(np.abs(error).mean(axis=1) / naive_scale),
+            "Coverage": np.mean((actual >= lower) & (actual <= upper)) * 100,
+        }
+
+
+def _forecast_task(args):
+    series, method, folds, level = args
+    return _forecast_folds(series, method, folds, level)
+
+
+def split_folds(folds, num_chunks):
+    # Consecutive runs of folds, so the equal-length windows of a sliding backtest still batch together
+    num_chunks = max(1, min(num_chunks, len(folds)))
+    bounds = np.linspace(0, len(folds), num_chunks + 1).astype(int)
+    return [folds[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def series_hash(series, method, folds, level):
+    digest = hashlib.sha1(np.ascontiguousarray(series, dtype=float).tobytes())
+    digest.update(json.dumps([method, folds, level]).encode())
+    return digest.hexdigest()
+
+
+def run_backtest(
+    Y,
+    methods=FORECAST_METHODS,
+    initial=12,
+    horizon=3,
+    step=1,
+    window="expanding",
+    level=0.95,
+    series_names=None,
+    cache=None,
+    max_workers=None,
+    executor=None,
+):
+    # Fits run in the given executor, e.g. the job runner's process pool, else in a pool of max_workers processes
+    # (in-process for max_workers=1)
+    Y = np.atleast_2d(np.asarray(Y, dtype=float))
+    folds = rolling_origin_folds(Y.shape[1], initial, horizon, step, window)
+    if not folds:
+        raise ValueError("Series are too short for the requested initial window and horizon.")
+    if series_names is None:
+        series_names = [f"Series {i + 1}" for i in range(Y.shape[0])]
+    cache = {} if cache is None else cache
+
+    keys, pending = {}, []
+    for i, series in enumerate(Y):
+        for method in methods:
+            key = series_hash(series, method, folds, level)
+            keys[(i, method)] = key
+            if key not in cache:
+                pending.append((key, (series, method, folds, level)))
+
+    if pending:
+        if max_workers == 1 and executor is None:
+            outputs = [[_forecast_task(task)] for _, task in pending]
+        else:
+            # Folds are independent fits, so each series and method is split into fold chunks until every worker
+            # has a few tasks to pick up
+            workers = max_workers or os.cpu_count() or 1
+            num_chunks = -(-4 * workers // len(pending))
+            tasks, owners = [], []
+            for index, (_, (series, method, folds, level)) in enumerate(pending):
+                for chunk in split_folds(folds, num_chunks):
+                    tasks.append((series, method, chunk, level))
+                    owners.append(index)
+            if executor is None:
+                with ProcessPoolExecutor(max_workers=max_workers) as own_executor:
+                    chunk_outputs = list(own_executor.map(_forecast_task, tasks))
+            else:
+                chunk_outputs = list(executor.map(_forecast_task, tasks))
+            outputs = [[] for _ in pending]
+            for index, output in zip(owners, chunk_outputs):
+                outputs[index].append(output)
+
+        for (key, (series, _, folds, _)), chunks in zip(pending, outputs):
+            forecast, lower, upper = (np.vstack(part) for part in zip(*chunks))
+            cache[key] = _score_folds(series, folds, forecast, lower, upper)
+
+    rows = [
+        {"Series": series_names[i], "Method": method, "Folds": len(folds), **cache[key]}
+        for (i, method), key in keys.items()
+    ]
+    return pd.DataFrame(rows)
+
+
+def summarize_backtest(df_backtest):
+    return df_backtest.groupby("Method", sort=False)[["MAPE", "sMAPE", "MASE", "Coverage"]].mean().reset_index()
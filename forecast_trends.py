@@ -1,29 +1,70 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
+from cachetools import LRUCache
 from datetime import datetime, timedelta
+from incremental_forecast import update_forecast_model
+from batch_forecasting import batch_forecast, build_summing_matrix, reconcile_forecasts
+from forecast_backtesting import run_backtest, summarize_backtest
+from snapshot_store import fingerprint, get_snapshot_store
+from metrics_store import DEFAULT_TENANT, get_metrics_store
+from market_position import MARKET_HISTORY_DAYS
+from background_jobs import job_result, render_job_result
+from random_streams import get_random_streams
+from risk_assessment import calculate_total_cost_per_minute
+from portfolio import DEFAULT_CLIENT_DIRECTORY, load_client_configs
+from data_export import register_export_frame
+from result_tables import NUMBER, PERCENT, render_table
+
+REVENUE_HISTORY_DAYS = 24 * 31
+# The rolling-origin backtest needs 12 fitting months plus a 3-month horizon
+MIN_REVENUE_MONTHS = 15
+CLIENT_HISTORY_MONTHS = 24
+RECONCILIATION_METHODS = {"OLS": "ols", "WLS (structural)": "wls"}
+
+
+@st.cache_resource
+def get_forecast_model_cache():
+    # Shared by the sessions of this server process; keyed by the series each model follows
+    return LRUCache(maxsize=256)
+
+
+@st.cache_resource
+def get_backtest_cache():
+    return LRUCache(maxsize=10000)
 
 
 def generate_forecast_data(
-    config, num_agents, calls_per_day, mean_call_duration, forecast_periods=12
+    config, num_agents, calls_per_day, mean_call_duration, forecast_periods=12,
+    model_cache=None, model_key="revenue", rng=None, stored_revenue=None
 ):
-    # Generate historical data
-    dates = pd.date_range(end=datetime.now(), periods=24, freq="M")
-    historical_revenue = [
-        calculate_revenue(config, num_agents, calls_per_day)
-        * (1 + np.random.normal(0, 0.05))
-        for _ in range(24)
-    ]
+    rng = np.random.default_rng() if rng is None else rng
+
+    # Recorded revenue from the metrics store where there is enough of it, otherwise simulated history
+    if stored_revenue is not None:
+        dates = pd.DatetimeIndex(stored_revenue["Date"])
+        historical_revenue = stored_revenue["Revenue"].tolist()
+    else:
+        dates = pd.date_range(end=datetime.now(), periods=24, freq="M")
+        historical_revenue = list(
+            calculate_revenue(config, num_agents, calls_per_day) * (1 + rng.normal(0, 0.05, size=24))
+        )
 
-    # Fit ARIMA model
-    model = ARIMA(historical_revenue, order=(1, 1, 1))
-    results = model.fit()
+    # Fit ARIMA model, or extend the cached one when only new periods arrived
+    if model_cache is not None:
+        model = update_forecast_model(model_cache, model_key, historical_revenue)
+        forecast = model.forecast(forecast_periods)
+    else:
+        model = ARIMA(historical_revenue, order=(1, 1, 1))
+        results = model.fit()
+        forecast = results.forecast(steps=forecast_periods)
 
-    # Generate forecast
-    forecast = results.forecast(steps=forecast_periods)
+    # Forecast dates
     forecast_dates = pd.date_range(
         start=dates[-1] + timedelta(days=1), periods=forecast_periods, freq="M"
     )
@@ -42,26 +83,176 @@ def calculate_revenue(config, num_agents, calls_per_day):
     return monthly_revenue
 
 
-def render_forecast_trends(config, num_agents, calls_per_day, mean_call_duration):
-    st.header("Forecast and Trends")
+def load_forecast_data(config, num_agents, calls_per_day, mean_call_duration, streams=None, tenant=DEFAULT_TENANT):
+    stored_revenue = get_metrics_store().recent_frame(
+        {"revenue": "Revenue"}, REVENUE_HISTORY_DAYS, tenant=tenant
+    ).dropna()
+    if len(stored_revenue) < MIN_REVENUE_MONTHS:
+        stored_revenue = None
+
+    # Recorded revenue is one series per tenant that grows month by month, so its model is extended in place;
+    # a simulated history is a different series for every set of inputs and random seed
+    rng = streams.generator("revenue_forecast") if streams is not None else None
+    seed = streams.seed if streams is not None else None
+    if stored_revenue is not None:
+        model_key = ("recorded", tenant)
+    else:
+        model_key = ("simulated", fingerprint(
+            config["financial_metrics"]["price_per_call"], num_agents, calls_per_day, seed
+        ))
 
-    # Revenue Forecast
-    dates, historical_revenue, forecast_dates, forecast = generate_forecast_data(
-        config, num_agents, calls_per_day, mean_call_duration
+    # Reused from the snapshot store when the same inputs and seed were seen today
+    snapshot_inputs = (
+        config["financial_metrics"]["price_per_call"], num_agents, calls_per_day, seed,
+        datetime.now().date().isoformat(),
+        None if stored_revenue is None else [stored_revenue["Date"].astype(str).tolist(),
+                                             stored_revenue["Revenue"].tolist()],
     )
+    forecast_data = get_snapshot_store().get_or_compute(
+        "revenue_forecast",
+        snapshot_inputs,
+        lambda: dict(zip(
+            ["dates", "historical_revenue", "forecast_dates", "forecast"],
+            generate_forecast_data(
+                config, num_agents, calls_per_day, mean_call_duration,
+                model_cache=get_forecast_model_cache(), model_key=model_key, rng=rng, stored_revenue=stored_revenue
+            ),
+        )),
+        shared=streams is None or streams.shared,
+    )
+    forecast_data["dates"] = pd.DatetimeIndex(forecast_data["dates"])
+    forecast_data["forecast_dates"] = pd.DatetimeIndex(forecast_data["forecast_dates"])
+    return forecast_data
+
+
+def client_revenue_history(clients, months=CLIENT_HISTORY_MONTHS, rng=None):
+    # Monthly revenue per client, (clients, months): each grew into its current revenue at its own pace
+    rng = np.random.default_rng() if rng is None else rng
+    current = np.array([
+        calculate_revenue(config, simulation["num_agents"], simulation["calls_per_day"])
+        for _, config, simulation in clients
+    ])
+    growth = rng.uniform(0.0, 0.03, size=len(clients))
+    months_back = np.arange(months - 1, -1, -1)
+    trend = (1 + growth[:, None]) ** -months_back[None, :]
+    return current[:, None] * trend * (1 + rng.normal(0, 0.05, size=(len(clients), months)))
+
+
+def reconciled_client_forecast(client_history, horizon=12, method="ols"):
+    # Holt forecasts for the total and every client at once, reconciled so the clients add up to the total;
+    # row 0 of each returned array is the total, the rest follow the clients
+    num_clients = len(client_history)
+    S = build_summing_matrix([range(num_clients)], num_clients)
+    forecast, lower, upper = batch_forecast(S @ client_history, horizon, method="holt")
+    return reconcile_forecasts(forecast, S, lower, upper, method=method)
+
+
+def render_client_forecast(config, num_agents, calls_per_day, mean_call_duration, client_directory):
+    st.subheader("Revenue Forecast by Client")
+    clients = [("Current Configuration", config, {
+        "num_agents": num_agents, "calls_per_day": calls_per_day, "mean_call_duration": mean_call_duration,
+    })]
+    if os.path.isdir(client_directory):
+        clients += load_client_configs(client_directory, config)
+    names = [name for name, _, _ in clients]
+
+    method = st.radio("Reconciliation", list(RECONCILIATION_METHODS), horizontal=True, key="client_reconciliation")
+    history = client_revenue_history(clients, rng=get_random_streams().generator("client_revenue"))
+    forecast, lower, upper = reconciled_client_forecast(history, method=RECONCILIATION_METHODS[method])
+
+    dates = pd.date_range(end=datetime.now(), periods=history.shape[1], freq="M")
+    forecast_dates = pd.date_range(start=dates[-1] + timedelta(days=1), periods=forecast.shape[1], freq="M")
+    fig_clients = go.Figure()
+    for i, name in enumerate(names):
+        fig_clients.add_trace(go.Scatter(
+            x=dates.append(forecast_dates), y=np.concatenate([history[i], forecast[i + 1]]), name=name,
+            stackgroup="clients",
+        ))
+    fig_clients.add_trace(go.Scatter(x=forecast_dates, y=upper[0], line=dict(width=0), showlegend=False))
+    fig_clients.add_trace(go.Scatter(x=forecast_dates, y=lower[0], line=dict(width=0), fill="tonexty",
+                                     name="Total 95% Interval"))
+    fig_clients.add_trace(go.Scatter(x=forecast_dates, y=forecast[0], name="Total Forecast",
+                                     line=dict(color="black", dash="dash")))
+    fig_clients.update_layout(title="Revenue Forecast by Client", xaxis_title="Date",
+                              yaxis_title="Monthly Revenue ($)")
+    st.plotly_chart(fig_clients)
+    st.caption(f"Client forecasts are reconciled ({method}) so they add up to the total forecast.")
+
+    register_export_frame("Client Revenue Forecast", pd.DataFrame(
+        forecast.T, index=forecast_dates, columns=["Total"] + names
+    ).rename_axis("Date").reset_index())
 
+
+def load_backtest_summary(historical_revenue, executor=None):
+    # Without an executor the folds are fitted in this process
+    return get_snapshot_store().get_or_compute(
+        "forecast_backtest",
+        (historical_revenue,),
+        lambda: summarize_backtest(run_backtest(
+            historical_revenue, initial=12, horizon=3, cache=get_backtest_cache(),
+            max_workers=None if executor is not None else 1, executor=executor,
+        )),
+        kind="parquet",
+    )
+
+
+def render_revenue_forecast(forecast_data):
+    register_export_frame("Revenue Forecast", pd.concat([
+        pd.DataFrame({"Date": forecast_data["dates"], "Revenue": forecast_data["historical_revenue"],
+                      "Type": "Historical"}),
+        pd.DataFrame({"Date": forecast_data["forecast_dates"], "Revenue": forecast_data["forecast"],
+                      "Type": "Forecast"}),
+    ], ignore_index=True))
     fig_forecast = go.Figure()
     fig_forecast.add_trace(
-        go.Scatter(x=dates, y=historical_revenue, name="Historical Revenue")
+        go.Scatter(x=forecast_data["dates"], y=forecast_data["historical_revenue"], name="Historical Revenue")
     )
     fig_forecast.add_trace(
-        go.Scatter(x=forecast_dates, y=forecast, name="Forecasted Revenue")
+        go.Scatter(x=forecast_data["forecast_dates"], y=forecast_data["forecast"], name="Forecasted Revenue")
     )
     fig_forecast.update_layout(
         title="Revenue Forecast", xaxis_title="Date", yaxis_title="Monthly Revenue ($)"
     )
     st.plotly_chart(fig_forecast)
 
+
+def render_backtest_summary(backtest_summary):
+    register_export_frame("Forecast Backtest", backtest_summary)
+    st.dataframe(backtest_summary)
+    st.caption(
+        "Rolling-origin evaluation with an expanding window, 3-month horizon. "
+        "MAPE/sMAPE in %, MASE relative to a naive forecast, Coverage of the 95% interval in %."
+    )
+
+
+def render_forecast_trends(config, num_agents, calls_per_day, mean_call_duration,
+                           forecast_data=None, backtest_summary=None, forecast_job=None, backtest_job=None,
+                           client_directory=DEFAULT_CLIENT_DIRECTORY):
+    st.header("Forecast and Trends")
+
+    # Revenue Forecast, either finished or still being fitted in the background
+    if forecast_job is not None:
+        render_job_result(forecast_job, render_revenue_forecast, placeholder="Fitting revenue forecast model...")
+        forecast_data = job_result(forecast_job)
+    else:
+        if forecast_data is None:
+            forecast_data = load_forecast_data(
+                config, num_agents, calls_per_day, mean_call_duration, streams=get_random_streams()
+            )
+        render_revenue_forecast(forecast_data)
+
+    # Forecast Accuracy (rolling-origin backtest on the historical series)
+    st.subheader("Forecast Accuracy (Backtest)")
+    if backtest_job is not None:
+        render_job_result(backtest_job, render_backtest_summary, placeholder="Running forecast backtest...")
+    else:
+        if backtest_summary is None:
+            backtest_summary = load_backtest_summary(forecast_data["historical_revenue"])
+        render_backtest_summary(backtest_summary)
+
+    # Per-client forecasts that add up to the total
+    render_client_forecast(config, num_agents, calls_per_day, mean_call_duration, client_directory)
+
     # Market Share Projection
     current_market_share = config["market_data"]["our_market_share"]
     projected_market_share = [
@@ -78,8 +269,9 @@ def render_forecast_trends(config, num_agents, calls_per_day, mean_call_duration
     st.plotly_chart(fig_market_share)
 
     # Customer Satisfaction Trend
-    satisfaction_data = config["market_data"]["historical_data"]["our_market_share"]
-    satisfaction_dates = pd.to_datetime(config["market_data"]["historical_data"]["dates"])
+    market_history = get_metrics_store().recent_frame({"market_share": "Our Market Share"}, MARKET_HISTORY_DAYS)
+    satisfaction_data = market_history["Our Market Share"]
+    satisfaction_dates = market_history["Date"]
 
     fig_satisfaction = px.line(
         x=satisfaction_dates, y=satisfaction_data, title="Customer Satisfaction Trend"
@@ -100,52 +292,39 @@ def render_forecast_trends(config, num_agents, calls_per_day, mean_call_duration
         st.write(f"• {trend}")
 
     # Calculate total cost per minute
-    total_cost_per_minute = (
-        config["service_costs"]["text_generation"]["input"]["cost_per_1k_tokens"] *
-        config["service_costs"]["text_generation"]["input"]["tokens_per_minute"] / 1000 +
-        config["service_costs"]["text_generation"]["output"]["cost_per_1k_tokens"] *
-        config["service_costs"]["text_generation"]["output"]["tokens_per_minute"] / 1000 +
-        config["service_costs"]["audio_recognition"]["deepgram_nova2"]["cost_per_minute"] +
-        config["service_costs"]["audio_generation"]["11labs_scale"]["cost_per_1k_chars"] *
-        config["service_costs"]["audio_generation"]["11labs_scale"]["chars_per_minute"] / 1000
-    )
+    total_cost_per_minute = calculate_total_cost_per_minute(config)
 
     # Key Performance Indicators (KPIs) Forecast
     st.subheader("Key Performance Indicators (KPIs) Forecast")
-    kpis = ['Revenue', 'Market Share', 'Customer Satisfaction', 'Cost per Call']
+    # Units are part of the KPI name so each column keeps a single numeric format
+    kpis = ['Revenue ($)', 'Market Share (%)', 'Customer Satisfaction (1-5)', 'Cost per Call ($)']
     current_values = [
         calculate_revenue(config, num_agents, calls_per_day),
         config['market_data']['our_market_share'],
         config['market_data']['our_customer_satisfaction'],
         total_cost_per_minute * mean_call_duration
     ]
-    forecast_values = [value * (1 + np.random.uniform(0.05, 0.15)) for value in current_values]
+    growth_rates = get_random_streams().generator("kpi_forecast").uniform(0.05, 0.15, size=len(current_values))
+    forecast_values = [value * (1 + growth) for value, growth in zip(current_values, growth_rates)]
 
     kpi_df = pd.DataFrame({
         'KPI': kpis,
         'Current Value': current_values,
         'Forecasted Value': forecast_values,
-        'Growth': [(forecast - current) / current * 100 for forecast, current in zip(forecast_values, current_values)]
+        'Growth (%)': [(forecast - current) / current * 100 for forecast, current in zip(forecast_values, current_values)]
     })
 
-    # Format the dataframe
-    kpi_df['Current Value'] = kpi_df.apply(
-        lambda row: f'${row["Current Value"]:,.2f}' if row['KPI'] in ['Revenue', 'Cost per Call'] else f'{row["Current Value"]:.2f}',
-        axis=1
-    )
-    kpi_df['Forecasted Value'] = kpi_df.apply(
-        lambda row: f'${row["Forecasted Value"]:,.2f}' if row['KPI'] in ['Revenue', 'Cost per Call'] else f'{row["Forecasted Value"]:.2f}',
-        axis=1
-    )
-    kpi_df['Growth'] = kpi_df['Growth'].apply(lambda x: f'{x:.2f}%')
-
-    st.table(kpi_df)
+    register_export_frame("KPI Forecast", kpi_df)
+    render_table(kpi_df, {"Current Value": NUMBER, "Forecasted Value": NUMBER, "Growth (%)": PERCENT})
 
     # Scenario Analysis
     st.subheader("Scenario Analysis")
     scenarios = ["Pessimistic", "Base Case", "Optimistic"]
     metrics = ["Revenue Growth", "Market Share Gain", "Cost Reduction"]
-    scenario_data = np.random.uniform(low=[-5, -2, -1], high=[5, 2, 1], size=(3, 3))
+    scenario_data = get_random_streams().generator("scenarios").uniform(low=[-5, -2, -1], high=[5, 2, 1], size=(3, 3))
+
+    register_export_frame("Scenario Analysis", pd.DataFrame(scenario_data, index=scenarios, columns=metrics)
+                          .rename_axis("Scenario").reset_index())
 
     fig_scenarios = go.Figure(
         data=[
@@ -160,11 +339,16 @@ def render_forecast_trends(config, num_agents, calls_per_day, mean_call_duration
 
     # Key Insights and Recommendations
     st.subheader("Key Insights and Recommendations")
-    st.write(
-        "1. Revenue is projected to grow by {:.2f}% over the next year, driven by increased market adoption and service improvements.".format(
-            (forecast[-1] - historical_revenue[-1]) / historical_revenue[-1] * 100
+    if forecast_data is not None:
+        forecast = forecast_data["forecast"]
+        historical_revenue = forecast_data["historical_revenue"]
+        st.write(
+            "1. Revenue is projected to grow by {:.2f}% over the next year, driven by increased market adoption and service improvements.".format(
+                (forecast[-1] - historical_revenue[-1]) / historical_revenue[-1] * 100
+            )
         )
-    )
+    else:
+        st.write("1. The revenue projection will appear once the forecast model has been fitted.")
     st.write(
         "2. Our market share is expected to reach {:.2f}% by the end of the forecast period, indicating strong competitive positioning.".format(
             projected_market_share[-1]
@@ -0,0 +1,95 @@
+import threading
+import warnings
+
+import numpy as np
+from scipy.stats import chi2
+from statsmodels.tsa.arima.model import ARIMA
+
+
+class IncrementalArimaModel:
+    def __init__(self, order=(1, 1, 1), refit_every=12, drift_alpha=0.01):
+        self.order = order
+        self.refit_every = refit_every
+        self.drift_alpha = drift_alpha
+        self.results = None
+        self.history = np.empty(0)
+        self.appended_since_fit = 0
+        self.last_update = None
+
+    def fit(self, history, start_params=None):
+        history = np.asarray(history, dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            self.results = ARIMA(history, order=self.order).fit(start_params=start_params)
+        self.history = history
+        self.appended_since_fit = 0
+        self.last_update = "fit"
+
+    def update(self, new_observations, window=None):
+        # window keeps only that many of the latest observations for later refits, for sliding histories
+        new_observations = np.asarray(new_observations, dtype=float)
+        if self.results is None:
+            self.fit(new_observations)
+            return self.last_update
+        if len(new_observations) == 0:
+            return self.last_update
+
+        self.history = np.concatenate([self.history, new_observations])
+        if window is not None:
+            self.history = self.history[-window:]
+        self.appended_since_fit += len(new_observations)
+
+        # Scheduled re-estimation, warm-started from the current parameters
+        if self.appended_since_fit >= self.refit_every:
+            self.fit(self.history, start_params=self.results.params)
+            self.last_update = "refit: schedule"
+            return self.last_update
+
+        # Kalman-filter the new observations with the parameters held fixed
+        extended = self.results.extend(new_observations)
+
+        # Drift test: standardized one-step-ahead errors should be ~ chi2 under the current model
+        errors = np.asarray(extended.standardized_forecasts_error[0])
+        errors = errors[np.isfinite(errors)]
+        if len(errors) and chi2.sf(np.sum(errors ** 2), len(errors)) < self.drift_alpha:
+            self.fit(self.history, start_params=self.results.params)
+            self.last_update = "refit: drift"
+            return self.last_update
+
+        self.results = extended
+        self.last_update = "append"
+        return self.last_update
+
+    def forecast(self, steps):
+        return np.asarray(self.results.forecast(steps=steps))
+
+
+_cache_lock = threading.Lock()
+
+
+def history_overlap(known, history, min_overlap=1):
+    # Length of the longest tail of the known history that the new one starts with; 0 below min_overlap
+    for length in range(min(len(known), len(history)), max(min_overlap, 1) - 1, -1):
+        if np.array_equal(known[len(known) - length:], history[:length]):
+            return length
+    return 0
+
+
+def update_forecast_model(cache, key, history, **model_kwargs):
+    # history may grow or slide forward; the cached model is extended with the new tail while at least half of
+    # the new history is the unchanged end of what it saw, and refitted from scratch otherwise
+    history = np.asarray(history, dtype=float)
+    with _cache_lock:
+        model = cache.get(key)
+        overlap = 0 if model is None else history_overlap(model.history, history, len(history) // 2)
+
+        if overlap == 0:
+            model = IncrementalArimaModel(**model_kwargs)
+            model.fit(history)
+            cache[key] = model
+        elif len(history) > overlap:
+            model.update(history[overlap:], window=len(history))
+        else:
+            model.last_update = "cached"
+
+        return model
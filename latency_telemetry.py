@@ -0,0 +1,228 @@
+import glob
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from data_export import register_export_frame
+from figure_cache import cached_figure
+from result_tables import COUNT, NUMBER, render_table
+
+# Log buckets with 1% relative width from 0.1 ms to 10 minutes, so any percentile is within 0.5%
+MIN_LATENCY_MS = 0.1
+MAX_LATENCY_MS = 600_000.0
+BUCKET_GROWTH = 1.01
+NUM_BUCKETS = int(np.ceil(np.log(MAX_LATENCY_MS / MIN_LATENCY_MS) / np.log(BUCKET_GROWTH))) + 1
+QUANTILES = (0.5, 0.95, 0.99)
+READ_CHUNK_BYTES = 8 * 1024 ** 2
+
+STAGES = {"stt": "Audio Recognition", "llm": "Text Generation", "tts": "Audio Generation"}
+# The latency field of each LiveKit metrics event, in seconds
+STAGE_LATENCY_FIELDS = {"stt": "duration", "llm": "ttft", "tts": "ttfb"}
+LATENCY_WINDOWS = {"Last Hour": 1, "Last 24 Hours": 24, "Last 7 Days": 24 * 7, "Last 30 Days": 24 * 30}
+
+
+def bucket_index(latency_ms):
+    values = np.clip(np.asarray(latency_ms, dtype=float), MIN_LATENCY_MS, MAX_LATENCY_MS)
+    return np.floor(np.log(values / MIN_LATENCY_MS) / np.log(BUCKET_GROWTH)).astype(np.int64)
+
+
+def bucket_value(index):
+    # Geometric midpoint of the bucket
+    return MIN_LATENCY_MS * BUCKET_GROWTH ** (np.asarray(index) + 0.5)
+
+
+def histogram_percentiles(counts, quantiles=QUANTILES):
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(quantiles), np.nan)
+    ranks = np.maximum(np.ceil(np.asarray(quantiles) * total), 1)
+    return bucket_value(np.searchsorted(np.cumsum(counts), ranks))
+
+
+def parse_event(line):
+    # One metrics event per line, as logged from the agent's metrics_collected handler, e.g.
+    # {"timestamp": "2024-05-01T12:00:03Z", "type": "llm_metrics", "provider": "openai", "ttft": 0.41}
+    # A "latency_ms" field, where present, takes precedence over the stage's own field.
+    try:
+        event = json.loads(line)
+        stage = str(event.get("type", event.get("stage", ""))).split("_")[0].lower()
+        if stage not in STAGES:
+            return None
+        if "latency_ms" in event:
+            latency_ms = float(event["latency_ms"])
+        else:
+            latency_ms = float(event[STAGE_LATENCY_FIELDS[stage]]) * 1000
+        provider = str(event.get("provider") or event.get("model") or event.get("label") or "unknown")
+        return stage, provider, event["timestamp"], latency_ms
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _epoch_seconds(timestamps):
+    # Epoch seconds or ISO 8601 strings, converted in one pass each
+    timestamps = pd.Series(timestamps, dtype=object)
+    numeric = pd.to_numeric(timestamps, errors="coerce")
+    text = timestamps[numeric.isna()]
+    if len(text):
+        parsed = pd.to_datetime(text, utc=True, format="ISO8601", errors="coerce")
+        numeric[text.index] = (parsed - pd.Timestamp(0, tz="UTC")).dt.total_seconds()
+    return numeric.to_numpy(dtype=float)
+
+
+class LatencyHistograms:
+    def __init__(self, retention_hours=24 * 30):
+        # (stage, provider, hour start in epoch seconds) -> bucket counts; merging is adding arrays
+        self.counts = {}
+        self.retention_hours = retention_hours
+        self.events = 0
+        self.malformed = 0
+        self._offsets = {}
+        self._lock = threading.Lock()
+
+    def ingest(self, lines):
+        events = [parse_event(line) for line in lines if line.strip()]
+        parsed = [event for event in events if event is not None]
+        self.malformed += len(events) - len(parsed)
+        if not parsed:
+            return
+        stages, providers, timestamps, latencies = zip(*parsed)
+        seconds = _epoch_seconds(timestamps)
+        valid = np.isfinite(seconds)
+        self.malformed += int((~valid).sum())
+
+        df = pd.DataFrame({
+            "stage": np.asarray(stages)[valid],
+            "provider": np.asarray(providers)[valid],
+            "hour": (seconds[valid] // 3600 * 3600).astype(np.int64),
+            "bucket": bucket_index(np.asarray(latencies)[valid]),
+        })
+        self.events += len(df)
+        for key, buckets in df.groupby(["stage", "provider", "hour"])["bucket"]:
+            counts = np.bincount(buckets.to_numpy(), minlength=NUM_BUCKETS)
+            if key in self.counts:
+                self.counts[key] += counts
+            else:
+                self.counts[key] = counts
+
+        cutoff = (time.time() // 3600 - self.retention_hours) * 3600
+        for key in [key for key in self.counts if key[2] < cutoff]:
+            del self.counts[key]
+
+    def tail(self, paths):
+        # Reads only bytes appended since the last call; a replaced or truncated file is read from the start
+        with self._lock:
+            for path in paths:
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    self._offsets.pop(path, None)
+                    continue
+                inode, offset = self._offsets.get(path, (stat.st_ino, 0))
+                if inode != stat.st_ino or stat.st_size < offset:
+                    offset = 0
+                with open(path, "rb") as f:
+                    f.seek(offset)
+                    while offset < stat.st_size:
+                        chunk = f.read(min(READ_CHUNK_BYTES, stat.st_size - offset))
+                        # A trailing partial line is left for the next call
+                        complete = chunk.rfind(b"\n") + 1
+                        if complete == 0:
+                            if len(chunk) < READ_CHUNK_BYTES:
+                                break
+                            complete = len(chunk)  # A single line longer than a chunk is dropped as malformed
+                        self.ingest(chunk[:complete].decode("utf-8", errors="replace").splitlines())
+                        offset += complete
+                        f.seek(offset)
+                self._offsets[path] = (stat.st_ino, offset)
+
+    def merged(self, start=None, end=None, by=("stage", "provider")):
+        # Sums the hourly bucket arrays inside [start, end) grouped by the given key fields
+        fields = ("stage", "provider", "hour")
+        with self._lock:
+            items = [(key, counts) for key, counts in self.counts.items()
+                     if (start is None or key[2] >= start) and (end is None or key[2] < end)]
+        merged = {}
+        for key, counts in items:
+            group = tuple(key[fields.index(field)] for field in by)
+            merged[group] = merged[group] + counts if group in merged else counts.copy()
+        return merged
+
+    def summary(self, start=None, end=None, by=("stage", "provider")):
+        rows = []
+        for group, counts in sorted(self.merged(start, end, by).items()):
+            p50, p95, p99 = histogram_percentiles(counts)
+            row = dict(zip(by, group))
+            if "stage" in row:
+                row["stage"] = STAGES[row["stage"]]
+            rows.append({**row, "requests": int(counts.sum()), "p50": p50, "p95": p95, "p99": p99})
+        return pd.DataFrame(rows, columns=[*by, "requests", "p50", "p95", "p99"]).rename(columns={
+            "stage": "Service", "provider": "Provider", "hour": "Hour", "requests": "Requests",
+            "p50": "p50 (ms)", "p95": "p95 (ms)", "p99": "p99 (ms)",
+        })
+
+
+def log_paths():
+    return sorted(glob.glob(os.path.join(os.environ.get("LIVEKIT_LOG_DIR", "logs"), "**", "*.jsonl"),
+                        recursive=True))
+
+
+@st.cache_resource
+def get_latency_histograms():
+    # One set of histograms per process, fed by whichever session polls first
+    return LatencyHistograms(int(os.environ.get("LATENCY_RETENTION_HOURS", 24 * 30)))
+
+
+def window_start(window):
+    return (time.time() // 3600 - LATENCY_WINDOWS[window] + 1) * 3600
+
+
+def measured_latency(window):
+    # Median latency per service over the window, merged across providers; empty without telemetry
+    histograms = get_latency_histograms()
+    histograms.tail(log_paths())
+    summary = histograms.summary(start=window_start(window), by=("stage",))
+    return dict(zip(summary["Service"], summary["p50 (ms)"]))
+
+
+def measured_histograms(window):
+    # Bucket counts per (stage, provider) over the window, for models that need the whole distribution
+    histograms = get_latency_histograms()
+    histograms.tail(log_paths())
+    return histograms.merged(start=window_start(window))
+
+
+@st.fragment(run_every=int(os.environ.get("LATENCY_POLL_SECONDS", 30)))
+def render_latency_telemetry(window):
+    # Polls the logs on its own; each refresh merges hourly buckets instead of rescanning events
+    histograms = get_latency_histograms()
+    histograms.tail(log_paths())
+    start = window_start(window)
+    summary = histograms.summary(start=start)
+    if summary.empty:
+        st.info(
+            f"No latency telemetry in {os.environ.get('LIVEKIT_LOG_DIR', 'logs')} for this window; "
+            "latencies above are simulated."
+        )
+        return
+
+    register_export_frame("Measured Latency", summary)
+    render_table(summary, {
+        "Requests": COUNT, "p50 (ms)": NUMBER, "p95 (ms)": NUMBER, "p99 (ms)": NUMBER,
+    })
+    st.caption(f"{histograms.events:,} events ingested, {histograms.malformed:,} malformed lines skipped.")
+
+    hourly = histograms.summary(start=start, by=("stage", "provider", "hour"))
+    hourly["Hour"] = pd.to_datetime(hourly["Hour"], unit="s")
+    hourly["Series"] = hourly["Service"] + " / " + hourly["Provider"]
+    st.plotly_chart(cached_figure(
+        "latency_p95_by_hour",
+        lambda: px.line(hourly, x="Hour", y="p95 (ms)", color="Series", markers=True,
+                        title="Hourly p95 Latency by Provider"),
+        hourly,
+    ))
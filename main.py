@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
 import numpy as np
 from scipy.stats import norm
 
@@ -12,225 +11,285 @@ from operational_metrics import render_operational_metrics
 from service_performance import render_service_performance
 from market_position import render_market_position
 from scalability_analysis import render_scalability_analysis
-from risk_assessment import render_risk_assessment
+from risk_assessment import RISK_FACTORS, calculate_total_cost_per_minute, render_risk_assessment
 from forecast_trends import render_forecast_trends
 from service_configuration import render_service_configuration
+from portfolio import DEFAULT_CLIENT_DIRECTORY, render_portfolio
+from shared_config import get_default_config, get_session_config, set_config_value
+from computations import build_compute_graph
+from data_export import render_export_controls, reset_export_frames
+from memory_accounting import render_memory_usage
+from risk_sampling import COPULAS, DEFAULT_SAMPLER, SAMPLING_METHODS, cholesky_factor
 
-# Initialize session state for configurations
-if "config" not in st.session_state:
-    st.session_state.config = {
-        "service_costs": {
-            "text_generation": {
-                "input": {"cost_per_1k_tokens": 0.005, "tokens_per_minute": 0.5},
-                "output": {"cost_per_1k_tokens": 0.015, "tokens_per_minute": 0.5},
-            },
-            "audio_recognition": {
-                "deepgram_nova2": {"cost_per_minute": 0.0036},
-            },
-            "audio_generation": {
-                "11labs_scale": {"cost_per_1k_chars": 0.18, "chars_per_minute": 150},
-            },
-        },
-        "operational_metrics": {
-            "avg_handling_time": 5.0,
-            "first_call_resolution": 0.85,
-            "customer_satisfaction": 4.5,
-        },
-        "financial_metrics": {"price_per_call": 1.0, "expected_growth_rate": 0.1},
-        "market_data": {
-            "our_market_share": 15,
-            "our_customer_satisfaction": 4.5,
-            "competitors": [
-                {
-                    "name": "Competitor A",
-                    "market_share": 30,
-                    "customer_satisfaction": 4.2,
-                    "price_per_call": 1.2,
-                },
-                {
-                    "name": "Competitor B",
-                    "market_share": 25,
-                    "customer_satisfaction": 4.0,
-                    "price_per_call": 0.9,
-                },
-                {
-                    "name": "Competitor C",
-                    "market_share": 30,
-                    "customer_satisfaction": 4.3,
-                    "price_per_call": 1.1,
-                },
-            ],
-            "historical_data": {
-                "dates": [
-                    (datetime.now() - timedelta(days=30 * i)).strftime("%Y-%m-%d")
-                    for i in range(12, 0, -1)
-                ],
-                "our_market_share": [
-                    12,
-                    12.5,
-                    13,
-                    13.5,
-                    14,
-                    14.2,
-                    14.5,
-                    14.7,
-                    14.8,
-                    14.9,
-                    15,
-                    15,
-                ],
-                "industry_growth": [
-                    5,
-                    5.2,
-                    5.4,
-                    5.6,
-                    5.8,
-                    6,
-                    6.2,
-                    6.4,
-                    6.6,
-                    6.8,
-                    7,
-                    7.2,
-                ],
-            },
-        },
+
+def main():
+    # The defaults are shared by all sessions; each session only stores its own overrides
+    st.session_state.config = get_session_config()
+
+    # Sidebar for configuration
+    st.sidebar.title("Dashboard Configuration")
+
+    # Configuration sections
+    config_sections = [
+        "Service Costs",
+        "Operational Metrics",
+        "Financial Metrics",
+        "Cost Structure",
+        "Infrastructure",
+        "Market Data",
+    ]
+    selected_section = st.sidebar.selectbox("Select Configuration Section", config_sections)
+
+
+    # Configuration UI
+    if selected_section == "Service Costs":
+        st.sidebar.subheader("Text Generation Costs")
+        set_config_value(["service_costs", "text_generation", "input", "cost_per_1k_tokens"],
+                         st.sidebar.number_input("Input Cost per 1K Tokens", value=0.005, format="%.4f", step=0.0001))
+        set_config_value(["service_costs", "text_generation", "output", "cost_per_1k_tokens"],
+                         st.sidebar.number_input("Output Cost per 1K Tokens", value=0.015, format="%.4f", step=0.0001))
+
+        st.sidebar.subheader("Audio Recognition Costs")
+        set_config_value(["service_costs", "audio_recognition", "deepgram_nova2", "cost_per_minute"],
+                         st.sidebar.number_input("Deepgram Nova-2 Cost per Minute", value=0.0036, format="%.4f",
+                                                 step=0.0001))
+
+        st.sidebar.subheader("Audio Generation Costs")
+        set_config_value(["service_costs", "audio_generation", "11labs_scale", "cost_per_1k_chars"],
+                         st.sidebar.number_input("11labs Scale Cost per 1K Characters", value=0.18, format="%.4f",
+                                                 step=0.01))
+
+    elif selected_section == "Operational Metrics":
+        set_config_value(["operational_metrics", "avg_handling_time"],
+                         st.sidebar.number_input("Average Handling Time (minutes)", value=5.0, step=0.1))
+        set_config_value(["operational_metrics", "first_call_resolution"],
+                         st.sidebar.number_input("First Call Resolution Rate", value=0.85, min_value=0.0, max_value=1.0,
+                                                 step=0.01))
+        set_config_value(["operational_metrics", "customer_satisfaction"],
+                         st.sidebar.number_input("Customer Satisfaction Score", value=4.5, min_value=1.0, max_value=5.0,
+                                                 step=0.1))
+
+    elif selected_section == "Financial Metrics":
+        set_config_value(["financial_metrics", "price_per_call"],
+                         st.sidebar.number_input("Price per Call ($)", value=1.0, step=0.01))
+        set_config_value(["financial_metrics", "expected_growth_rate"],
+                         st.sidebar.number_input("Expected Growth Rate", value=0.1, format="%.2f", step=0.01))
+
+    elif selected_section == "Cost Structure":
+        set_config_value(["cost_structure", "fixed_costs_per_month"],
+                         st.sidebar.number_input("Fixed Costs per Month ($)", value=100000.0, min_value=0.0,
+                                                 step=1000.0))
+        set_config_value(["cost_structure", "fixed_costs_per_agent"],
+                         st.sidebar.number_input("Fixed Costs per Agent per Month ($)", value=0.0, min_value=0.0,
+                                                 step=10.0))
+        set_config_value(["cost_structure", "concurrent_calls_per_step"],
+                         st.sidebar.number_input("Concurrent Calls per Server", value=50, min_value=1, step=1))
+        set_config_value(["cost_structure", "cost_per_step"],
+                         st.sidebar.number_input("Server Cost per Month ($)", value=0.0, min_value=0.0, step=50.0))
+        set_config_value(["cost_structure", "peak_to_average"],
+                         st.sidebar.number_input("Peak-to-Average Concurrency", value=3.0, min_value=1.0, step=0.1))
+        set_config_value(["financial_metrics", "target_margin"],
+                         st.sidebar.number_input("Target Profit Margin", value=0.2, min_value=0.0, max_value=0.99,
+                                                 format="%.2f", step=0.01))
+
+        # Graduated volume pricing; calls below the first threshold are billed at the price per call
+        st.sidebar.write("Volume Pricing Tiers")
+        pricing_tiers = st.sidebar.data_editor(
+            pd.DataFrame({
+                "From Calls per Month": pd.Series(dtype=float),
+                "Price per Call ($)": pd.Series(dtype=float),
+            }),
+            num_rows="dynamic",
+            key="pricing_tiers_editor",
+        ).dropna()
+        set_config_value(["pricing_tiers"], [
+            {"from_calls": row["From Calls per Month"], "price_per_call": row["Price per Call ($)"]}
+            for _, row in pricing_tiers.iterrows()
+        ])
+
+    elif selected_section == "Infrastructure":
+        # Per-session resources of each tier; fleets are packed onto the instance types below
+        for role, label in (("agent_worker", "Agent Worker"), ("media_server", "Media Server")):
+            st.sidebar.subheader(f"{label} per Session")
+            default_profile = get_default_config()["infrastructure"]["session_profiles"][role]
+            set_config_value(["infrastructure", "session_profiles", role, "cpu_cores"],
+                             st.sidebar.number_input(f"{label} vCPUs per Session", value=default_profile["cpu_cores"],
+                                                     min_value=0.001, format="%.3f", step=0.01))
+            set_config_value(["infrastructure", "session_profiles", role, "memory_gb"],
+                             st.sidebar.number_input(f"{label} Memory per Session (GB)",
+                                                     value=default_profile["memory_gb"], min_value=0.001, format="%.3f",
+                                                     step=0.01))
+        set_config_value(["infrastructure", "target_utilisation"],
+                         st.sidebar.number_input("Target Utilisation", value=0.7, min_value=0.05, max_value=1.0,
+                                                 format="%.2f", step=0.05))
+        set_config_value(["infrastructure", "egress_kbps_per_session"],
+                         st.sidebar.number_input("Egress per Session (kbps)", value=64.0, min_value=0.0, step=8.0))
+        set_config_value(["infrastructure", "egress_cost_per_gb"],
+                         st.sidebar.number_input("Egress Cost per GB ($)", value=0.09, min_value=0.0, format="%.3f",
+                                                 step=0.01))
+
+        st.sidebar.write("Instance Types")
+        instance_types = st.sidebar.data_editor(
+            pd.DataFrame([dict(instance) for instance in get_default_config()["infrastructure"]["instance_types"]])
+            .rename(columns={"name": "Name", "cpu_cores": "vCPUs", "memory_gb": "Memory (GB)",
+                             "hourly_cost": "Hourly Cost ($)"}),
+            num_rows="dynamic",
+            key="instance_types_editor",
+        ).dropna()
+        set_config_value(["infrastructure", "instance_types"], [
+            {"name": row["Name"], "cpu_cores": row["vCPUs"], "memory_gb": row["Memory (GB)"],
+             "hourly_cost": row["Hourly Cost ($)"]}
+            for _, row in instance_types.iterrows()
+        ])
+
+    elif selected_section == "Market Data":
+        set_config_value(["market_data", "our_market_share"],
+                         st.sidebar.number_input("Our Market Share (%)", value=15.0, step=0.1))
+        set_config_value(["market_data", "our_customer_satisfaction"],
+                         st.sidebar.number_input("Our Customer Satisfaction", value=4.5, min_value=1.0, max_value=5.0,
+                                                 step=0.1))
+
+    # Main dashboard inputs
+    st.sidebar.title("Simulation Parameters")
+    num_agents = st.sidebar.slider(
+        "Number of Agents:", min_value=1, max_value=10000, value=100, step=1
+    )
+    calls_per_day = st.sidebar.slider(
+        "Calls per Day (per agent):", min_value=1, max_value=1000, value=50, step=1
+    )
+    mean_call_duration = st.sidebar.slider(
+        "Mean Call Duration (minutes):",
+        min_value=1.0,
+        max_value=60.0,
+        value=float(st.session_state.config["operational_metrics"]["avg_handling_time"]),
+        step=0.1
+    )
+
+    # Monte Carlo settings for the risk simulation
+    monte_carlo_settings = {
+        "sampler": st.sidebar.selectbox("Sampling Method", SAMPLING_METHODS,
+                                        index=SAMPLING_METHODS.index(DEFAULT_SAMPLER)),
+        "adaptive": st.sidebar.checkbox("Adaptive Monte Carlo", value=False),
     }
+    if st.sidebar.checkbox("Keep Per-Path Results for Drill-down", value=False):
+        monte_carlo_settings["store_paths"] = True
+    if monte_carlo_settings["adaptive"]:
+        monte_carlo_settings["relative_tolerance"] = st.sidebar.slider(
+            "Target Relative Precision (%)", min_value=0.1, max_value=10.0, value=1.0, step=0.1
+        ) / 100
+        monte_carlo_settings["time_budget"] = st.sidebar.slider(
+            "Time Budget (seconds)", min_value=1, max_value=60, value=10, step=1
+        )
+
+    # Dependence between the simulated risk factors
+    with st.sidebar.expander("Risk Factor Dependence"):
+        copula = st.selectbox("Copula", COPULAS)
+        if copula != "independent":
+            correlation = st.data_editor(
+                pd.DataFrame(np.eye(len(RISK_FACTORS)), index=RISK_FACTORS, columns=RISK_FACTORS),
+                key="risk_factor_correlation",
+            )
+            # Only the upper triangle is read, so the matrix stays symmetric whichever cell was edited
+            correlation = np.triu(correlation.to_numpy(), 1)
+            correlation = correlation + correlation.T + np.eye(len(RISK_FACTORS))
+            risk_model = {
+                "copula": copula,
+                "correlation": correlation.tolist(),
+                "marginals": [
+                    {"distribution": st.selectbox(f"{factor} Marginal", ["normal", "lognormal"])}
+                    for factor in RISK_FACTORS
+                ],
+            }
+            if copula == "t":
+                risk_model["degrees_of_freedom"] = st.slider("Degrees of Freedom", min_value=2, max_value=30, value=4)
+            try:
+                cholesky_factor(correlation)
+                monte_carlo_settings["risk_model"] = risk_model
+            except ValueError as e:
+                st.error(f"{e} Simulating independent factors instead.")
+
+
+    # Calculate total cost per minute
+    total_cost_per_minute = calculate_total_cost_per_minute(st.session_state.config)
+    st.sidebar.metric("Total Cost per Minute", f"${total_cost_per_minute:.4f}")
+
+    # Portfolio mode evaluates a directory of client configs instead of the single dashboard
+    st.sidebar.title("Portfolio")
+    portfolio_mode = st.sidebar.checkbox("Portfolio Mode", value=False)
+    # Also the clients of the per-client revenue forecast
+    portfolio_directory = st.sidebar.text_input("Client Config Directory", value=DEFAULT_CLIENT_DIRECTORY)
+    if portfolio_mode:
+        st.title("LiveKit Voice Assistant Portfolio Dashboard")
+        render_portfolio(st.session_state.config, portfolio_directory)
+        st.stop()
+
+    # Heavy computations run through a per-session dependency graph; only nodes whose inputs changed rerun
+    if "compute_graph" not in st.session_state:
+        st.session_state.compute_graph = build_compute_graph()
+    computed = st.session_state.compute_graph.evaluate_all({
+        "config": st.session_state.config,
+        "num_agents": num_agents,
+        "calls_per_day": calls_per_day,
+        "mean_call_duration": mean_call_duration,
+        "total_cost_per_minute": total_cost_per_minute,
+        "monte_carlo_settings": monte_carlo_settings,
+    })
+    with st.sidebar.expander("Computation Graph"):
+        st.dataframe(st.session_state.compute_graph.describe())
+
+    # Tabs register their numeric tables for export as they render
+    reset_export_frames()
+
+    # Main dashboard
+    st.title("LiveKit Voice Assistant Business Intelligence Dashboard")
+
+    # Tabs for different modules
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+        "Financial Overview",
+        "Operational Metrics",
+        "Service Performance",
+        "Market Position",
+        "Scalability Analysis",
+        "Risk Assessment",
+        "Forecast and Trends",
+        "Service Configuration",  # New tab
+    ])
+
+    # Render each module in its respective tab
+    with tab1:
+        render_financial_overview(st.session_state.config, num_agents, calls_per_day, mean_call_duration,
+                                  total_cost_per_minute, df_costs=computed["cost_breakdown"])
+
+    with tab2:
+        render_operational_metrics(st.session_state.config, num_agents, calls_per_day, mean_call_duration)
+
+    with tab3:
+        render_service_performance(st.session_state.config, total_cost_per_minute)
+
+    with tab4:
+        render_market_position(st.session_state.config)
+
+    with tab5:
+        render_scalability_analysis(st.session_state.config, num_agents, calls_per_day, mean_call_duration,
+                                    total_cost_per_minute, df_scale=computed["scale_table"],
+                                    concurrency=computed["peak_concurrency"])
+
+    with tab6:
+        render_risk_assessment(st.session_state.config, num_agents, calls_per_day, mean_call_duration,
+                               simulation_job=computed["monte_carlo"], settings=monte_carlo_settings)
+
+    with tab7:
+        render_forecast_trends(st.session_state.config, num_agents, calls_per_day, mean_call_duration,
+                               forecast_job=computed["revenue_forecast"],
+                               backtest_job=computed["forecast_backtest"], client_directory=portfolio_directory)
+
+    with tab8:
+        render_service_configuration(st.session_state.config)
+
+    render_export_controls()
+    render_memory_usage()
+
 
-# Sidebar for configuration
-st.sidebar.title("Dashboard Configuration")
-
-# Configuration sections
-config_sections = [
-    "Service Costs",
-    "Operational Metrics",
-    "Financial Metrics",
-    "Market Data",
-]
-selected_section = st.sidebar.selectbox("Select Configuration Section", config_sections)
-
-
-# Function to update nested dictionary
-def update_nested_dict(d, keys, value):
-    for key in keys[:-1]:
-        d = d.setdefault(key, {})
-    d[keys[-1]] = value
-
-
-# Configuration UI
-if selected_section == "Service Costs":
-    st.sidebar.subheader("Text Generation Costs")
-    update_nested_dict(st.session_state.config, ["service_costs", "text_generation", "input", "cost_per_1k_tokens"],
-                       st.sidebar.number_input("Input Cost per 1K Tokens", value=0.005, format="%.4f", step=0.0001))
-    update_nested_dict(st.session_state.config, ["service_costs", "text_generation", "output", "cost_per_1k_tokens"],
-                       st.sidebar.number_input("Output Cost per 1K Tokens", value=0.015, format="%.4f", step=0.0001))
-
-    st.sidebar.subheader("Audio Recognition Costs")
-    update_nested_dict(st.session_state.config,
-                       ["service_costs", "audio_recognition", "deepgram_nova2", "cost_per_minute"],
-                       st.sidebar.number_input("Deepgram Nova-2 Cost per Minute", value=0.0036, format="%.4f",
-                                               step=0.0001))
-
-    st.sidebar.subheader("Audio Generation Costs")
-    update_nested_dict(st.session_state.config,
-                       ["service_costs", "audio_generation", "11labs_scale", "cost_per_1k_chars"],
-                       st.sidebar.number_input("11labs Scale Cost per 1K Characters", value=0.18, format="%.4f",
-                                               step=0.01))
-
-elif selected_section == "Operational Metrics":
-    update_nested_dict(st.session_state.config, ["operational_metrics", "avg_handling_time"],
-                       st.sidebar.number_input("Average Handling Time (minutes)", value=5.0, step=0.1))
-    update_nested_dict(st.session_state.config, ["operational_metrics", "first_call_resolution"],
-                       st.sidebar.number_input("First Call Resolution Rate", value=0.85, min_value=0.0, max_value=1.0,
-                                               step=0.01))
-    update_nested_dict(st.session_state.config, ["operational_metrics", "customer_satisfaction"],
-                       st.sidebar.number_input("Customer Satisfaction Score", value=4.5, min_value=1.0, max_value=5.0,
-                                               step=0.1))
-
-elif selected_section == "Financial Metrics":
-    update_nested_dict(st.session_state.config, ["financial_metrics", "price_per_call"],
-                       st.sidebar.number_input("Price per Call ($)", value=1.0, step=0.01))
-    update_nested_dict(st.session_state.config, ["financial_metrics", "expected_growth_rate"],
-                       st.sidebar.number_input("Expected Growth Rate", value=0.1, format="%.2f", step=0.01))
-
-elif selected_section == "Market Data":
-    update_nested_dict(st.session_state.config, ["market_data", "our_market_share"],
-                       st.sidebar.number_input("Our Market Share (%)", value=15.0, step=0.1))
-    update_nested_dict(st.session_state.config, ["market_data", "our_customer_satisfaction"],
-                       st.sidebar.number_input("Our Customer Satisfaction", value=4.5, min_value=1.0, max_value=5.0,
-                                               step=0.1))
-
-# Main dashboard inputs
-st.sidebar.title("Simulation Parameters")
-num_agents = st.sidebar.slider(
-    "Number of Agents:", min_value=1, max_value=10000, value=100, step=1
-)
-calls_per_day = st.sidebar.slider(
-    "Calls per Day (per agent):", min_value=1, max_value=1000, value=50, step=1
-)
-mean_call_duration = st.sidebar.slider(
-    "Mean Call Duration (minutes):",
-    min_value=1.0,
-    max_value=60.0,
-    value=float(st.session_state.config["operational_metrics"]["avg_handling_time"]),
-    step=0.1
-)
-
-
-# Calculate total cost per minute
-def calculate_total_cost_per_minute(config):
-    text_gen_cost = (config["service_costs"]["text_generation"]["input"]["cost_per_1k_tokens"] *
-                     config["service_costs"]["text_generation"]["input"]["tokens_per_minute"] / 1000 +
-                     config["service_costs"]["text_generation"]["output"]["cost_per_1k_tokens"] *
-                     config["service_costs"]["text_generation"]["output"]["tokens_per_minute"] / 1000)
-    audio_recog_cost = config["service_costs"]["audio_recognition"]["deepgram_nova2"]["cost_per_minute"]
-    audio_gen_cost = (config["service_costs"]["audio_generation"]["11labs_scale"]["cost_per_1k_chars"] *
-                      config["service_costs"]["audio_generation"]["11labs_scale"]["chars_per_minute"] / 1000)
-    return text_gen_cost + audio_recog_cost + audio_gen_cost
-
-
-total_cost_per_minute = calculate_total_cost_per_minute(st.session_state.config)
-st.sidebar.metric("Total Cost per Minute", f"${total_cost_per_minute:.4f}")
-
-# Main dashboard
-st.title("LiveKit Voice Assistant Business Intelligence Dashboard")
-
-# Tabs for different modules
-tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
-    "Financial Overview",
-    "Operational Metrics",
-    "Service Performance",
-    "Market Position",
-    "Scalability Analysis",
-    "Risk Assessment",
-    "Forecast and Trends",
-    "Service Configuration",  # New tab
-])
-
-# Render each module in its respective tab
-with tab1:
-    render_financial_overview(st.session_state.config, num_agents, calls_per_day, mean_call_duration,
-                              total_cost_per_minute)
-
-with tab2:
-    render_operational_metrics(st.session_state.config, num_agents, calls_per_day, mean_call_duration)
-
-with tab3:
-    render_service_performance(st.session_state.config, total_cost_per_minute)
-
-with tab4:
-    render_market_position(st.session_state.config)
-
-with tab5:
-    render_scalability_analysis(st.session_state.config, num_agents, calls_per_day, mean_call_duration,
-                                total_cost_per_minute)
-
-with tab6:
-    render_risk_assessment(st.session_state.config, num_agents, calls_per_day, mean_call_duration)
-
-with tab7:
-    render_forecast_trends(st.session_state.config, num_agents, calls_per_day, mean_call_duration)
-
-with tab8:
-    updated_config = render_service_configuration(st.session_state.config)
-    st.session_state.config = updated_config
\ No newline at end of file
+# Streamlit runs this script as __main__; process pool workers import it as __mp_main__ and must not build the app
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from data_export import register_export_frame
+from figure_cache import cached_figure
+from metrics_store import get_metrics_store
+
+MARKET_HISTORY_DAYS = 365
+MARKET_HISTORY_METRICS = {"market_share": "Our Market Share", "industry_growth": "Industry Growth"}
 
 
 def render_market_position(config):
@@ -30,66 +36,74 @@ def render_market_position(config):
         ]
     )
 
-    fig_market_share = px.pie(
+    register_export_frame("Market Data", market_data)
+
+    fig_market_share = cached_figure(
+        "market_share_pie",
+        lambda: px.pie(
+            market_data,
+            values="Market Share",
+            names="Company",
+            title="Market Share Comparison",
+        ),
         market_data,
-        values="Market Share",
-        names="Company",
-        title="Market Share Comparison",
     )
     st.plotly_chart(fig_market_share)
 
     # Price vs Satisfaction Comparison
-    fig_satisfaction_price = px.scatter(
-        market_data,
-        x="Price per Call",
-        y="Customer Satisfaction",
-        size="Market Share",
-        color="Company",
-        title="Price vs Satisfaction Comparison",
-        labels={
-            "Price per Call": "Price per Call ($)",
-            "Customer Satisfaction": "Customer Satisfaction Score",
-        },
-    )
-    fig_satisfaction_price.update_layout(xaxis_range=[0.5, 1.5], yaxis_range=[3.5, 5])
-    st.plotly_chart(fig_satisfaction_price)
+    def build_satisfaction_price():
+        fig_satisfaction_price = px.scatter(
+            market_data,
+            x="Price per Call",
+            y="Customer Satisfaction",
+            size="Market Share",
+            color="Company",
+            title="Price vs Satisfaction Comparison",
+            labels={
+                "Price per Call": "Price per Call ($)",
+                "Customer Satisfaction": "Customer Satisfaction Score",
+            },
+        )
+        fig_satisfaction_price.update_layout(xaxis_range=[0.5, 1.5], yaxis_range=[3.5, 5])
+        return fig_satisfaction_price
 
-    # Historical Market Share Trend
-    historical_data = pd.DataFrame(
-        {
-            "Date": config["market_data"]["historical_data"]["dates"],
-            "Our Market Share": config["market_data"]["historical_data"][
-                "our_market_share"
-            ],
-            "Industry Growth": config["market_data"]["historical_data"][
-                "industry_growth"
-            ],
-        }
-    )
+    st.plotly_chart(cached_figure("market_satisfaction_price", build_satisfaction_price, market_data))
 
-    fig_historical = go.Figure()
-    fig_historical.add_trace(
-        go.Scatter(
-            x=historical_data["Date"],
-            y=historical_data["Our Market Share"],
-            mode="lines+markers",
-            name="Our Market Share",
+    # Historical Market Share Trend
+    # Read from the metrics store; the configured history only seeds an empty store
+    store = get_metrics_store()
+    seed_history = config["market_data"]["historical_data"]
+    store.seed("market_share", seed_history["dates"], seed_history["our_market_share"])
+    store.seed("industry_growth", seed_history["dates"], seed_history["industry_growth"])
+    historical_data = store.recent_frame(MARKET_HISTORY_METRICS, MARKET_HISTORY_DAYS)
+
+    register_export_frame("Market Share History", historical_data)
+    def build_historical():
+        fig_historical = go.Figure()
+        fig_historical.add_trace(
+            go.Scatter(
+                x=historical_data["Date"],
+                y=historical_data["Our Market Share"],
+                mode="lines+markers",
+                name="Our Market Share",
+            )
         )
-    )
-    fig_historical.add_trace(
-        go.Scatter(
-            x=historical_data["Date"],
-            y=historical_data["Industry Growth"],
-            mode="lines+markers",
-            name="Industry Growth",
+        fig_historical.add_trace(
+            go.Scatter(
+                x=historical_data["Date"],
+                y=historical_data["Industry Growth"],
+                mode="lines+markers",
+                name="Industry Growth",
+            )
         )
-    )
-    fig_historical.update_layout(
-        title="Historical Market Share and Industry Growth",
-        xaxis_title="Date",
-        yaxis_title="Percentage (%)",
-    )
-    st.plotly_chart(fig_historical)
+        fig_historical.update_layout(
+            title="Historical Market Share and Industry Growth",
+            xaxis_title="Date",
+            yaxis_title="Percentage (%)",
+        )
+        return fig_historical
+
+    st.plotly_chart(cached_figure("market_share_history", build_historical, historical_data))
 
     # Competitive Analysis
     st.subheader("Competitive Analysis")
@@ -169,23 +183,15 @@ def render_market_position(config):
         st.subheader("Market Trends and Predictions")
 
         # Calculate the average growth rate
-        growth_rates = [
-            (
-                config["market_data"]["historical_data"]["our_market_share"][i + 1]
-                / config["market_data"]["historical_data"]["our_market_share"][i]
-            )
-            - 1
-            for i in range(
-                len(config["market_data"]["historical_data"]["our_market_share"]) - 1
-            )
-        ]
-        avg_growth_rate = sum(growth_rates) / len(growth_rates)
+        market_share = historical_data["Our Market Share"].dropna()
+        avg_growth_rate = market_share.pct_change().mean()
+        industry_growth = historical_data["Industry Growth"].dropna()
 
         st.write(
             f"1. Based on historical data, our average market share growth rate is {avg_growth_rate:.2%} per month."
         )
         st.write(
-            f"2. The industry is growing at an average rate of {(config['market_data']['historical_data']['industry_growth'][-1] - config['market_data']['historical_data']['industry_growth'][0]) / len(config['market_data']['historical_data']['industry_growth']):.2%} per month."
+            f"2. The industry is growing at an average rate of {(industry_growth.iloc[-1] - industry_growth.iloc[0]) / len(industry_growth):.2%} per month."
         )
         st.write(
             "3. Key factors influencing market trends include technological advancements, changing customer preferences, and regulatory developments in AI and data privacy."
@@ -0,0 +1,124 @@
+import os
+import resource
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from cachetools import TTLCache
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from figure_cache import get_figure_cache
+from random_streams import get_shared_draw_cache
+from shared_config import get_default_config
+
+
+def current_rss():
+    # Current resident set size in bytes; falls back to the peak where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def estimate_bytes(obj, seen=None):
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, (pd.Series, pd.Index)):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_bytes(k, seen) + estimate_bytes(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_bytes(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += estimate_bytes(vars(obj), seen)
+    return size
+
+
+def shared_resources():
+    # Process-level objects that sessions reference but do not own
+    return {
+        "Default config": get_default_config(),
+        "Random draw cache": get_shared_draw_cache()[0],
+        "Figure cache": get_figure_cache(),
+    }
+
+
+def estimate_session_bytes(state):
+    # Shared resources are counted once for the process, and objects reachable from several keys only once
+    seen = {id(resource) for resource in shared_resources().values()}
+    return {key: estimate_bytes(value, seen) for key, value in state.items()}
+
+
+@st.cache_resource
+def get_session_registry():
+    # Sessions that have not rerun for an hour are assumed closed
+    return TTLCache(maxsize=10_000, ttl=3600), threading.Lock()
+
+
+def record_session_bytes(bytes_by_key):
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return
+    registry, lock = get_session_registry()
+    with lock:
+        registry[ctx.session_id] = (sum(bytes_by_key.values()), time.time())
+
+
+def render_memory_usage():
+    bytes_by_key = estimate_session_bytes(st.session_state.to_dict())
+    record_session_bytes(bytes_by_key)
+
+    registry, lock = get_session_registry()
+    with lock:
+        sessions = list(registry.items())
+    ctx = get_script_run_ctx()
+    shared = {name: estimate_bytes(resource) for name, resource in shared_resources().items()}
+
+    with st.sidebar.expander("Memory Usage"):
+        col1, col2 = st.columns(2)
+        col1.metric("This Session", f"{sum(bytes_by_key.values()) / 1024 ** 2:.2f} MB")
+        col2.metric("Process RSS", f"{current_rss() / 1024 ** 2:.0f} MB")
+        col1.metric("Active Sessions", len(sessions))
+        col2.metric("Shared", f"{sum(shared.values()) / 1024 ** 2:.2f} MB")
+
+        st.write("This session by key")
+        st.dataframe(
+            pd.DataFrame({"Key": list(bytes_by_key), "KB": [size / 1024 for size in bytes_by_key.values()]})
+            .sort_values("KB", ascending=False),
+            hide_index=True,
+        )
+        st.write("All sessions")
+        st.dataframe(
+            pd.DataFrame({
+                "Session": [session_id[:8] + (" (this)" if ctx and session_id == ctx.session_id else "")
+                            for session_id, _ in sessions],
+                "KB": [size / 1024 for _, (size, _) in sessions],
+                "Last Rerun": [pd.Timestamp(updated, unit="s") for _, (_, updated) in sessions],
+            }).sort_values("KB", ascending=False),
+            hide_index=True,
+        )
+        st.write("Shared across sessions")
+        st.dataframe(
+            pd.DataFrame({"Resource": list(shared), "KB": [size / 1024 for size in shared.values()]}),
+            hide_index=True,
+        )
+
+        figure_stats, figure_bytes, figure_entries = get_figure_cache().stats()
+        hits = figure_stats["Hits"].sum()
+        lookups = hits + figure_stats["Misses"].sum()
+        st.write(
+            f"Figure cache: {figure_entries} figures, {figure_bytes / 1024 ** 2:.1f} MB, "
+            f"{hits / lookups if lookups else 0:.0%} hit rate"
+        )
+        st.dataframe(figure_stats, hide_index=True)
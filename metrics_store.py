@@ -0,0 +1,136 @@
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DEFAULT_TENANT = "all"
+INSERT_BATCH_ROWS = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    metric TEXT NOT NULL,
+    tenant TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (metric, tenant, ts)
+) WITHOUT ROWID
+"""
+
+
+def _epoch_seconds(timestamps):
+    timestamps = pd.to_datetime(pd.Series(timestamps))
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_convert(None)
+    return (timestamps - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+
+
+class MetricsStore:
+    def __init__(self, path="metrics.db"):
+        # The table is clustered on (metric, tenant, ts), so a range query reads one contiguous run of rows.
+        # WAL lets other processes read while one writes; this process shares one connection behind a lock.
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._pid = None
+        self._connect()
+
+    def _connect(self):
+        # A connection is only used by the process that opened it; a forked child opens its own on first use,
+        # with a fresh lock in case the parent's was held at the fork
+        if self._pid != os.getpid():
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            connection.commit()
+            self._connection, self._lock, self._pid = connection, threading.Lock(), os.getpid()
+        return self._connection
+
+    def insert_many(self, rows):
+        # rows of (metric, tenant, epoch seconds, value); a repeated key replaces the stored value
+        rows = iter(rows)
+        connection = self._connect()
+        with self._lock, connection:
+            while True:
+                batch = [row for _, row in zip(range(INSERT_BATCH_ROWS), rows)]
+                if not batch:
+                    break
+                connection.executemany("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?)", batch)
+
+    def insert_series(self, metric, timestamps, values, tenant=DEFAULT_TENANT):
+        seconds = _epoch_seconds(timestamps)
+        self.insert_many(zip([metric] * len(seconds), [tenant] * len(seconds), seconds.tolist(),
+                             np.asarray(values, dtype=float).tolist()))
+
+    def query(self, metric, start=None, end=None, tenant=DEFAULT_TENANT):
+        # Rows in [start, end) as (epoch seconds, values) arrays, read straight from the cursor
+        start = -np.inf if start is None else _epoch_seconds([start])[0]
+        end = np.inf if end is None else _epoch_seconds([end])[0]
+        connection = self._connect()
+        with self._lock:
+            cursor = connection.execute(
+                "SELECT ts, value FROM metrics WHERE metric = ? AND tenant = ? AND ts >= ? AND ts < ? ORDER BY ts",
+                (metric, tenant, start, end),
+            )
+            rows = np.fromiter(cursor, dtype=[("ts", "f8"), ("value", "f8")])
+        return rows["ts"], rows["value"]
+
+    def query_frame(self, metrics, start=None, end=None, tenant=DEFAULT_TENANT):
+        # One column per metric on the union of their timestamps
+        series = {}
+        for metric, column in metrics.items():
+            seconds, values = self.query(metric, start, end, tenant)
+            series[column] = pd.Series(values, index=pd.to_datetime(seconds, unit="s"))
+        frame = pd.DataFrame(series, columns=list(metrics.values()))
+        return frame.rename_axis("Date").reset_index()
+
+    def recent_frame(self, metrics, days, tenant=DEFAULT_TENANT):
+        # The last `days` of data, ending at the newest point of the first metric
+        latest = self.latest(next(iter(metrics)), tenant)
+        start = None if latest is None else latest - pd.Timedelta(days=days)
+        return self.query_frame(metrics, start, tenant=tenant)
+
+    def latest(self, metric, tenant=DEFAULT_TENANT):
+        connection = self._connect()
+        with self._lock:
+            (latest,) = connection.execute(
+                "SELECT MAX(ts) FROM metrics WHERE metric = ? AND tenant = ?", (metric, tenant)
+            ).fetchone()
+        return None if latest is None else pd.to_datetime(latest, unit="s")
+
+    def seed(self, metric, timestamps, values, tenant=DEFAULT_TENANT):
+        # Writes the series only if the metric has no data yet, so reruns and other sessions keep the first copy
+        if self.latest(metric, tenant) is None:
+            self.insert_series(metric, timestamps, values, tenant)
+
+    def import_csv(self, path):
+        # Columns: metric, tenant, timestamp (ISO 8601 or epoch seconds), value
+        with open(path, newline="") as f:
+            frame = pd.DataFrame(csv.DictReader(f))
+        seconds = pd.to_numeric(frame["timestamp"], errors="coerce")
+        text = seconds.isna()
+        seconds[text] = _epoch_seconds(frame.loc[text, "timestamp"])
+        self.insert_many(zip(frame["metric"], frame["tenant"].replace("", DEFAULT_TENANT), seconds.tolist(),
+                             frame["value"].astype(float).tolist()))
+        return len(frame)
+
+
+@st.cache_resource
+def get_metrics_store():
+    return MetricsStore(os.environ.get("METRICS_DB", os.path.join(".metrics", "metrics.db")))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load metrics into the local metrics store")
+    parser.add_argument("csv_paths", nargs="+", help="CSV files with metric, tenant, timestamp and value columns")
+    parser.add_argument("--db", default=os.environ.get("METRICS_DB", os.path.join(".metrics", "metrics.db")))
+    args = parser.parse_args()
+
+    store = MetricsStore(args.db)
+    for csv_path in args.csv_paths:
+        print(f"{csv_path}: {store.import_csv(csv_path):,} rows")
@@ -4,28 +4,55 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import numpy as np
+from cachetools import LRUCache
+from random_streams import get_random_streams
+from data_export import register_export_frame
+from anomaly_detection import update_detector
+from metrics_store import get_metrics_store
+from result_tables import NUMBER, render_table
 
+OPERATIONAL_HISTORY_DAYS = 90
+OPERATIONAL_METRICS = {
+    "avg_handling_time": "Avg Handling Time",
+    "first_call_resolution": "First Call Resolution",
+    "customer_satisfaction": "Customer Satisfaction",
+}
 
-def generate_historical_data(config, num_days=90):
+
+@st.cache_resource
+def get_anomaly_detector_cache():
+    return LRUCache(maxsize=1000)
+
+
+def generate_historical_data(config, num_days=90, rng=None):
+    rng = np.random.default_rng() if rng is None else rng
     base_data = {
         "avg_handling_time": config["operational_metrics"]["avg_handling_time"],
         "first_call_resolution": config["operational_metrics"]["first_call_resolution"],
         "customer_satisfaction": config["operational_metrics"]["customer_satisfaction"]
     }
 
-    dates = [datetime.now() - timedelta(days=i) for i in range(num_days)]
-    data = []
+    # Whole days, so a rerun on the same day produces the same timestamps
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    dates = [today - timedelta(days=i) for i in range(num_days)]
+    noise = rng.standard_normal((num_days, 3))
+
+    return pd.DataFrame({
+        "Date": dates,
+        "Avg Handling Time": base_data["avg_handling_time"] + 0.5 * noise[:, 0],
+        "First Call Resolution": np.clip(base_data["first_call_resolution"] + 0.02 * noise[:, 1], 0, 1),
+        "Customer Satisfaction": np.clip(base_data["customer_satisfaction"] + 0.1 * noise[:, 2], 1, 5)
+    })
 
-    for date in dates:
-        day_data = {
-            "Date": date,
-            "Avg Handling Time": base_data["avg_handling_time"] + np.random.normal(0, 0.5),
-            "First Call Resolution": min(max(base_data["first_call_resolution"] + np.random.normal(0, 0.02), 0), 1),
-            "Customer Satisfaction": min(max(base_data["customer_satisfaction"] + np.random.normal(0, 0.1), 1), 5)
-        }
-        data.append(day_data)
 
-    return pd.DataFrame(data)
+def load_operational_history(config, store, num_days=OPERATIONAL_HISTORY_DAYS, rng=None):
+    # Days with recorded measurements come from the store; the rest are simulated in memory and never written
+    # back, so the store only ever holds real measurements
+    simulated = generate_historical_data(config, num_days=num_days, rng=rng).set_index("Date").sort_index()
+    recorded = store.query_frame(OPERATIONAL_METRICS, start=simulated.index[0]).set_index("Date")
+    recorded = recorded.groupby(recorded.index.normalize()).mean()
+    history = recorded.combine_first(simulated)[list(OPERATIONAL_METRICS.values())]
+    return history.rename_axis("Date").reset_index()
 
 
 def render_operational_metrics(config, num_agents, calls_per_day, mean_call_duration):
@@ -38,7 +65,18 @@ def render_operational_metrics(config, num_agents, calls_per_day, mean_call_dura
     col3.metric("Customer Satisfaction", f"{config['operational_metrics']['customer_satisfaction']:.2f}/5")
 
     # Historical Trends
-    historical_data = generate_historical_data(config)
+    streams = get_random_streams()
+    historical_data = load_operational_history(config, get_metrics_store(),
+                                               rng=streams.generator("operational_history"))
+    register_export_frame("Operational History", historical_data)
+
+    # Streaming anomaly detection; the cached detector only sees days it has not seen before
+    history = historical_data.set_index("Date")
+    detector = update_detector(get_anomaly_detector_cache(), "operational_history", history)
+    anomalies = detector.anomaly_frame()
+    anomalies = anomalies[anomalies["Timestamp"] >= history.index[0]]
+    anomaly_points = anomalies.groupby(["Timestamp", "Series"], as_index=False).agg(
+        Value=("Value", "first"), Detectors=("Detector", ", ".join))
 
     fig_trends = go.Figure()
     fig_trends.add_trace(
@@ -47,13 +85,25 @@ def render_operational_metrics(config, num_agents, calls_per_day, mean_call_dura
         go.Scatter(x=historical_data['Date'], y=historical_data['First Call Resolution'], name="First Call Resolution"))
     fig_trends.add_trace(
         go.Scatter(x=historical_data['Date'], y=historical_data['Customer Satisfaction'], name="Customer Satisfaction"))
+    fig_trends.add_trace(
+        go.Scatter(x=anomaly_points['Timestamp'], y=anomaly_points['Value'], mode="markers", name="Anomalies",
+                   marker=dict(color="red", size=10, symbol="x"),
+                   text=anomaly_points['Series'] + ": " + anomaly_points['Detectors']))
     fig_trends.update_layout(title="Historical Trends of Key Metrics", xaxis_title="Date", yaxis_title="Value")
     st.plotly_chart(fig_trends)
 
+    with st.expander(f"Detected Anomalies ({len(anomaly_points)})"):
+        st.write("Points flagged by an EWMA control limit, a CUSUM shift alarm or a robust z-score against "
+                 "the median and MAD of the preceding 30 days.")
+        register_export_frame("Operational Anomalies", anomalies)
+        render_table(anomalies, {"Value": NUMBER, "Score": NUMBER})
+
     # Call Volume Distribution
     hours = list(range(24))
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    call_volume = np.random.randint(50, 200, size=(7, 24))
+    call_volume = streams.generator("call_volume").integers(50, 200, size=(7, 24))
+    register_export_frame("Call Volume", pd.DataFrame(call_volume, columns=hours).assign(Day=days).set_index("Day")
+                          .reset_index())
     fig_heatmap = px.imshow(call_volume,
                             labels=dict(x="Hour of Day", y="Day of Week", color="Call Volume"),
                             x=hours,
@@ -67,6 +117,10 @@ def render_operational_metrics(config, num_agents, calls_per_day, mean_call_dura
     total_available_minutes = num_agents * 8 * 60  # Assuming 8-hour workday
     utilization_rate = (total_daily_minutes / total_available_minutes) * 100
 
+    register_export_frame("Efficiency Metrics", pd.DataFrame({
+        "Metric": ["Calls per Agent per Day", "Total Daily Call Volume", "Utilization Rate (%)"],
+        "Value": [calls_per_day, total_daily_calls, utilization_rate],
+    }))
     efficiency_metrics = pd.DataFrame({
         "Metric": ["Calls per Agent per Day", "Total Daily Call Volume", "Utilization Rate"],
         "Value": [
@@ -78,8 +132,8 @@ def render_operational_metrics(config, num_agents, calls_per_day, mean_call_dura
     st.table(efficiency_metrics)
 
     # Agent Performance Distribution
-    agent_performance = np.random.normal(loc=config['operational_metrics']['avg_handling_time'], scale=1,
-                                         size=num_agents)
+    agent_performance = (config['operational_metrics']['avg_handling_time']
+                         + streams.standard_normal("agent_performance", num_agents)[:, 0])
     fig_agent_performance = px.histogram(agent_performance, nbins=20,
                                          labels={'value': 'Average Handling Time (minutes)',
                                                  'count': 'Number of Agents'},
@@ -0,0 +1,120 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+from scipy import fft
+from scipy.stats import lognorm, norm
+
+from latency_telemetry import QUANTILES, bucket_value
+
+BIN_MS = 5.0
+MAX_STAGE_MS = 10_000.0
+# Fewer measured requests than this are too thin to stand in for a provider's distribution
+MIN_MEASURED_REQUESTS = 50
+# A voice turn runs the stages in this order; each has the providers offered in the service configuration
+PIPELINE_STAGES = ("stt", "llm", "tts")
+STAGE_OPTIONS = {
+    "stt": ("deepgram", "whisper"),
+    "llm": ("gpt-4o", "gpt-4oMini"),
+    "tts": ("elevenlabs", "deepgram_tts"),
+}
+# Assumed (median, p95) latency in ms, used for providers without telemetry
+ASSUMED_LATENCY_MS = {
+    "stt": {"deepgram": (250, 500), "whisper": (700, 1600)},
+    "llm": {"gpt-4o": (450, 1100), "gpt-4oMini": (320, 800)},
+    "tts": {"elevenlabs": (300, 700), "deepgram_tts": (200, 450)},
+}
+
+# Provider or model labels in LiveKit metrics events for each option; labels not listed match an option's own name
+TELEMETRY_LABELS = {
+    "stt": {"openai": "whisper", "whisper-1": "whisper"},
+    "llm": {"gpt-4o-mini": "gpt-4oMini"},
+    "tts": {"deepgram": "deepgram_tts", "11labs": "elevenlabs"},
+}
+
+
+def num_bins(bin_ms=BIN_MS, max_ms=MAX_STAGE_MS):
+    return int(np.ceil(max_ms / bin_ms))
+
+
+def parametric_pmf(median_ms, p95_ms, bin_ms=BIN_MS, max_ms=MAX_STAGE_MS):
+    # Lognormal through the median and p95; mass beyond the grid is folded into the last bin
+    sigma = np.log(p95_ms / median_ms) / norm.ppf(0.95)
+    cdf = lognorm.cdf(np.arange(num_bins(bin_ms, max_ms) + 1) * bin_ms, sigma, scale=median_ms)
+    cdf[-1] = 1.0
+    return np.diff(cdf)
+
+
+def histogram_pmf(counts, bin_ms=BIN_MS, max_ms=MAX_STAGE_MS):
+    # Log-bucket counts are moved onto the linear grid at their bucket midpoints
+    size = num_bins(bin_ms, max_ms)
+    bins = np.minimum((bucket_value(np.arange(len(counts))) / bin_ms).astype(np.int64), size - 1)
+    pmf = np.bincount(bins, weights=counts, minlength=size)
+    return pmf / pmf.sum()
+
+
+def convolve_stages(*stage_pmfs):
+    # Each argument is an (options, bins) array; the result holds the end-to-end distribution of every
+    # combination, shape (options_1, ..., options_k, total bins), from one FFT per stage option
+    length = sum(pmfs.shape[-1] for pmfs in stage_pmfs) - len(stage_pmfs) + 1
+    size = fft.next_fast_len(length, real=True)
+    product = 1
+    for axis, pmfs in enumerate(stage_pmfs):
+        spectrum = fft.rfft(pmfs, size, axis=-1)
+        shape = [1] * len(stage_pmfs) + [spectrum.shape[-1]]
+        shape[axis] = pmfs.shape[0]
+        product = product * spectrum.reshape(shape)
+    total = np.clip(fft.irfft(product, size, axis=-1)[..., :length], 0, None)  # FFT round-off can dip below zero
+    return total / total.sum(axis=-1, keepdims=True)
+
+
+def pmf_percentiles(pmf, num_stages, quantiles=QUANTILES, bin_ms=BIN_MS):
+    # A sum of k bins starting at index i is centred on (i + k / 2) bins
+    cdf = np.cumsum(pmf, axis=-1)
+    indices = np.stack([(cdf < q).sum(axis=-1) for q in quantiles], axis=-1)
+    return (indices + num_stages / 2) * bin_ms
+
+
+def stage_distributions(measured=None):
+    # measured maps (stage, provider) to log-bucket counts; providers without counts use the assumptions
+    options = {}
+    for (stage, label), counts in (measured or {}).items():
+        key = (stage, TELEMETRY_LABELS.get(stage, {}).get(label, label))
+        options[key] = options[key] + counts if key in options else counts
+    pmfs, sources = {}, {}
+    for stage in PIPELINE_STAGES:
+        stage_pmfs = []
+        for provider in STAGE_OPTIONS[stage]:
+            counts = options.get((stage, provider))
+            if counts is not None and counts.sum() >= MIN_MEASURED_REQUESTS:
+                stage_pmfs.append(histogram_pmf(counts))
+                sources[(stage, provider)] = f"Measured ({int(counts.sum()):,} requests)"
+            else:
+                stage_pmfs.append(parametric_pmf(*ASSUMED_LATENCY_MS[stage][provider]))
+                sources[(stage, provider)] = "Assumed"
+        pmfs[stage] = np.vstack(stage_pmfs)
+    return pmfs, sources
+
+
+def pipeline_latency(measured=None):
+    pmfs, sources = stage_distributions(measured)
+    turn_pmfs = convolve_stages(*(pmfs[stage] for stage in PIPELINE_STAGES))
+    percentiles = pmf_percentiles(turn_pmfs, len(PIPELINE_STAGES))
+
+    rows = []
+    for indices in itertools.product(*(range(len(STAGE_OPTIONS[stage])) for stage in PIPELINE_STAGES)):
+        providers = [STAGE_OPTIONS[stage][index] for stage, index in zip(PIPELINE_STAGES, indices)]
+        p50, p95, p99 = percentiles[indices]
+        rows.append({
+            "STT": providers[0],
+            "LLM": providers[1],
+            "TTS": providers[2],
+            "p50 (ms)": p50,
+            "p95 (ms)": p95,
+            "p99 (ms)": p99,
+        })
+    stages = pd.DataFrame([
+        {"Stage": stage.upper(), "Provider": provider, "Source": source}
+        for (stage, provider), source in sources.items()
+    ])
+    return pd.DataFrame(rows), turn_pmfs, stages
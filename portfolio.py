@@ -0,0 +1,154 @@
+import copy
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from background_jobs import get_job_runner
+from financial_overview import calculate_costs, calculate_revenue
+from risk_assessment import calculate_total_cost_per_minute, monte_carlo_simulation
+from scalability_analysis import calculate_scale_data
+
+DEFAULT_SIMULATION = {"num_agents": 100, "calls_per_day": 50, "mean_call_duration": 5.0}
+DEFAULT_CLIENT_DIRECTORY = "client_configs"
+
+
+def merge_config(base, overrides):
+    merged = copy.deepcopy(base)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def load_client_configs(directory, base_config):
+    # Each *.json file is one client; missing keys fall back to the base config
+    clients = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        with open(os.path.join(directory, filename)) as f:
+            client_config = json.load(f)
+        name = client_config.pop("name", os.path.splitext(filename)[0])
+        simulation = {**DEFAULT_SIMULATION, **client_config.pop("simulation", {})}
+        clients.append((name, merge_config(base_config, client_config), simulation))
+    return clients
+
+
+def evaluate_client(args):
+    name, config, simulation, num_simulations = args
+    num_agents = simulation["num_agents"]
+    calls_per_day = simulation["calls_per_day"]
+    mean_call_duration = simulation["mean_call_duration"]
+    total_cost_per_minute = calculate_total_cost_per_minute(config)
+
+    # Financial overview
+    df_costs = calculate_costs(config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute)
+    monthly_cost = df_costs["Monthly Cost ($)"].sum()
+    monthly_revenue = calculate_revenue(config, num_agents, calls_per_day)
+    monthly_profit = monthly_revenue - monthly_cost
+
+    # Scalability
+    df_scale = calculate_scale_data(config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute)
+
+    # Risk; only the histogram of the simulated profits is sent back to the parent process
+    profits = monte_carlo_simulation(config, num_agents, calls_per_day, mean_call_duration, num_simulations)
+    counts, edges = np.histogram(profits, bins=50)
+
+    summary = {
+        "Client": name,
+        "Agents": num_agents,
+        "Monthly Revenue": monthly_revenue,
+        "Monthly Cost": monthly_cost,
+        "Monthly Profit": monthly_profit,
+        "Profit Margin (%)": monthly_profit / monthly_revenue * 100 if monthly_revenue > 0 else 0,
+        "Optimal Scale": df_scale.loc[df_scale["Profit Margin"].idxmax(), "Scale"],
+        "Expected Profit (MC)": profits.mean(),
+        "Profit Std Dev (MC)": profits.std(),
+        "5% VaR": np.percentile(profits, 5),
+        "Probability of Loss (%)": np.mean(profits < 0) * 100,
+    }
+    details = {"costs": df_costs, "scale": df_scale, "histogram": (counts, edges)}
+    return summary, details
+
+
+def evaluate_portfolio(clients, num_simulations=100000, executor=None):
+    # Clients are evaluated in the given executor, e.g. the job runner's process pool, or here without one
+    tasks = [(name, config, simulation, num_simulations) for name, config, simulation in clients]
+    if executor is None:
+        results = [evaluate_client(task) for task in tasks]
+    else:
+        chunksize = max(1, len(tasks) // ((os.cpu_count() or 1) * 4))
+        results = list(executor.map(evaluate_client, tasks, chunksize=chunksize))
+
+    df_portfolio = pd.DataFrame([summary for summary, _ in results])
+    details = {summary["Client"]: detail for summary, detail in results}
+    return df_portfolio, details
+
+
+@st.cache_data(show_spinner="Evaluating client portfolio...")
+def _evaluate_portfolio_cached(directory, directory_state, base_config, num_simulations):
+    clients = load_client_configs(directory, base_config)
+    return evaluate_portfolio(clients, num_simulations, executor=get_job_runner().process_pool)
+
+
+def render_portfolio(base_config, directory, num_simulations=100000):
+    st.header("Portfolio Overview")
+
+    if not os.path.isdir(directory):
+        st.warning(f"Client config directory '{directory}' does not exist.")
+        return
+
+    # File names and modification times invalidate the cached evaluation when configs change
+    directory_state = tuple(
+        (entry.name, entry.stat().st_mtime) for entry in sorted(os.scandir(directory), key=lambda e: e.name)
+        if entry.name.endswith(".json")
+    )
+    if not directory_state:
+        st.info(f"No client configs (*.json) found in '{directory}'.")
+        return
+
+    df_portfolio, details = _evaluate_portfolio_cached(directory, directory_state, base_config, num_simulations)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Clients", f"{len(df_portfolio)}")
+    col2.metric("Total Monthly Revenue", f"${df_portfolio['Monthly Revenue'].sum():,.2f}")
+    col3.metric("Total Monthly Profit", f"${df_portfolio['Monthly Profit'].sum():,.2f}")
+    col4.metric("Clients at Risk of Loss", f"{(df_portfolio['5% VaR'] < 0).sum()}")
+
+    st.subheader("Client Summary")
+    st.dataframe(df_portfolio)
+
+    fig_portfolio = px.scatter(
+        df_portfolio,
+        x="Monthly Revenue",
+        y="Profit Margin (%)",
+        size="Agents",
+        hover_name="Client",
+        title="Client Revenue vs Profit Margin",
+    )
+    st.plotly_chart(fig_portfolio)
+
+    # Drill-down
+    st.subheader("Client Drill-down")
+    client = st.selectbox("Select Client", df_portfolio["Client"].tolist(), key="portfolio_client")
+    client_details = details[client]
+
+    st.table(client_details["costs"])
+    st.dataframe(client_details["scale"])
+
+    counts, edges = client_details["histogram"]
+    fig_monte_carlo = go.Figure(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, name="Paths"))
+    fig_monte_carlo.update_layout(
+        title=f"Monte Carlo Simulation of Monthly Profit ({num_simulations:,} paths)",
+        xaxis_title="Monthly Profit ($)",
+        yaxis_title="Count",
+        bargap=0,
+    )
+    st.plotly_chart(fig_monte_carlo)
@@ -0,0 +1,63 @@
+import hashlib
+import os
+import threading
+
+import numpy as np
+import streamlit as st
+from cachetools import LRUCache
+
+from risk_sampling import standard_normal_draws
+
+
+DRAW_CACHE_BYTES = int(os.environ.get("RANDOM_DRAW_CACHE_BYTES", 512 * 1024 ** 2))
+# Sessions share this seed unless RANDOM_SEED pins another one or asks for a fresh seed per session
+DEFAULT_SEED = 0
+
+
+def _new_draw_cache():
+    return LRUCache(maxsize=DRAW_CACHE_BYTES, getsizeof=lambda draws: draws.nbytes), threading.Lock()
+
+
+@st.cache_resource
+def get_shared_draw_cache():
+    # One cache for the process, bounded by bytes; sessions with the same seed share their draws, and evicted
+    # draws are regenerated identically from the seed
+    return _new_draw_cache()
+
+
+class RandomStreams:
+    def __init__(self, seed=None, draw_cache=None):
+        # Streams from a given seed repeat in every session, so their results may be shared; unseeded ones may not
+        self.shared = seed is not None
+        self.seed = np.random.SeedSequence(seed).entropy
+        self._draws, self._lock = draw_cache or _new_draw_cache()
+
+    def generator(self, name):
+        # The same name always restarts the same stream, so reruns see common random numbers
+        spawn_key = int.from_bytes(hashlib.sha256(name.encode()).digest()[:8], "little")
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(spawn_key,)))
+
+    def standard_normal(self, name, num_rows, num_columns=1, method="pseudo-random"):
+        # Base draws are cached read-only; callers rescale them instead of resampling when means or scales move
+        key = (self.seed, name, num_rows, num_columns, method)
+        with self._lock:
+            draws = self._draws.get(key)
+        if draws is None:
+            draws = standard_normal_draws(num_rows, num_columns, method, rng=self.generator(f"{name}/{method}"))
+            draws.setflags(write=False)
+            with self._lock:
+                try:
+                    self._draws[key] = draws
+                except ValueError:
+                    pass  # Larger than the whole cache; used once without caching
+        return draws
+
+
+def get_random_streams():
+    # One set of streams per browser session, from DEFAULT_SEED or the seed in RANDOM_SEED; RANDOM_SEED=session
+    # gives every session a fresh random seed instead, whose results stay out of the shared snapshot store
+    if "random_streams" not in st.session_state:
+        seed = os.environ.get("RANDOM_SEED", str(DEFAULT_SEED))
+        st.session_state.random_streams = RandomStreams(None if seed == "session" else int(seed),
+                                                        get_shared_draw_cache())
+    return st.session_state.random_streams
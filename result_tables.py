@@ -0,0 +1,17 @@
+import streamlit as st
+
+# printf-style formats applied by the frontend; percentages are stored on a 0-100 scale
+CURRENCY = "$%.2f"
+CURRENCY_PRECISE = "$%.4f"
+PERCENT = "%.2f%%"
+NUMBER = "%.2f"
+COUNT = "%d"
+
+
+def render_table(df, formats=None, **kwargs):
+    # Columns stay numeric end to end; formatting happens only when the table is drawn
+    column_config = {
+        column: st.column_config.NumberColumn(column, format=number_format)
+        for column, number_format in (formats or {}).items()
+    }
+    st.dataframe(df, column_config=column_config, hide_index=True, **kwargs)
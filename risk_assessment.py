@@ -3,63 +3,276 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+import time
 from scipy.stats import norm
+from snapshot_store import get_snapshot_store
+from background_jobs import render_job_result
+from random_streams import get_random_streams
+from simulation_paths import get_simulation_path_store
+from data_export import register_export_frame
+from risk_sampling import (
+    DEFAULT_SAMPLER, control_variate_mean, draws_per_path, sample_risk_factors, standard_normal_draws
+)
+
+
+RELATIVE_VOLATILITY = np.array([0.1, 0.2, 0.15, 0.05])  # Agents, calls per day, call duration, price
+RISK_FACTORS = ["Number of Agents", "Calls per Day", "Call Duration", "Price per Call"]
+PATH_COLUMNS = ["num_agents", "calls_per_day", "call_duration", "price_per_call", "profit"]
+
+
+def calculate_total_cost_per_minute(config):
+    return sum([
+        config["service_costs"]["text_generation"]["input"]["cost_per_1k_tokens"] *
+        config["service_costs"]["text_generation"]["input"]["tokens_per_minute"] / 1000,
+        config["service_costs"]["text_generation"]["output"]["cost_per_1k_tokens"] *
+        config["service_costs"]["text_generation"]["output"]["tokens_per_minute"] / 1000,
+        config["service_costs"]["audio_recognition"]["deepgram_nova2"]["cost_per_minute"],
+        config["service_costs"]["audio_generation"]["11labs_scale"]["cost_per_1k_chars"] *
+        config["service_costs"]["audio_generation"]["11labs_scale"]["chars_per_minute"] / 1000
+    ])
+
+
+def deterministic_profit(config, num_agents, calls_per_day, mean_call_duration):
+    return (
+        num_agents * calls_per_day * 30
+        * (config["financial_metrics"]["price_per_call"]
+           - mean_call_duration * calculate_total_cost_per_minute(config))
+    )
+
+
+def risk_factor_means(config, num_agents, calls_per_day, mean_call_duration):
+    return np.array([num_agents, calls_per_day, mean_call_duration, config["financial_metrics"]["price_per_call"]])
+
+
+def expected_control_profit(config, num_agents, calls_per_day, mean_call_duration, risk_model=None):
+    # Analytic mean of the unrounded profit, or None where the factor model has no closed form
+    risk_model = risk_model or {}
+    copula = risk_model.get("copula", "independent")
+    distributions = {marginal.get("distribution", "normal") for marginal in risk_model.get("marginals") or [{}]}
+    if "empirical" in distributions:
+        return None
+    if copula == "independent":
+        return deterministic_profit(config, num_agents, calls_per_day, mean_call_duration)
+    if copula != "gaussian" or distributions != {"normal"}:
+        return None
+
+    # Isserlis: E[XYZ] of jointly normal factors picks up one covariance term per pair
+    means = risk_factor_means(config, num_agents, calls_per_day, mean_call_duration)
+    stds = means * RELATIVE_VOLATILITY
+    cov = np.asarray(risk_model["correlation"], dtype=float) * np.outer(stds, stds)
+
+    def third_moment(i, j, k):
+        return means[i] * means[j] * means[k] + means[i] * cov[j, k] + means[j] * cov[i, k] + means[k] * cov[i, j]
+
+    return 30 * (third_moment(0, 1, 3) - calculate_total_cost_per_minute(config) * third_moment(0, 1, 2))
+
+
+def simulate_profit_paths(config, num_agents, calls_per_day, mean_call_duration, draws, risk_model=None,
+                          path_writer=None):
+    # Map standard-normal draws into variations of the key parameters, optionally with dependence between them
+    risk_model = risk_model or {}
+    means = risk_factor_means(config, num_agents, calls_per_day, mean_call_duration)
+    factors = sample_risk_factors(
+        draws, means, means * RELATIVE_VOLATILITY,
+        correlation=risk_model.get("correlation"), copula=risk_model.get("copula", "independent"),
+        marginals=risk_model.get("marginals"), degrees_of_freedom=risk_model.get("degrees_of_freedom", 4),
+    )
+    simulated_calls = factors[:, 1]
+    simulated_duration = factors[:, 2]
+    simulated_price = factors[:, 3]
+    total_cost_per_minute = calculate_total_cost_per_minute(config)
+
+    # Monthly profit per agent
+    profit_per_agent = simulated_calls * (simulated_price - simulated_duration * total_cost_per_minute) * 30
+    simulated_profit = factors[:, 0].astype(int) * profit_per_agent
+
+    # Without rounding the agent count, the expected profit is known analytically (see expected_control_profit)
+    control = factors[:, 0] * profit_per_agent
+
+    # Optionally keep the parameters behind every path for later drill-down
+    if path_writer is not None:
+        path_writer.append({**dict(zip(PATH_COLUMNS, factors.T)), "profit": simulated_profit})
+    return simulated_profit, control
 
 
 def monte_carlo_simulation(
-    config, num_agents, calls_per_day, mean_call_duration, num_simulations=1000
+    config, num_agents, calls_per_day, mean_call_duration, num_simulations=1000,
+    sampler=DEFAULT_SAMPLER, return_control=False, risk_model=None, rng=None, path_writer=None
 ):
-    results = []
-    for _ in range(num_simulations):
-        # Simulate variations in key parameters
-        simulated_agents = int(np.random.normal(num_agents, num_agents * 0.1))
-        simulated_calls = np.random.normal(calls_per_day, calls_per_day * 0.2)
-        simulated_duration = np.random.normal(
-            mean_call_duration, mean_call_duration * 0.15
-        )
-        simulated_price = np.random.normal(
-            config["financial_metrics"]["price_per_call"],
-            config["financial_metrics"]["price_per_call"] * 0.05,
+    copula = (risk_model or {}).get("copula", "independent")
+    draws = standard_normal_draws(num_simulations, draws_per_path(len(RELATIVE_VOLATILITY), copula), sampler, rng)
+    profits, control = simulate_profit_paths(
+        config, num_agents, calls_per_day, mean_call_duration, draws, risk_model, path_writer
+    )
+    return (profits, control) if return_control else profits
+
+
+def control_variate_diagnostics(config, num_agents, calls_per_day, mean_call_duration, profits, control,
+                                risk_model=None):
+    diagnostics = {"mean_standard_error": profits.std(ddof=1) / np.sqrt(len(profits))}
+    control_mean = expected_control_profit(config, num_agents, calls_per_day, mean_call_duration, risk_model)
+    if control_mean is not None:
+        diagnostics["cv_mean"], diagnostics["cv_mean_standard_error"] = control_variate_mean(
+            profits, control, control_mean
         )
+    return diagnostics
 
-        # Calculate simulated revenue and costs
-        simulated_revenue = (
-            simulated_agents * simulated_calls * simulated_price * 30
-        )  # Monthly revenue
-
-        # Calculate total cost per minute
-        total_cost_per_minute = sum([
-            config["service_costs"]["text_generation"]["input"]["cost_per_1k_tokens"] *
-            config["service_costs"]["text_generation"]["input"]["tokens_per_minute"] / 1000,
-            config["service_costs"]["text_generation"]["output"]["cost_per_1k_tokens"] *
-            config["service_costs"]["text_generation"]["output"]["tokens_per_minute"] / 1000,
-            config["service_costs"]["audio_recognition"]["deepgram_nova2"]["cost_per_minute"],
-            config["service_costs"]["audio_generation"]["11labs_scale"]["cost_per_1k_chars"] *
-            config["service_costs"]["audio_generation"]["11labs_scale"]["chars_per_minute"] / 1000
-        ])
-
-        simulated_cost = (
-            simulated_agents
-            * simulated_calls
-            * simulated_duration
-            * total_cost_per_minute
-            * 30
-        )  # Monthly cost
-
-        simulated_profit = simulated_revenue - simulated_cost
-        results.append(simulated_profit)
-
-    return results
-
-
-def render_risk_assessment(config, num_agents, calls_per_day, mean_call_duration):
-    st.header("Risk Assessment")
 
-    # Monte Carlo Simulation
-    simulation_results = monte_carlo_simulation(
-        config, num_agents, calls_per_day, mean_call_duration
+def monte_carlo_inputs(config, num_agents, calls_per_day, mean_call_duration, settings=None, streams=None):
+    # The seed is part of the inputs, so sessions on the shared default seed share snapshots and others do not
+    return (
+        config["financial_metrics"]["price_per_call"], config["service_costs"],
+        num_agents, calls_per_day, mean_call_duration, settings,
+        streams.seed if streams is not None else None,
     )
 
+
+def monte_carlo_simulation_batched(
+    config, num_agents, calls_per_day, mean_call_duration, num_simulations=1000,
+    batch_size=250, sampler=DEFAULT_SAMPLER, risk_model=None, streams=None, path_writer=None, progress=None
+):
+    num_factors = draws_per_path(len(RELATIVE_VOLATILITY), (risk_model or {}).get("copula", "independent"))
+    if streams is not None:
+        # Common random numbers: moving a slider rescales this session's cached base draws
+        draws = streams.standard_normal("monte_carlo", num_simulations, num_factors, sampler)
+    else:
+        draws = standard_normal_draws(num_simulations, num_factors, sampler)
+
+    # Report partial results after every batch so the UI can show them while the job runs
+    batches, controls = [], []
+    for start in range(0, num_simulations, batch_size):
+        profits, control = simulate_profit_paths(
+            config, num_agents, calls_per_day, mean_call_duration, draws[start:start + batch_size], risk_model,
+            path_writer,
+        )
+        batches.append(profits)
+        controls.append(control)
+        if progress is not None:
+            progress.update((start + len(profits)) / num_simulations, np.concatenate(batches))
+
+    profits = np.concatenate(batches)
+    diagnostics = control_variate_diagnostics(
+        config, num_agents, calls_per_day, mean_call_duration, profits, np.concatenate(controls), risk_model
+    )
+    return profits, diagnostics
+
+
+def monte_carlo_statistics(profits, var_level=5):
+    value_at_risk = np.percentile(profits, var_level)
+    conditional_value_at_risk = profits[profits <= value_at_risk].mean()
+    return np.array([profits.mean(), value_at_risk, conditional_value_at_risk])
+
+
+def adaptive_monte_carlo_simulation(
+    config, num_agents, calls_per_day, mean_call_duration, relative_tolerance=0.01,
+    time_budget=10.0, batch_size=1024, min_batches=10, max_simulations=1_000_000,
+    var_level=5, sampler=DEFAULT_SAMPLER, risk_model=None, streams=None, path_writer=None, progress=None
+):
+    rng = streams.generator("monte_carlo_adaptive") if streams is not None else None
+    profits = np.empty(max_simulations)
+    control = np.empty(max_simulations)
+    batch_statistics = []
+    num_paths = 0
+    converged = False
+    start_time = time.perf_counter()
+
+    while num_paths < max_simulations:
+        size = min(batch_size, max_simulations - num_paths)
+        # Independently scrambled QMC batches keep batch means valid for error estimation
+        profits[num_paths:num_paths + size], control[num_paths:num_paths + size] = monte_carlo_simulation(
+            config, num_agents, calls_per_day, mean_call_duration, size,
+            sampler=sampler, return_control=True, risk_model=risk_model, rng=rng, path_writer=path_writer,
+        )
+        batch_statistics.append(monte_carlo_statistics(profits[num_paths:num_paths + size], var_level))
+        num_paths += size
+
+        # Batch means: the spread of per-batch estimates gives the standard error of the pooled ones
+        if len(batch_statistics) >= min_batches:
+            estimates = monte_carlo_statistics(profits[:num_paths], var_level)
+            standard_errors = np.std(batch_statistics, axis=0, ddof=1) / np.sqrt(len(batch_statistics))
+            if np.all(standard_errors <= relative_tolerance * np.abs(estimates)):
+                converged = True
+                break
+
+        elapsed = time.perf_counter() - start_time
+        if elapsed >= time_budget:
+            break
+        if progress is not None:
+            progress.update(min(max(num_paths / max_simulations, elapsed / time_budget), 1.0), profits[:num_paths])
+
+    profits = profits[:num_paths]
+    estimates = monte_carlo_statistics(profits, var_level)
+    if len(batch_statistics) > 1:
+        standard_errors = np.std(batch_statistics, axis=0, ddof=1) / np.sqrt(len(batch_statistics))
+    else:
+        standard_errors = np.full(3, np.nan)
+    relative_errors = standard_errors / np.abs(estimates)
+
+    diagnostics = {
+        "paths": num_paths,
+        "elapsed": time.perf_counter() - start_time,
+        "converged": converged,
+        "relative_tolerance": relative_tolerance,
+        "mean": estimates[0],
+        "var": estimates[1],
+        "cvar": estimates[2],
+        "mean_relative_error": relative_errors[0],
+        "var_relative_error": relative_errors[1],
+        "cvar_relative_error": relative_errors[2],
+        **control_variate_diagnostics(
+            config, num_agents, calls_per_day, mean_call_duration, profits, control[:num_paths], risk_model
+        ),
+    }
+    return profits, diagnostics
+
+
+def load_monte_carlo_results(config, num_agents, calls_per_day, mean_call_duration, settings=None, streams=None,
+                             progress=None):
+    settings = settings or {}
+    sampler = settings.get("sampler", DEFAULT_SAMPLER)
+    risk_model = settings.get("risk_model")
+
+    inputs = monte_carlo_inputs(config, num_agents, calls_per_day, mean_call_duration, settings, streams)
+    num_simulations = settings.get("max_simulations", 1_000_000) if settings.get("adaptive") \
+        else settings.get("num_simulations", 1000)
+
+    def compute():
+        path_writer = None
+        if settings.get("store_paths"):
+            paths_key = get_snapshot_store().make_key("monte_carlo_paths", *inputs)
+            path_writer = get_simulation_path_store().writer(paths_key, PATH_COLUMNS, num_simulations)
+        try:
+            if settings.get("adaptive"):
+                profits, diagnostics = adaptive_monte_carlo_simulation(
+                    config, num_agents, calls_per_day, mean_call_duration,
+                    relative_tolerance=settings["relative_tolerance"], time_budget=settings["time_budget"],
+                    max_simulations=num_simulations, sampler=sampler, risk_model=risk_model, streams=streams,
+                    path_writer=path_writer, progress=progress,
+                )
+            else:
+                profits, diagnostics = monte_carlo_simulation_batched(
+                    config, num_agents, calls_per_day, mean_call_duration, num_simulations=num_simulations,
+                    sampler=sampler, risk_model=risk_model, streams=streams, path_writer=path_writer,
+                    progress=progress,
+                )
+        except BaseException:
+            if path_writer is not None:
+                path_writer.discard()
+            raise
+        if path_writer is not None:
+            path_writer.close()
+            diagnostics["paths_key"] = paths_key
+        return {"profits": profits, **diagnostics}
+
+    # Reused from the snapshot store for previously seen inputs
+    data = get_snapshot_store().get_or_compute("monte_carlo", inputs, compute,
+                                               shared=streams is None or streams.shared)
+    profits = data.pop("profits")
+    diagnostics = {key: np.asarray(value).item() for key, value in data.items()}
+    return profits, diagnostics
+
+
+def build_monte_carlo_figure(simulation_results):
     fig_monte_carlo = px.histogram(
         simulation_results, nbins=50, title="Monte Carlo Simulation of Monthly Profit"
     )
@@ -69,14 +282,149 @@ def render_risk_assessment(config, num_agents, calls_per_day, mean_call_duration
         line_color="red",
         annotation_text="Mean",
     )
+    return fig_monte_carlo
+
+
+def render_monte_carlo_results(config, num_agents, calls_per_day, mean_call_duration, simulation_results,
+                               diagnostics=None, settings=None, streams=None):
+    fig_monte_carlo = get_snapshot_store().get_or_compute(
+        "monte_carlo_figure",
+        monte_carlo_inputs(config, num_agents, calls_per_day, mean_call_duration, settings, streams),
+        lambda: build_monte_carlo_figure(simulation_results),
+        kind="figure",
+        shared=streams is None or streams.shared,
+    )
     st.plotly_chart(fig_monte_carlo)
 
     st.write(f"Expected Monthly Profit: ${np.mean(simulation_results):,.2f}")
     st.write(f"Profit Variability (Std Dev): ${np.std(simulation_results):,.2f}")
     st.write(f"5% Value at Risk: ${np.percentile(simulation_results, 5):,.2f}")
+    register_monte_carlo_exports(simulation_results, diagnostics)
+
+    if diagnostics is not None and "cv_mean" in diagnostics:
+        st.write(
+            f"Control-Variate Expected Monthly Profit: ${diagnostics['cv_mean']:,.2f} "
+            f"(std. error ${diagnostics['cv_mean_standard_error']:,.2f} vs "
+            f"${diagnostics['mean_standard_error']:,.2f} for the plain mean)"
+        )
+
+    # Achieved precision of the adaptive run
+    if diagnostics is not None and "converged" in diagnostics:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Paths Used", f"{diagnostics['paths']:,}")
+        col2.metric("Mean Rel. Std Error", f"{diagnostics['mean_relative_error']:.2%}")
+        col3.metric("VaR Rel. Std Error", f"{diagnostics['var_relative_error']:.2%}")
+        col4.metric("CVaR Rel. Std Error", f"{diagnostics['cvar_relative_error']:.2%}")
+        st.write(
+            f"5% Conditional Value at Risk: ${diagnostics['cvar']:,.2f}. "
+            + (f"Converged to the {diagnostics['relative_tolerance']:.2%} target"
+               if diagnostics["converged"] else "Stopped before reaching the precision target")
+            + f" after {diagnostics['elapsed']:.2f}s."
+        )
+
+    if diagnostics is not None and "paths_key" in diagnostics:
+        render_path_drilldown(diagnostics["paths_key"], np.percentile(simulation_results, 5))
+
+
+def register_monte_carlo_exports(simulation_results, diagnostics=None):
+    summary = {
+        "Expected Monthly Profit": np.mean(simulation_results),
+        "Profit Std Dev": np.std(simulation_results),
+        "5% Value at Risk": np.percentile(simulation_results, 5),
+        "5% Conditional Value at Risk": monte_carlo_statistics(simulation_results)[2],
+        "Paths": len(simulation_results),
+    }
+    summary.update({
+        key: value for key, value in (diagnostics or {}).items() if isinstance(value, (int, float))
+    })
+    register_export_frame("Monte Carlo Summary", pd.DataFrame({"Statistic": summary.keys(), "Value": summary.values()}))
+
+    # Stored runs are exported straight from the mapped files, one chunk at a time
+    paths = get_simulation_path_store().open(diagnostics["paths_key"]) if diagnostics and "paths_key" in diagnostics \
+        else None
+    if paths is not None:
+        register_export_frame("Monte Carlo Paths", lambda: (pd.DataFrame(chunk) for chunk in paths.chunks()))
+    else:
+        register_export_frame("Monte Carlo Paths", pd.DataFrame({"profit": simulation_results}))
+
+
+def render_path_drilldown(paths_key, value_at_risk):
+    st.subheader("Path Drill-down")
+    paths = get_simulation_path_store().open(paths_key)
+    if paths is None:
+        st.info("The per-path results of this run are no longer stored; rerun the simulation to drill down.")
+        return
+
+    conditions = {
+        "Profit below 5% VaR": lambda chunk: chunk["profit"] < value_at_risk,
+        "Loss-making paths": lambda chunk: chunk["profit"] < 0,
+        "Profit above 5% VaR": lambda chunk: chunk["profit"] >= value_at_risk,
+    }
+    condition = st.selectbox("Scenario", list(conditions), key="path_drilldown_condition")
+    predicate = conditions[condition]
+    matched = paths.count_where(predicate)
+    st.write(f"{matched:,} of {len(paths):,} paths ({matched / len(paths):.2%}) match.")
+    if matched == 0:
+        return
+
+    labels = dict(zip(PATH_COLUMNS, RISK_FACTORS + ["Monthly Profit"]))
+    st.dataframe(pd.DataFrame({
+        "All Paths": paths.column_means(),
+        condition: paths.column_means(predicate),
+    }).rename(index=labels))
+
+    column = st.selectbox(
+        "Distribution of", PATH_COLUMNS, format_func=labels.get, index=2, key="path_drilldown_column"
+    )
+    counts_all, edges = paths.histogram(column)
+    counts_matched, _ = paths.histogram(column, predicate=predicate)
+    centers = (edges[:-1] + edges[1:]) / 2
+    fig_drilldown = go.Figure([
+        go.Bar(x=centers, y=counts_all / counts_all.sum(), name="All Paths"),
+        go.Bar(x=centers, y=counts_matched / counts_matched.sum(), name=condition),
+    ])
+    fig_drilldown.update_layout(
+        title=f"{labels[column]} in {condition}", xaxis_title=labels[column], yaxis_title="Share of Paths",
+        barmode="overlay", bargap=0,
+    )
+    fig_drilldown.update_traces(opacity=0.6)
+    st.plotly_chart(fig_drilldown)
+
+
+def render_partial_monte_carlo_results(partial_results):
+    st.plotly_chart(build_monte_carlo_figure(partial_results))
+    st.write(f"Partial estimate from {len(partial_results):,} paths: "
+             f"Expected Monthly Profit ${np.mean(partial_results):,.2f}")
+
+
+def render_risk_assessment(config, num_agents, calls_per_day, mean_call_duration, simulation_results=None,
+                           simulation_job=None, settings=None):
+    st.header("Risk Assessment")
+
+    # Monte Carlo Simulation, either finished or still running in the background
+    if simulation_job is not None:
+        render_job_result(
+            simulation_job,
+            lambda results: render_monte_carlo_results(
+                config, num_agents, calls_per_day, mean_call_duration, *results, settings=settings,
+                streams=get_random_streams(),
+            ),
+            placeholder="Running Monte Carlo simulation...",
+            render_partial=render_partial_monte_carlo_results,
+        )
+    else:
+        diagnostics = None
+        if simulation_results is None:
+            simulation_results, diagnostics = load_monte_carlo_results(
+                config, num_agents, calls_per_day, mean_call_duration, settings, streams=get_random_streams()
+            )
+        render_monte_carlo_results(
+            config, num_agents, calls_per_day, mean_call_duration, simulation_results, diagnostics, settings,
+            streams=get_random_streams(),
+        )
 
     # Sensitivity Analysis
-    variables = ["Number of Agents", "Calls per Day", "Call Duration", "Price per Call"]
+    variables = RISK_FACTORS
     impacts = [0.2, 0.3, 0.25, 0.15]  # Hypothetical impact values
 
     fig_tornado = go.Figure(
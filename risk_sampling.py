@@ -0,0 +1,115 @@
+import functools
+import warnings
+
+import numpy as np
+from scipy.stats import chi2, norm, qmc, t
+
+SAMPLING_METHODS = ["pseudo-random", "antithetic", "latin-hypercube", "sobol"]
+# Cuts the variance of the 5% VaR about 9x at 4096 paths (benchmarks/variance_reduction.py)
+DEFAULT_SAMPLER = "sobol"
+COPULAS = ["independent", "gaussian", "t"]
+MARGINALS = ["normal", "lognormal", "empirical"]
+
+
+def standard_normal_draws(num_simulations, num_factors, method="pseudo-random", rng=None):
+    if method == "pseudo-random":
+        if rng is None:
+            return np.random.standard_normal((num_simulations, num_factors))
+        return rng.standard_normal((num_simulations, num_factors))
+
+    if method == "antithetic":
+        # Each draw is paired with its mirror image, so odd moments cancel exactly
+        half = (num_simulations + 1) // 2
+        if rng is None:
+            draws = np.random.standard_normal((half, num_factors))
+        else:
+            draws = rng.standard_normal((half, num_factors))
+        return np.vstack([draws, -draws])[:num_simulations]
+
+    if method == "latin-hypercube":
+        uniforms = qmc.LatinHypercube(d=num_factors, seed=rng).random(num_simulations)
+    elif method == "sobol":
+        with warnings.catch_warnings():
+            # Balance properties are best at powers of two, but any size is still a valid sample
+            warnings.simplefilter("ignore", UserWarning)
+            uniforms = qmc.Sobol(d=num_factors, scramble=True, seed=rng).random(num_simulations)
+    else:
+        raise ValueError(f"Unknown sampling method: {method}")
+
+    eps = np.finfo(float).eps
+    return norm.ppf(np.clip(uniforms, eps, 1 - eps))
+
+
+def control_variate_mean(values, control, control_mean):
+    # Regression-adjusted mean using a control whose expectation is known analytically
+    control_variance = np.var(control, ddof=1)
+    if control_variance == 0:
+        return values.mean(), values.std(ddof=1) / np.sqrt(len(values))
+    beta = np.cov(values, control)[0, 1] / control_variance
+    adjusted = values - beta * (control - control_mean)
+    return adjusted.mean(), adjusted.std(ddof=1) / np.sqrt(len(values))
+
+
+@functools.lru_cache(maxsize=32)
+def _cholesky_factor(correlation_key):
+    return np.linalg.cholesky(np.array(correlation_key))
+
+
+def cholesky_factor(correlation):
+    correlation = np.asarray(correlation, dtype=float)
+    if not np.allclose(correlation, correlation.T) or not np.allclose(np.diag(correlation), 1):
+        raise ValueError("Correlation matrix must be symmetric with a unit diagonal.")
+    try:
+        return _cholesky_factor(tuple(map(tuple, correlation)))
+    except np.linalg.LinAlgError:
+        raise ValueError("Correlation matrix must be positive definite.") from None
+
+
+def draws_per_path(num_factors, copula="independent"):
+    # The t copula takes its chi-square mixing variable from one extra column of draws
+    return num_factors + 1 if copula == "t" else num_factors
+
+
+def _apply_marginal(marginal, mean, std, z=None, u=None):
+    distribution = marginal.get("distribution", "normal")
+    if distribution == "empirical":
+        samples = np.sort(np.asarray(marginal["samples"], dtype=float))
+        positions = (np.arange(len(samples)) + 0.5) / len(samples)
+        return np.interp(u if u is not None else norm.cdf(z), positions, samples)
+
+    if z is None:
+        z = norm.ppf(u)
+    if distribution == "normal":
+        return mean + std * z
+    if distribution == "lognormal":
+        # Parameterized by the mean and standard deviation of the variable itself
+        sigma2 = np.log1p((std / mean) ** 2)
+        return np.exp(np.log(mean) - sigma2 / 2 + np.sqrt(sigma2) * z)
+    raise ValueError(f"Unknown marginal distribution: {distribution}")
+
+
+def sample_risk_factors(draws, means, stds, correlation=None, copula="independent", marginals=None,
+                        degrees_of_freedom=4):
+    means = np.asarray(means, dtype=float)
+    stds = np.asarray(stds, dtype=float)
+    num_factors = len(means)
+    marginals = marginals or [{}] * num_factors
+
+    z = draws[:, :num_factors]
+    if copula != "independent":
+        z = z @ cholesky_factor(correlation).T
+
+    if copula == "t":
+        # Scale by a shared chi-square variable, then map through the t CDF to get copula uniforms
+        mixing = chi2.ppf(norm.cdf(draws[:, num_factors]), degrees_of_freedom) / degrees_of_freedom
+        eps = np.finfo(float).eps
+        u = np.clip(t.cdf(z / np.sqrt(mixing)[:, None], degrees_of_freedom), eps, 1 - eps)
+        columns = [
+            _apply_marginal(marginals[i], means[i], stds[i], u=u[:, i]) for i in range(num_factors)
+        ]
+    else:
+        # Gaussian dependence keeps the normal scores, so normal and lognormal marginals skip the CDF round trip
+        columns = [
+            _apply_marginal(marginals[i], means[i], stds[i], z=z[:, i]) for i in range(num_factors)
+        ]
+    return np.column_stack(columns)
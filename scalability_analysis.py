@@ -1,8 +1,21 @@
+import os
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
+from break_even import (
+    DAYS_PER_MONTH, cost_structure, minimum_price, monthly_cost, pricing_tiers, solve_volume, tiered_revenue
+)
+from capacity_planner import plan_capacity
+from concurrency import measured_concurrency, scale_concurrency
+from data_export import register_export_frame
+from financial_overview import calculate_costs as calculate_service_costs
+from latency_telemetry import log_paths
+from result_tables import COUNT, CURRENCY, CURRENCY_PRECISE, NUMBER, PERCENT, render_table
+
+SCALE_FACTORS = (0.5, 1, 2, 5, 10)
 
 
 def calculate_costs(config, num_agents, calls_per_day, mean_call_duration, selected_services):
@@ -42,38 +55,79 @@ def calculate_costs(config, num_agents, calls_per_day, mean_call_duration, selec
 
 
 def calculate_revenue(config, num_agents, calls_per_day):
-    DAYS_PER_MONTH = 30
-    daily_revenue = (
-            num_agents * calls_per_day * config["financial_metrics"]["price_per_call"]
+    monthly_calls = np.asarray(num_agents) * calls_per_day * DAYS_PER_MONTH
+    return tiered_revenue(monthly_calls, config["financial_metrics"]["price_per_call"], pricing_tiers(config))
+
+
+def calculate_scale_data(config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute,
+                         scale_factors=SCALE_FACTORS):
+    # Every scale is solved at once; costs include the fixed and step costs of the configured cost structure
+    scaled_agents = (num_agents * np.asarray(scale_factors)).astype(int)
+    monthly_calls = scaled_agents * calls_per_day * DAYS_PER_MONTH
+    variable_cost_per_call = mean_call_duration * total_cost_per_minute
+    structure = cost_structure(config, scaled_agents, mean_call_duration)
+    price_per_call = config["financial_metrics"]["price_per_call"]
+    target_margin = config["financial_metrics"]["target_margin"]
+    tiers = pricing_tiers(config)
+
+    scaled_revenue = calculate_revenue(config, scaled_agents, calls_per_day)
+    scaled_costs = monthly_cost(monthly_calls, variable_cost_per_call, **structure)
+    scaled_profit = scaled_revenue - scaled_costs
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit_margin = np.where(scaled_revenue > 0, scaled_profit / scaled_revenue * 100, 0)
+
+    return pd.DataFrame(
+        {
+            "Scale": [f"{agents} Agents" for agents in scaled_agents],
+            "Monthly Calls": monthly_calls,
+            "Monthly Revenue": scaled_revenue,
+            "Monthly Cost": scaled_costs,
+            "Monthly Profit": scaled_profit,
+            "Profit Margin": profit_margin,
+            "Break-even Calls": solve_volume(price_per_call, variable_cost_per_call, tiers=tiers, **structure),
+            "Target-margin Calls": solve_volume(
+                price_per_call, variable_cost_per_call, tiers=tiers, target_margin=target_margin, **structure
+            ),
+            "Minimum Price per Call": minimum_price(
+                monthly_calls, price_per_call, variable_cost_per_call, tiers=tiers, target_margin=target_margin,
+                **structure
+            ),
+        }
     )
-    monthly_revenue = daily_revenue * DAYS_PER_MONTH
-    return monthly_revenue
 
 
-def render_scalability_analysis(config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute):
+@st.cache_data(show_spinner="Reading call records...")
+def _measured_concurrency_cached(paths, paths_state):
+    return measured_concurrency(paths)
+
+
+def load_measured_concurrency():
+    # Sizes and modification times invalidate the cached sweep when the logs change
+    paths = tuple(log_paths())
+    paths_state = tuple((os.path.getsize(path), os.path.getmtime(path)) for path in paths)
+    return _measured_concurrency_cached(paths, paths_state)
+
+
+def render_scalability_analysis(config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute,
+                                df_scale=None, concurrency=None):
     st.header("Scalability Analysis")
 
-    scale_factors = [0.5, 1, 2, 5, 10]
-    scale_data = []
-    for factor in scale_factors:
-        scaled_agents = int(num_agents * factor)
-        scaled_costs = scaled_agents * calls_per_day * mean_call_duration * total_cost_per_minute * 30  # Monthly cost
-        scaled_revenue = calculate_revenue(config, scaled_agents, calls_per_day)
-        scaled_profit = scaled_revenue - scaled_costs
-        scale_data.append(
-            {
-                "Scale": f"{scaled_agents} Agents",
-                "Monthly Revenue": scaled_revenue,
-                "Monthly Cost": scaled_costs,
-                "Monthly Profit": scaled_profit,
-                "Profit Margin": (
-                    (scaled_profit / scaled_revenue) * 100 if scaled_revenue > 0 else 0
-                ),
-            }
+    if df_scale is None:
+        df_scale = calculate_scale_data(
+            config, num_agents, calls_per_day, mean_call_duration, total_cost_per_minute
         )
-
-    df_scale = pd.DataFrame(scale_data)
-    st.dataframe(df_scale)
+    else:
+        df_scale = df_scale.copy()  # Derived columns are added below; keep the cached table intact
+    render_table(df_scale, {
+        "Monthly Calls": COUNT,
+        "Monthly Revenue": CURRENCY,
+        "Monthly Cost": CURRENCY,
+        "Monthly Profit": CURRENCY,
+        "Profit Margin": PERCENT,
+        "Break-even Calls": COUNT,
+        "Target-margin Calls": COUNT,
+        "Minimum Price per Call": CURRENCY,
+    })
 
     fig_scale = px.bar(
         df_scale,
@@ -106,18 +160,121 @@ def render_scalability_analysis(config, num_agents, calls_per_day, mean_call_dur
     st.plotly_chart(fig_efficiency)
 
     # Break-even analysis
-    fixed_costs = 100000  # Assume some fixed costs
-    variable_costs = df_scale["Monthly Cost"] / (df_scale["Scale"].str.split().str[0].astype(int) * calls_per_day * 30)
-    price_per_call = config["financial_metrics"]["price_per_call"]
-    break_even_calls = fixed_costs / (price_per_call - variable_costs)
-
     fig_break_even = px.line(
         df_scale,
         x="Scale",
-        y=break_even_calls,
-        title="Break-even Number of Calls at Different Scales",
+        y=["Monthly Calls", "Break-even Calls", "Target-margin Calls"],
+        title="Break-even and Target-margin Calls per Month at Different Scales",
     )
     st.plotly_chart(fig_break_even)
+    register_export_frame("Scale Analysis", df_scale)
+
+    # Break-even utilisation over a grid of scales and prices, solved for every point at once
+    price_per_call = config["financial_metrics"]["price_per_call"]
+    prices = price_per_call * np.linspace(0.5, 2.0, 16)
+    scaled_agents = (df_scale["Monthly Calls"] / (calls_per_day * DAYS_PER_MONTH)).to_numpy()
+    break_even_grid = solve_volume(
+        prices[None, :],
+        mean_call_duration * total_cost_per_minute,
+        tiers=[(threshold, price * prices[None, :] / price_per_call) for threshold, price in pricing_tiers(config)],
+        **cost_structure(config, scaled_agents[:, None], mean_call_duration),
+    )
+    fig_break_even_grid = px.imshow(
+        break_even_grid / df_scale["Monthly Calls"].to_numpy()[:, None] * 100,
+        x=[f"${price:.2f}" for price in prices],
+        y=df_scale["Scale"],
+        labels={"x": "Price per Call", "y": "Scale", "color": "Utilisation (%)"},
+        color_continuous_scale="RdYlGn_r",
+        zmin=0,
+        zmax=150,
+        aspect="auto",
+        title="Capacity Utilisation Needed to Break Even",
+    )
+    st.plotly_chart(fig_break_even_grid)
+
+    # Peak concurrency from simulated call start/end times, and from logged calls where there are any
+    st.subheader("Peak Concurrency")
+    if concurrency is None:
+        concurrency = scale_concurrency(num_agents, calls_per_day, mean_call_duration, SCALE_FACTORS)
+    df_concurrency, minute_peaks = concurrency
+    measured = load_measured_concurrency()
+    if measured is not None:
+        df_concurrency = pd.concat([df_concurrency, pd.DataFrame([measured])], ignore_index=True)
+    register_export_frame("Peak Concurrency", df_concurrency)
+    render_table(df_concurrency, {
+        "Calls per Day": COUNT,
+        "Mean Concurrent Calls": NUMBER,
+        "p50 Minute Peak": NUMBER,
+        "p95 Minute Peak": NUMBER,
+        "p99 Minute Peak": NUMBER,
+        "Peak Concurrent Calls": NUMBER,
+        "Peak-to-Average": NUMBER,
+        "Simulated Share (%)": PERCENT,
+    })
+    simulated_ratio = df_concurrency.loc[df_concurrency["Scale"] == f"{num_agents} Agents", "Peak-to-Average"]
+    st.write(
+        f"Step costs assume a peak-to-average ratio of {config['cost_structure']['peak_to_average']:.1f}; "
+        f"the simulated week at the current scale peaks at {simulated_ratio.iloc[0]:.1f}× its mean concurrency."
+    )
+    df_minute_peaks = pd.DataFrame({
+        "Hour": np.arange(len(minute_peaks)) / 60,
+        "Concurrent Calls": minute_peaks,
+    })
+    fig_concurrency = px.line(
+        df_minute_peaks, x="Hour", y="Concurrent Calls",
+        title=f"Per-minute Peak Concurrent Calls over a Simulated Week ({num_agents} Agents)",
+    )
+    st.plotly_chart(fig_concurrency)
+
+    # Media servers, agent workers and egress for the simulated peaks at every scale
+    st.subheader("Infrastructure Capacity")
+    df_capacity = None
+    simulated = concurrency[0]
+    if not config["infrastructure"]["instance_types"]:
+        st.warning("Add at least one instance type in the Infrastructure settings to plan capacity.")
+    else:
+        try:
+            df_capacity = plan_capacity(config, simulated["Peak Concurrent Calls"],
+                                        simulated["Mean Concurrent Calls"])
+        except ValueError as e:
+            st.warning(f"{e} Add a larger instance type or raise the target utilisation in the Infrastructure "
+                       "settings.")
+    if df_capacity is not None:
+        df_capacity.insert(0, "Scale", simulated["Scale"])
+        df_capacity["Infrastructure Cost per Call"] = (df_capacity["Infrastructure Cost"]
+                                                       / df_scale["Monthly Calls"].to_numpy())
+        register_export_frame("Infrastructure Capacity", df_capacity)
+        render_table(df_capacity, {
+            "Agent Workers vCPUs": COUNT,
+            "Agent Workers Memory (GB)": NUMBER,
+            "Media Servers vCPUs": COUNT,
+            "Media Servers Memory (GB)": NUMBER,
+            "Egress (GB per Month)": NUMBER,
+            "Compute Cost": CURRENCY,
+            "Egress Cost": CURRENCY,
+            "Infrastructure Cost": CURRENCY,
+            "Infrastructure Cost per Call": CURRENCY_PRECISE,
+        })
+        st.write(
+            f"Fleets are sized for the simulated peak at {config['infrastructure']['target_utilisation']:.0%} "
+            "utilisation and run all month. Monthly Cost above counts servers only through the Cost Structure "
+            "step costs."
+        )
+
+        # AI services scale with call minutes; infrastructure with the concurrency peaks
+        service_costs = calculate_service_costs(config, 1, calls_per_day, mean_call_duration, total_cost_per_minute)
+        scaled_agents = (df_scale["Monthly Calls"] / (calls_per_day * DAYS_PER_MONTH)).to_numpy()
+        df_components = pd.DataFrame({
+            "Scale": df_scale["Scale"],
+            **{service: cost * scaled_agents
+               for service, cost in zip(service_costs["Service"], service_costs["Monthly Cost ($)"])},
+            "Infrastructure": df_capacity["Infrastructure Cost"],
+        }).melt(id_vars="Scale", var_name="Component", value_name="Monthly Cost")
+        fig_components = px.bar(
+            df_components, x="Scale", y="Monthly Cost", color="Component",
+            title="Monthly Cost by Component at Different Scales",
+        )
+        st.plotly_chart(fig_components)
 
     # Key Insights
     st.subheader("Key Insights")
@@ -129,8 +286,9 @@ def render_scalability_analysis(config, num_agents, calls_per_day, mean_call_dur
     st.write(
         f"3. The operational efficiency {'improves' if df_scale['Efficiency Score'].iloc[-1] > df_scale['Efficiency Score'].iloc[0] else 'declines'} as we scale up, suggesting {'positive' if df_scale['Efficiency Score'].iloc[-1] > df_scale['Efficiency Score'].iloc[0] else 'negative'} returns to scale."
     )
+    break_even_share = df_scale["Break-even Calls"] / df_scale["Monthly Calls"]
     st.write(
-        f"4. The break-even number of calls {'decreases' if break_even_calls.iloc[-1] < break_even_calls.iloc[0] else 'increases'} with scale, indicating {'improved' if break_even_calls.iloc[-1] < break_even_calls.iloc[0] else 'reduced'} financial resilience at larger scales."
+        f"4. The break-even share of call capacity {'decreases' if break_even_share.iloc[-1] < break_even_share.iloc[0] else 'increases'} with scale, indicating {'improved' if break_even_share.iloc[-1] < break_even_share.iloc[0] else 'reduced'} financial resilience at larger scales."
     )
     st.write(
         "5. Consider the trade-offs between profitability, efficiency, and risk when deciding on the optimal scale for operations."
@@ -1,6 +1,13 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
+from data_export import register_export_frame
+from figure_cache import cached_figure
+from latency_telemetry import LATENCY_WINDOWS, measured_histograms
+from pipeline_latency import BIN_MS, pipeline_latency
+from result_tables import NUMBER, render_table
+from shared_config import set_config_value
 
 
 def initialize_config_state(config):
@@ -17,12 +24,8 @@ def initialize_config_state(config):
 
 
 def update_config(key, value):
-    st.session_state.config = st.session_state.config.copy()
-    keys = key.split('.')
-    d = st.session_state.config
-    for k in keys[:-1]:
-        d = d.setdefault(k, {})
-    d[keys[-1]] = value
+    # Only the override is stored in the session; the config view reads through to the shared defaults
+    set_config_value(key, value)
 
 
 def render_service_configuration(config):
@@ -104,11 +107,12 @@ def render_service_configuration(config):
     else:
         whisper_cost = st.number_input(
             "Whisper Cost per Minute ($)",
-            value=st.session_state.config['service_costs']['audio_recognition'].get('whisper', 0.006),
+            value=st.session_state.config['service_costs']['audio_recognition'].get('whisper', {}).get(
+                'cost_per_minute', 0.006),
             format="%.4f",
             key="whisper_cost"
         )
-        update_config('service_costs.audio_recognition.whisper', whisper_cost)
+        update_config('service_costs.audio_recognition.whisper.cost_per_minute', whisper_cost)
 
     # TTS Selection
     st.write("Text-to-Speech (TTS)")
@@ -134,11 +138,12 @@ def render_service_configuration(config):
     else:
         deepgram_tts_cost = st.number_input(
             "Deepgram TTS Cost per 1K Characters ($)",
-            value=st.session_state.config['service_costs']['audio_generation'].get('deepgram_tts', 0.15),
+            value=st.session_state.config['service_costs']['audio_generation'].get('deepgram_tts', {}).get(
+                'cost_per_1k_chars', 0.15),
             format="%.4f",
             key="deepgram_tts_cost"
         )
-        update_config('service_costs.audio_generation.deepgram_tts', deepgram_tts_cost)
+        update_config('service_costs.audio_generation.deepgram_tts.cost_per_1k_chars', deepgram_tts_cost)
 
     # Cost Comparison
     st.subheader("Cost Comparison")
@@ -162,6 +167,7 @@ def render_service_configuration(config):
 
     # Create DataFrame for comparison
     df_costs = pd.DataFrame(list(costs.items()), columns=['Service', 'Cost per Minute ($)'])
+    register_export_frame("Configured Service Costs", df_costs)
 
     # Bar chart for cost comparison
     fig = px.bar(df_costs, x='Service', y='Cost per Minute ($)', title='Service Cost Comparison (per Minute)')
@@ -196,4 +202,37 @@ def render_service_configuration(config):
     st.write(f"Positive values indicate potential savings compared to {baseline_service}.")
     st.write(f"Negative values indicate {baseline_service} is cheaper.")
 
+    # End-to-end turn latency of every provider stack
+    st.subheader("Turn Latency by Stack")
+    window = st.session_state.get("latency_window", list(LATENCY_WINDOWS)[1])
+    df_stacks, turn_pmfs, df_stages = pipeline_latency(measured_histograms(window))
+    df_stacks.insert(0, "Selected", (
+        (df_stacks["STT"] == stt_option) & (df_stacks["LLM"] == llm_option) & (df_stacks["TTS"] == tts_option)
+    ))
+    register_export_frame("Turn Latency by Stack", df_stacks)
+    render_table(df_stacks, {"p50 (ms)": NUMBER, "p95 (ms)": NUMBER, "p99 (ms)": NUMBER})
+    selected = df_stacks[df_stacks["Selected"]]
+    if not selected.empty:
+        st.metric("Selected Stack p95 Turn Latency", f"{selected['p95 (ms)'].iloc[0]:,.0f} ms")
+
+    # Cumulative distributions, cut a little past the slowest stack's p99
+    cutoff = int(df_stacks["p99 (ms)"].max() * 1.2 / BIN_MS)
+    cdfs = turn_pmfs.reshape(len(df_stacks), -1)[:, :cutoff].cumsum(axis=1)
+    df_cdf = pd.DataFrame({
+        "Turn Latency (ms)": np.tile((np.arange(cutoff) + 1.5) * BIN_MS, len(df_stacks)),
+        "Share of Turns": cdfs.ravel(),
+        "Stack": np.repeat((df_stacks["STT"] + " / " + df_stacks["LLM"] + " / " + df_stacks["TTS"]).to_numpy(), cutoff),
+    })
+    st.plotly_chart(cached_figure(
+        "turn_latency_cdf",
+        lambda: px.line(df_cdf, x="Turn Latency (ms)", y="Share of Turns", color="Stack",
+                        title="Turn Latency Distribution by Stack (STT / LLM / TTS)"),
+        df_cdf,
+    ))
+
+    with st.expander("Stage Latency Sources"):
+        st.write(f"Stages with LiveKit telemetry in the {window.lower()} use the measured distribution; "
+                 "the others use assumed lognormal latencies.")
+        render_table(df_stages)
+
     return st.session_state.config
\ No newline at end of file
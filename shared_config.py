@@ -0,0 +1,187 @@
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+class FrozenDict(dict):
+    # Shared across sessions, so any attempt to modify it in place is a bug
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Shared defaults are read-only; use set_config_value to override them for a session.")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __deepcopy__(self, memo):
+        return _thaw(self)
+
+    def __reduce__(self):
+        return dict, (_thaw(self),)
+
+
+def freeze(value):
+    if isinstance(value, Mapping):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class LayeredConfig(Mapping):
+    # Read view of the shared defaults with a session's sparse overrides on top; nothing is copied
+    def __init__(self, base, overrides):
+        self.base = base
+        self.overrides = overrides
+
+    def __getitem__(self, key):
+        if key in self.overrides:
+            value = self.overrides[key]
+            base = self.base.get(key)
+            if isinstance(value, dict) and isinstance(base, Mapping):
+                return LayeredConfig(base, value)
+            return value
+        return self.base[key]
+
+    def __iter__(self):
+        yield from self.base
+        yield from (key for key in self.overrides if key not in self.base)
+
+    def __len__(self):
+        return len(self.base) + sum(1 for key in self.overrides if key not in self.base)
+
+    def to_dict(self):
+        return _thaw(self)
+
+    def __deepcopy__(self, memo):
+        return self.to_dict()
+
+    def __reduce__(self):
+        return dict, (self.to_dict(),)
+
+
+def build_default_config():
+    return {
+        "service_costs": {
+            "text_generation": {
+                "input": {"cost_per_1k_tokens": 0.005, "tokens_per_minute": 0.5},
+                "output": {"cost_per_1k_tokens": 0.015, "tokens_per_minute": 0.5},
+            },
+            "audio_recognition": {
+                "deepgram_nova2": {"cost_per_minute": 0.0036},
+            },
+            "audio_generation": {
+                "11labs_scale": {"cost_per_1k_chars": 0.18, "chars_per_minute": 150},
+            },
+        },
+        "operational_metrics": {
+            "avg_handling_time": 5.0,
+            "first_call_resolution": 0.85,
+            "customer_satisfaction": 4.5,
+        },
+        "financial_metrics": {"price_per_call": 1.0, "expected_growth_rate": 0.1, "target_margin": 0.2},
+        "cost_structure": {
+            "fixed_costs_per_month": 100000.0,
+            "fixed_costs_per_agent": 0.0,
+            "concurrent_calls_per_step": 50,
+            "cost_per_step": 0.0,
+            "peak_to_average": 3.0,
+        },
+        "pricing_tiers": [],
+        "infrastructure": {
+            # Resources one concurrent session holds on each tier
+            "session_profiles": {
+                "agent_worker": {"cpu_cores": 0.25, "memory_gb": 0.4},
+                "media_server": {"cpu_cores": 0.02, "memory_gb": 0.02},
+            },
+            "instance_types": [
+                {"name": "c7i.large", "cpu_cores": 2, "memory_gb": 4, "hourly_cost": 0.089},
+                {"name": "c7i.xlarge", "cpu_cores": 4, "memory_gb": 8, "hourly_cost": 0.179},
+                {"name": "c7i.4xlarge", "cpu_cores": 16, "memory_gb": 32, "hourly_cost": 0.714},
+                {"name": "m7i.2xlarge", "cpu_cores": 8, "memory_gb": 32, "hourly_cost": 0.403},
+            ],
+            "target_utilisation": 0.7,
+            "egress_kbps_per_session": 64,
+            "egress_cost_per_gb": 0.09,
+        },
+        "market_data": {
+            "our_market_share": 15,
+            "our_customer_satisfaction": 4.5,
+            "competitors": [
+                {
+                    "name": "Competitor A",
+                    "market_share": 30,
+                    "customer_satisfaction": 4.2,
+                    "price_per_call": 1.2,
+                },
+                {
+                    "name": "Competitor B",
+                    "market_share": 25,
+                    "customer_satisfaction": 4.0,
+                    "price_per_call": 0.9,
+                },
+                {
+                    "name": "Competitor C",
+                    "market_share": 30,
+                    "customer_satisfaction": 4.3,
+                    "price_per_call": 1.1,
+                },
+            ],
+            "historical_data": {
+                "dates": [
+                    (datetime.now() - timedelta(days=30 * i)).strftime("%Y-%m-%d")
+                    for i in range(12, 0, -1)
+                ],
+                "our_market_share": [12, 12.5, 13, 13.5, 14, 14.2, 14.5, 14.7, 14.8, 14.9, 15, 15],
+                "industry_growth": [5, 5.2, 5.4, 5.6, 5.8, 6, 6.2, 6.4, 6.6, 6.8, 7, 7.2],
+            },
+        },
+    }
+
+
+@st.cache_resource(ttl=24 * 3600)
+def get_default_config():
+    # Built once per process (and daily, so the historical dates move along) and shared by every session
+    return freeze(build_default_config())
+
+
+def get_session_config():
+    if "config_overrides" not in st.session_state:
+        st.session_state.config_overrides = {}
+    return LayeredConfig(get_default_config(), st.session_state.config_overrides)
+
+
+def set_config_value(keys, value):
+    # Copy-on-write: a session only stores the leaves that differ from the shared defaults
+    keys = keys.split(".") if isinstance(keys, str) else list(keys)
+    overrides = st.session_state.setdefault("config_overrides", {})
+
+    default = get_default_config()
+    for key in keys:
+        default = default.get(key) if isinstance(default, Mapping) else None
+    if default is not None and freeze(value) == default:
+        _remove_override(overrides, keys)
+        return
+
+    for key in keys[:-1]:
+        if not isinstance(overrides.get(key), dict):
+            overrides[key] = {}
+        overrides = overrides[key]
+    overrides[keys[-1]] = value
+
+
+def _remove_override(overrides, keys):
+    if len(keys) == 1:
+        overrides.pop(keys[0], None)
+        return
+    child = overrides.get(keys[0])
+    if isinstance(child, dict):
+        _remove_override(child, keys[1:])
+        if not child:
+            del overrides[keys[0]]
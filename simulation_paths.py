@@ -0,0 +1,157 @@
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+CHUNK_SIZE = 4 * 1024 ** 2
+
+
+class PathWriter:
+    def __init__(self, directory, columns, capacity, dtype="float64"):
+        # Files are allocated at full capacity (sparse on most filesystems) and truncated on close
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.count = 0
+        os.makedirs(directory, exist_ok=True)
+        self.arrays = {
+            column: np.memmap(os.path.join(directory, f"{column}.bin"), dtype=self.dtype, mode="w+",
+                              shape=(max(capacity, 1),))
+            for column in columns
+        }
+
+    def append(self, values):
+        size = len(next(iter(values.values())))
+        for column, array in self.arrays.items():
+            array[self.count:self.count + size] = values[column]
+        self.count += size
+
+    def close(self):
+        for column, array in self.arrays.items():
+            array.flush()
+        columns = list(self.arrays)
+        self.arrays = {}
+        for column in columns:
+            os.truncate(os.path.join(self.directory, f"{column}.bin"), self.count * self.dtype.itemsize)
+
+        # The metadata file is written last, so its presence marks a complete run
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"count": self.count, "columns": columns, "dtype": self.dtype.str}, f)
+        os.replace(tmp_path, os.path.join(self.directory, "meta.json"))
+
+    def discard(self):
+        self.arrays = {}
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class PathSet:
+    def __init__(self, directory, meta):
+        self.count = meta["count"]
+        self.columns = {
+            column: np.memmap(os.path.join(directory, f"{column}.bin"), dtype=meta["dtype"], mode="r",
+                              shape=(self.count,))
+            if self.count else np.empty(0, dtype=meta["dtype"])
+            for column in meta["columns"]
+        }
+
+    def __len__(self):
+        return self.count
+
+    def chunks(self, chunk_size=CHUNK_SIZE):
+        # Views into the mapped files; only the pages a query touches are read into memory
+        for start in range(0, self.count, chunk_size):
+            yield {column: array[start:start + chunk_size] for column, array in self.columns.items()}
+
+    def count_where(self, predicate):
+        return int(sum(np.count_nonzero(predicate(chunk)) for chunk in self.chunks()))
+
+    def select(self, predicate, columns=None, limit=None):
+        # Only the matching rows are copied out of the mapped files
+        columns = list(columns or self.columns)
+        selected = {column: [] for column in columns}
+        remaining = limit
+        for chunk in self.chunks():
+            mask = predicate(chunk)
+            for column in columns:
+                selected[column].append(chunk[column][mask][:remaining])
+            if remaining is not None:
+                remaining -= len(selected[columns[0]][-1])
+                if remaining <= 0:
+                    break
+        return pd.DataFrame({column: np.concatenate(parts) for column, parts in selected.items()})
+
+    def column_means(self, predicate=None):
+        totals = dict.fromkeys(self.columns, 0.0)
+        matched = 0
+        for chunk in self.chunks():
+            mask = predicate(chunk) if predicate is not None else slice(None)
+            for column in self.columns:
+                values = chunk[column][mask]
+                totals[column] += values.sum()
+            matched += len(values)
+        return pd.Series({column: total / matched if matched else np.nan for column, total in totals.items()})
+
+    def histogram(self, column, bins=50, predicate=None):
+        # Fixed edges over the full column keep tail and overall histograms comparable
+        array = self.columns[column]
+        edges = np.histogram_bin_edges([], bins=bins, range=(float(array.min()), float(array.max())))
+        counts = np.zeros(len(edges) - 1, dtype=np.int64)
+        for chunk in self.chunks():
+            values = chunk[column] if predicate is None else chunk[column][predicate(chunk)]
+            counts += np.histogram(values, bins=edges)[0]
+        return counts, edges
+
+
+class SimulationPathStore:
+    def __init__(self, root=".simulation_paths", max_bytes=8 * 1024 ** 3):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def writer(self, key, columns, capacity, dtype="float64"):
+        directory = os.path.join(self.root, key)
+        shutil.rmtree(directory, ignore_errors=True)
+        self.evict(reserve=capacity * len(columns) * np.dtype(dtype).itemsize)
+        return PathWriter(directory, columns, capacity, dtype)
+
+    def open(self, key):
+        meta_path = os.path.join(self.root, key, "meta.json")
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+        return PathSet(os.path.join(self.root, key), meta)
+
+    def evict(self, reserve=0):
+        # Least recently opened runs go first; runs still being written have no metadata yet and are kept
+        entries = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            try:
+                last_used = os.stat(os.path.join(entry.path, "meta.json")).st_mtime
+            except FileNotFoundError:
+                continue
+            size = sum(f.stat().st_size for f in os.scandir(entry.path))
+            entries.append((last_used, size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries) + reserve
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total_bytes -= size
+
+
+@st.cache_resource
+def get_simulation_path_store():
+    return SimulationPathStore(
+        os.environ.get("SIMULATION_PATH_DIR", ".simulation_paths"),
+        int(os.environ.get("SIMULATION_PATH_MAX_BYTES", 8 * 1024 ** 3)),
+    )
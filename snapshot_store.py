@@ -0,0 +1,130 @@
+import glob
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+
+SNAPSHOT_EXTENSIONS = {"npz": ".npz", "parquet": ".parquet", "figure": ".json"}
+
+
+def _compute_code_version():
+    # Any edit to the app's modules invalidates every snapshot
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "*.py"))):
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+CODE_VERSION = _compute_code_version()
+
+
+def _json_default(obj):
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def fingerprint(*inputs):
+    payload = json.dumps(inputs, sort_keys=True, default=_json_default)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SnapshotStore:
+    def __init__(self, root=".snapshots", max_bytes=512 * 1024 ** 2):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+
+    def make_key(self, name, *inputs):
+        return f"{name}-{fingerprint(CODE_VERSION, *inputs)[:32]}"
+
+    def _path(self, key, kind):
+        return os.path.join(self.root, key + SNAPSHOT_EXTENSIONS[kind])
+
+    def load(self, key, kind):
+        path = self._path(key, kind)
+        try:
+            if kind == "npz":
+                with np.load(path, allow_pickle=False) as data:
+                    value = {name: data[name] for name in data.files}
+            elif kind == "parquet":
+                value = pd.read_parquet(path)
+            else:
+                with open(path) as f:
+                    value = pio.from_json(f.read(), skip_invalid=True)
+        except (FileNotFoundError, OSError, ValueError):
+            return None
+
+        # Refresh the timestamp so eviction is least-recently-used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def save(self, key, value, kind):
+        # Write to a temp file in the same directory, then atomically rename it into place
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                if kind == "npz":
+                    np.savez(f, **value)
+                elif kind == "parquet":
+                    value.to_parquet(f)
+                else:
+                    f.write(pio.to_json(value, validate=False).encode())
+            os.replace(tmp_path, self._path(key, kind))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def get_or_compute(self, name, inputs, compute, kind="npz", shared=True):
+        # Results that no other session could ask for again (shared=False) are computed without being stored
+        if not shared:
+            return compute()
+        key = self.make_key(name, *inputs)
+        value = self.load(key, kind)
+        if value is None:
+            value = compute()
+            self.save(key, value, kind)
+        return value
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already evicted by another server process
+            total_bytes -= size
+
+
+@st.cache_resource
+def get_snapshot_store():
+    return SnapshotStore(
+        os.environ.get("SNAPSHOT_DIR", ".snapshots"),
+        int(os.environ.get("SNAPSHOT_MAX_BYTES", 512 * 1024 ** 2)),
+    )
@@ -0,0 +1,10 @@
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def process_workers(monkeypatch):
+    # AppTest leaves its last script behind as __main__, which process workers would re-run on start
+    monkeypatch.setitem(sys.modules, "__main__", types.ModuleType("__main__"))
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomaly_detection import MAD_SCALE, StreamingAnomalyDetector, update_detector
+
+
+def _history(num_points=200, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.date_range("2024-01-01", periods=num_points, freq="D")
+    calls = 1000 + rng.normal(0, 20, num_points)
+    calls[120] += 200  # Spike
+    handling = 5 + rng.normal(0, 0.1, num_points)
+    handling[150:] += 0.3  # Level shift
+    satisfaction = 4.5 + rng.normal(0, 0.05, num_points)
+    satisfaction[rng.choice(num_points, 10, replace=False)] = np.nan  # Missing points
+    return pd.DataFrame({"Calls": calls, "Handling Time": handling, "Satisfaction": satisfaction}, index=index)
+
+
+def _batch_anomalies(history, alpha=0.1, ewma_threshold=3.0, cusum_slack=0.5, cusum_limit=5.0, window=30,
+                     robust_threshold=3.5, warmup=20):
+    # Each series recomputed from scratch, one point at a time, straight from the definitions
+    anomalies = []
+    for key in history.columns:
+        count, mean, var, high, low, recent = 0, 0.0, 0.0, 0.0, 0.0, []
+        for timestamp, value in history[key].items():
+            if np.isnan(value):
+                continue
+            if count >= warmup:
+                std = np.sqrt(var)
+                z = (value - mean) / std if std > 0 else 0.0
+                high, low = max(0.0, high + z - cusum_slack), max(0.0, low - z - cusum_slack)
+                cusum = high if high >= low else -low
+                median = np.median(recent)
+                mad = np.median(np.abs(np.array(recent) - median))
+                robust = MAD_SCALE * (value - median) / mad if mad > 0 else 0.0
+                for detector, score, limit in (("EWMA", z, ewma_threshold), ("CUSUM", cusum, cusum_limit),
+                                               ("Robust Z", robust, robust_threshold)):
+                    if abs(score) > limit:
+                        anomalies.append((timestamp, key, detector, score))
+                if abs(cusum) > cusum_limit:
+                    high = low = 0.0
+            if count == 0:
+                mean = value
+            else:
+                diff = value - mean
+                mean += alpha * diff
+                var = (1 - alpha) * (var + alpha * diff ** 2)
+            recent = (recent + [value])[-window:]
+            count += 1
+    return sorted(anomalies, key=lambda anomaly: anomaly[:3])
+
+
+def _streamed_anomalies(detector):
+    frame = detector.anomaly_frame()
+    return sorted(zip(frame["Timestamp"], frame["Series"], frame["Detector"], frame["Score"]),
+                  key=lambda anomaly: anomaly[:3])
+
+
+def _assert_same_anomalies(streamed, batch):
+    assert [anomaly[:3] for anomaly in streamed] == [anomaly[:3] for anomaly in batch]
+    np.testing.assert_allclose([anomaly[3] for anomaly in streamed], [anomaly[3] for anomaly in batch], rtol=1e-9)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_streaming_detector_matches_batch_recomputation(seed):
+    history = _history(seed=seed)
+    detector = StreamingAnomalyDetector(history.columns)
+    for timestamp, row in zip(history.index, history.to_numpy()):
+        detector.update(timestamp, row)
+    streamed, batch = _streamed_anomalies(detector), _batch_anomalies(history)
+    _assert_same_anomalies(streamed, batch)
+    # The injected spike and level shift are caught
+    assert (history.index[120], "Calls") in {anomaly[:2] for anomaly in streamed}
+    assert any(key == "Handling Time" and timestamp >= history.index[150] for timestamp, key, *_ in streamed)
+
+
+def test_growing_history_is_fed_incrementally():
+    history = _history()
+    cache = {}
+    for end in range(40, len(history) + 1, 7):
+        detector = update_detector(cache, "ops", history.iloc[:end])
+    detector = update_detector(cache, "ops", history)
+    assert cache["ops"] is detector and detector.count.max() == len(history)
+    _assert_same_anomalies(_streamed_anomalies(detector), _batch_anomalies(history))
+
+
+def test_rewritten_history_starts_over():
+    history = _history()
+    cache = {}
+    first = update_detector(cache, "ops", history.iloc[:100])
+    rewritten = history.iloc[:120].copy()
+    rewritten.iloc[99, 0] += 1
+    second = update_detector(cache, "ops", rewritten)
+    assert second is not first
+    _assert_same_anomalies(_streamed_anomalies(second), _batch_anomalies(rewritten))
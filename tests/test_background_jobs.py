@@ -0,0 +1,85 @@
+import operator
+import threading
+from concurrent.futures import Future
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from background_jobs import JobRunner
+
+
+def test_chained_job_does_not_hold_a_pool_thread():
+    runner = JobRunner(max_threads=1)
+    upstream = Future()
+    chained = runner.submit_after("backtest", upstream, lambda value, offset: value + offset, 1)
+    # The only pool thread is free while the upstream job is still running
+    assert runner.submit("other", threading.get_ident).result(timeout=10)
+    assert not chained.done()
+    upstream.set_result(41)
+    assert chained.result(timeout=10) == 42
+
+
+def test_chained_job_passes_on_upstream_failures():
+    runner = JobRunner(max_threads=1)
+    upstream = Future()
+    chained = runner.submit_after("backtest", upstream, lambda value: value)
+    upstream.set_exception(ValueError("no revenue"))
+    with pytest.raises(ValueError, match="no revenue"):
+        chained.result(timeout=10)
+
+
+def test_superseded_chained_job_never_runs():
+    runner = JobRunner(max_threads=1)
+    upstream = Future()
+    calls = []
+    first = runner.submit_after("backtest", upstream, calls.append)
+    runner.submit_after("backtest", upstream, calls.append)
+    upstream.set_result("forecast")
+    assert first.cancelled()
+    runner.thread_pool.shutdown(wait=True)
+    assert calls == ["forecast"]
+
+
+def test_chained_job_runs_in_the_process_pool(process_workers):
+    runner = JobRunner(max_threads=1, max_processes=1)
+    upstream = Future()
+    chained = runner.submit_after("backtest", upstream, operator.add, 1, kind="process")
+    upstream.set_result(41)
+    try:
+        assert chained.result(timeout=60) == 42
+    finally:
+        runner.process_pool.shutdown(wait=True)
+
+
+def test_superseded_process_job_is_dropped(process_workers):
+    runner = JobRunner(max_threads=1, max_processes=1)
+    upstream = Future()
+    first = runner.submit_after("backtest", upstream, operator.add, 1, kind="process")
+    second = runner.submit_after("backtest", upstream, operator.add, 2, kind="process")
+    upstream.set_result(40)
+    try:
+        assert first.cancelled()
+        assert second.result(timeout=60) == 42
+    finally:
+        runner.process_pool.shutdown(wait=True)
+
+
+def _render_failed_job():
+    from concurrent.futures import Future
+
+    import streamlit as st
+
+    from background_jobs import render_job_result
+
+    future = Future()
+    future.set_exception(ValueError("no revenue"))
+    render_job_result(future, st.write)
+    st.write("Rest of the tab")
+
+
+def test_failed_job_is_shown_as_an_error_in_its_panel():
+    at = AppTest.from_function(_render_failed_job)
+    at.run()
+    assert not at.exception
+    assert "no revenue" in at.error[0].value
+    assert at.markdown[-1].value == "Rest of the tab"
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from batch_forecasting import SMOOTHING_GRID, TREND_GRID, batch_forecast, build_summing_matrix, reconcile_forecasts
+from forecast_trends import reconciled_client_forecast
+
+
+def _series(num_series=5, length=24, seed=0):
+    rng = np.random.default_rng(seed)
+    trend = rng.uniform(-50, 150, size=(num_series, 1)) * np.arange(length)
+    return 10_000 + trend + rng.normal(0, 300, size=(num_series, length))
+
+
+def _ses_reference(y, horizon, z):
+    best = None
+    for alpha in SMOOTHING_GRID:
+        level, sse = y[0], 0.0
+        for value in y[1:]:
+            error = value - level
+            sse += error ** 2
+            level += alpha * error
+        if best is None or sse < best[0]:
+            best = (sse, alpha, level)
+    sse, alpha, level = best
+    sigma2 = sse / (len(y) - 1)
+    half_width = [z * np.sqrt(sigma2 * (1 + (h - 1) * alpha ** 2)) for h in range(1, horizon + 1)]
+    return np.full(horizon, level), np.array(half_width)
+
+
+def _holt_reference(y, horizon):
+    best = None
+    for alpha in SMOOTHING_GRID:
+        for beta in TREND_GRID:
+            level, trend, sse = y[0], y[1] - y[0], 0.0
+            for value in y[1:]:
+                error = value - (level + trend)
+                sse += error ** 2
+                level, trend = level + trend + alpha * error, trend + alpha * beta * error
+            if best is None or sse < best[0]:
+                best = (sse, level, trend)
+    _, level, trend = best
+    return level + trend * np.arange(1, horizon + 1)
+
+
+def test_summing_matrix_stacks_aggregates_over_the_bottom_level():
+    S = build_summing_matrix([[0, 1, 2], [0, 1], [2]], 3)
+    expected = np.array([
+        [1, 1, 1],
+        [1, 1, 0],
+        [0, 0, 1],
+        [1, 0, 0],
+        [0, 1, 0],
+        [0, 0, 1],
+    ])
+    np.testing.assert_array_equal(S, expected)
+
+
+@pytest.mark.parametrize("method", ["ols", "wls", "bottom_up"])
+def test_reconciled_forecasts_add_up(method):
+    rng = np.random.default_rng(1)
+    groups = [range(4), [0, 1], [2, 3]]
+    S = build_summing_matrix(groups, 4)
+    # Incoherent base forecasts: every level forecast on its own
+    base = rng.normal(100, 20, size=(S.shape[0], 12))
+    lower, upper = base - 10, base + 10
+    reconciled, reconciled_lower, reconciled_upper = reconcile_forecasts(base, S, lower, upper, method=method)
+    np.testing.assert_allclose(reconciled, S @ reconciled[-4:], rtol=1e-12)
+    np.testing.assert_allclose(reconciled_upper - reconciled_lower, upper - lower)
+
+
+def test_client_forecasts_add_up_to_the_total():
+    history = _series(4)
+    for method in ("ols", "wls"):
+        forecast, lower, upper = reconciled_client_forecast(history, horizon=6, method=method)
+        np.testing.assert_allclose(forecast[0], forecast[1:].sum(axis=0), rtol=1e-12)
+        assert np.all(lower <= forecast) and np.all(forecast <= upper)
+
+
+def test_ses_grid_search_matches_scalar_reference():
+    Y = _series()
+    z = norm.ppf(0.975)
+    forecast, lower, upper = batch_forecast(Y, horizon=6, method="ses")
+    for row, y in enumerate(Y):
+        expected, half_width = _ses_reference(y, 6, z)
+        np.testing.assert_allclose(forecast[row], expected, rtol=1e-10)
+        np.testing.assert_allclose(upper[row] - forecast[row], half_width, rtol=1e-10)
+        np.testing.assert_allclose(forecast[row] - lower[row], half_width, rtol=1e-10)
+
+
+def test_holt_grid_search_matches_scalar_reference():
+    Y = _series()
+    forecast, _, _ = batch_forecast(Y, horizon=6, method="holt")
+    for row, y in enumerate(Y):
+        np.testing.assert_allclose(forecast[row], _holt_reference(y, 6), rtol=1e-10)
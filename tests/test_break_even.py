@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from break_even import monthly_cost, solve_volume, tiered_revenue
+
+MAX_CALLS = 20_000
+
+
+def _shortfall(calls, price, variable_cost, fixed_costs, cost_per_step, calls_per_step, tiers, target_margin):
+    revenue = tiered_revenue(calls, price, tiers)
+    return revenue * (1 - target_margin) - monthly_cost(calls, variable_cost, fixed_costs, cost_per_step,
+                                                        calls_per_step)
+
+
+@pytest.mark.parametrize("cost_per_step, expected", [(30, 500), (45, 2000)])
+def test_step_costs_do_not_overshoot_the_break_even(cost_per_step, expected):
+    assert solve_volume(1.0, 0.5, 100.0, cost_per_step, 100) == expected
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    price = rng.uniform(0.5, 2.0)
+    params = {
+        "variable_cost_per_call": rng.uniform(0.0, 0.8) * price,
+        "fixed_costs": rng.uniform(0, 500),
+        "cost_per_step": rng.choice([0.0, rng.uniform(0, 100)]),
+        "calls_per_step": rng.choice([np.inf, float(rng.integers(10, 500))]),
+        "tiers": sorted((float(rng.integers(1, 5000)), rng.uniform(0.3, 1.0) * price)
+                        for _ in range(rng.integers(0, 3))),
+        "target_margin": rng.choice([0.0, rng.uniform(0, 0.3)]),
+    }
+    volume = solve_volume(price, **params)
+
+    calls = np.arange(MAX_CALLS + 1, dtype=float)
+    feasible = _shortfall(calls, price, *params.values()) >= 0
+    if np.isnan(volume):
+        assert not feasible.any()
+        return
+    # The volume reaches the target and no whole number of calls below it does
+    assert _shortfall(volume, price, *params.values()) >= -1e-9
+    assert not feasible[calls < volume].any()
+    if feasible.any():
+        assert volume <= calls[feasible.argmax()]
+
+
+def test_grid_matches_pointwise_solutions():
+    prices = np.linspace(0.5, 2.0, 7)
+    fixed_costs = np.array([0.0, 100.0, 1000.0])
+    tiers = [(1000.0, 0.8 * prices[None, :]), (5000.0, 0.6 * prices[None, :])]
+    grid = solve_volume(prices[None, :], 0.4, fixed_costs[:, None], 25.0, 150.0, tiers=tiers, target_margin=0.1)
+    for row, fixed in enumerate(fixed_costs):
+        for column, price in enumerate(prices):
+            point_tiers = [(1000.0, 0.8 * price), (5000.0, 0.6 * price)]
+            expected = solve_volume(price, 0.4, fixed, 25.0, 150.0, tiers=point_tiers, target_margin=0.1)
+            np.testing.assert_equal(grid[row, column], expected)
@@ -0,0 +1,88 @@
+import itertools
+
+import numpy as np
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from capacity_planner import HOURS_PER_MONTH, pack_sessions, plan_capacity, sessions_per_instance
+from shared_config import build_default_config
+
+
+def _cheapest_fleet(sessions, capacity, hourly_cost):
+    # Every fleet of up to enough instances of each type to hold the sessions on its own
+    ranges = [range(int(np.ceil(sessions / cap)) + 1) if cap > 0 else range(1) for cap in capacity]
+    return min(np.dot(counts, hourly_cost) for counts in itertools.product(*ranges)
+               if np.dot(counts, capacity) >= sessions)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_packing_matches_exhaustive_search(seed):
+    rng = np.random.default_rng(seed)
+    capacity = rng.integers(1, 12, 3).astype(float)
+    hourly_cost = np.round(capacity * rng.uniform(0.5, 1.5, 3), 2)
+    sessions = np.arange(41)
+    counts, cost = pack_sessions(sessions, capacity, hourly_cost)
+
+    assert np.all(counts @ capacity >= sessions)
+    np.testing.assert_allclose(cost, counts @ hourly_cost)
+    np.testing.assert_allclose(cost, [_cheapest_fleet(s, capacity, hourly_cost) for s in sessions])
+
+
+def test_packing_mixes_types_when_neither_bulk_type_is_cheapest():
+    # 11 sessions: one 5-session instance and two 3-session ones beat any fleet built around a full bulk type
+    counts, cost = pack_sessions([11], np.array([5.0, 3.0]), np.array([4.0, 3.0]))
+    np.testing.assert_array_equal(counts, [[1, 2]])
+    np.testing.assert_allclose(cost, [10.0])
+
+
+def test_packing_large_fleets_by_the_cheapest_type():
+    capacity, hourly_cost = np.array([5.0, 11.0, 44.0, 0.0]), np.array([0.089, 0.179, 0.714, 0.05])
+    counts, cost = pack_sessions([10_000.5], capacity, hourly_cost)
+    assert counts[0] @ capacity >= 10_001 and counts[0, 3] == 0
+    # Within one instance of the fractional optimum
+    assert cost[0] <= 10_001 * np.min(hourly_cost[:3] / capacity[:3]) + hourly_cost.max()
+
+
+def test_instance_types_that_fit_no_session_are_rejected():
+    with pytest.raises(ValueError):
+        pack_sessions([10], np.array([0.0, 0.0]), np.array([0.1, 0.2]))
+
+    config = build_default_config()
+    for instance in config["infrastructure"]["instance_types"]:
+        instance["cpu_cores"] = 0.1
+    with pytest.raises(ValueError, match="Agent Workers"):
+        plan_capacity(config, np.array([10.0]), np.array([5.0]))
+
+
+def test_plan_costs_follow_the_fleets():
+    config = build_default_config()
+    infrastructure = config["infrastructure"]
+    plan = plan_capacity(config, np.array([0.0, 40.0, 400.0]), np.array([0.0, 20.0, 200.0]))
+
+    hourly_cost = np.array([instance["hourly_cost"] for instance in infrastructure["instance_types"]])
+    expected = 0
+    for profile in infrastructure["session_profiles"].values():
+        capacity = sessions_per_instance(profile, infrastructure["instance_types"], infrastructure["target_utilisation"])
+        expected = expected + pack_sessions([0, 40, 400], capacity, hourly_cost)[1] * HOURS_PER_MONTH
+    np.testing.assert_allclose(plan["Compute Cost"], expected)
+    assert plan["Infrastructure Cost"].iloc[0] == 0
+    assert plan["Agent Workers"].iloc[0] == "-"
+    assert np.all(np.diff(plan["Infrastructure Cost"]) > 0)
+
+
+def _render_undersized_fleet():
+    from risk_assessment import calculate_total_cost_per_minute
+    from scalability_analysis import render_scalability_analysis
+    from shared_config import build_default_config
+
+    config = build_default_config()
+    for instance in config["infrastructure"]["instance_types"]:
+        instance["cpu_cores"] = 0.1
+    render_scalability_analysis(config, 100, 50, 5.0, calculate_total_cost_per_minute(config))
+
+
+def test_scalability_tab_warns_about_an_undersized_fleet():
+    at = AppTest.from_function(_render_undersized_fleet, default_timeout=60)
+    at.run()
+    assert not at.exception
+    assert any("No instance type fits" in warning.value for warning in at.warning)
@@ -0,0 +1,98 @@
+import copy
+
+import pytest
+
+from compute_graph import ComputeGraph, resolve_input
+
+
+def _counting_graph():
+    graph = ComputeGraph()
+    calls = []
+
+    @graph.node("costs", reads=("num_agents", "config.service_costs"))
+    def costs(inputs):
+        calls.append("costs")
+        return inputs["num_agents"] * inputs["config"]["service_costs"]["per_agent"]
+
+    @graph.node("market", reads=("config.market_data.share",))
+    def market(inputs):
+        calls.append("market")
+        return inputs["config"]["market_data"]["share"]
+
+    @graph.node("profit", reads=("config.price",), deps=("costs",))
+    def profit(inputs, costs):
+        calls.append("profit")
+        return inputs["config"]["price"] - costs
+
+    return graph, calls
+
+
+def _inputs():
+    return {
+        "num_agents": 10,
+        "config": {"service_costs": {"per_agent": 2.0}, "market_data": {"share": 0.1, "size": 5}, "price": 100.0},
+    }
+
+
+def test_unchanged_inputs_are_served_from_the_graph():
+    graph, calls = _counting_graph()
+    assert graph.evaluate_all(_inputs()) == {"costs": 20.0, "market": 0.1, "profit": 80.0}
+    assert graph.evaluate_all(_inputs()) == {"costs": 20.0, "market": 0.1, "profit": 80.0}
+    assert calls == ["costs", "market", "profit"]
+    assert set(graph.describe()["Status"]) == {"cached"}
+
+
+def test_only_nodes_reading_a_changed_path_rerun():
+    graph, calls = _counting_graph()
+    inputs = _inputs()
+    graph.evaluate_all(inputs)
+    calls.clear()
+
+    # A config path no node reads changes nothing
+    inputs = copy.deepcopy(inputs)
+    inputs["config"]["market_data"]["size"] = 6
+    graph.evaluate_all(inputs)
+    assert calls == []
+
+    inputs["config"]["market_data"]["share"] = 0.2
+    assert graph.evaluate_all(inputs)["market"] == 0.2
+    assert calls == ["market"]
+    assert graph.run_log["market"]["reason"] == "changed: config.market_data.share"
+
+
+def test_dependents_rerun_with_their_dependencies():
+    graph, calls = _counting_graph()
+    inputs = _inputs()
+    graph.evaluate_all(inputs)
+    calls.clear()
+
+    inputs = {**inputs, "num_agents": 20}
+    assert graph.evaluate_all(inputs)["profit"] == 60.0
+    assert calls == ["costs", "profit"]
+    assert graph.run_log["costs"]["reason"] == "changed: num_agents"
+    assert graph.run_log["profit"]["reason"] == "changed: node:costs"
+
+
+def test_nested_reads_see_changes_below_them():
+    graph, calls = _counting_graph()
+    inputs = _inputs()
+    graph.evaluate_all(inputs)
+    calls.clear()
+
+    inputs = copy.deepcopy(inputs)
+    inputs["config"]["service_costs"]["per_agent"] = 3.0
+    graph.evaluate_all(inputs)
+    assert calls == ["costs", "profit"]
+
+
+def test_missing_paths_resolve_to_none():
+    inputs = _inputs()
+    assert resolve_input(inputs, "config.market_data.share") == 0.1
+    assert resolve_input(inputs, "config.unknown.share") is None
+    assert resolve_input(inputs, "num_agents.value") is None
+
+
+def test_unknown_dependencies_are_rejected():
+    graph = ComputeGraph()
+    with pytest.raises(ValueError, match="unknown nodes: costs"):
+        graph.add_node("profit", lambda inputs, costs: costs, deps=("costs",))
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+from concurrency import concurrency_series, concurrency_stats, measured_concurrency, minute_maxima, simulate_calls
+
+
+def _calls(num_calls, seed, horizon=1800):
+    # Whole seconds, so ties between starts and ends are common
+    rng = np.random.default_rng(seed)
+    starts = rng.integers(-300, horizon, num_calls).astype(float)
+    return starts, starts + rng.integers(0, 400, num_calls)
+
+
+def _active(starts, ends, t):
+    # A call occupies [start, end)
+    return np.count_nonzero((starts <= t) & (ends > t))
+
+
+def _brute_force_maxima(starts, ends, start, num_minutes):
+    maxima = []
+    for minute in range(num_minutes):
+        lo, hi = start + 60 * minute, start + 60 * (minute + 1)
+        events = np.concatenate([starts, ends])
+        candidates = np.append(events[(events >= lo) & (events < hi)], lo)
+        maxima.append(max(_active(starts, ends, t) for t in candidates))
+    return np.array(maxima)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_sweep_line_matches_brute_force(seed):
+    starts, ends = _calls(300, seed)
+    maxima, mean_concurrency = concurrency_stats(starts, ends, 0.0, 30)
+    np.testing.assert_array_equal(maxima, _brute_force_maxima(starts, ends, 0.0, 30))
+    # Concurrency is constant over each whole second
+    assert mean_concurrency == pytest.approx(np.mean([_active(starts, ends, t) for t in range(1800)]))
+
+
+def test_levels_after_each_event_match_brute_force():
+    starts, ends = _calls(200, seed=7)
+    times, levels = concurrency_series(starts, ends)
+    assert np.all(np.diff(times) >= 0)
+    settled = np.append(times[1:] != times[:-1], True)
+    for t, level in zip(times[settled], levels[settled]):
+        assert level == _active(starts, ends, t)
+
+
+def test_back_to_back_calls_do_not_overlap():
+    starts, ends = np.array([0.0, 30.0, 30.0]), np.array([30.0, 90.0, 30.0])
+    times, levels = concurrency_series(starts, ends)
+    np.testing.assert_array_equal(minute_maxima(times, levels, 0.0, 2), [1, 1])
+
+
+def test_calls_carried_into_a_minute_count_towards_its_peak():
+    starts, ends = np.array([0.0]), np.array([600.0])
+    times, levels = concurrency_series(starts, ends)
+    np.testing.assert_array_equal(minute_maxima(times, levels, 0.0, 11), [1] * 10 + [0])
+
+
+def test_simulated_volume_and_durations():
+    starts, ends = simulate_calls(5000, 4.0, days=7, rng=np.random.default_rng(0))
+    assert len(starts) == pytest.approx(35_000, rel=0.03)
+    assert np.mean(ends - starts) == pytest.approx(240, rel=0.03)
+    # Little's law: mean concurrency is the arrival rate times the mean duration
+    _, mean_concurrency = concurrency_stats(starts, ends, 0.0, 7 * 24 * 60)
+    assert mean_concurrency == pytest.approx(5000 / 86400 * 240, rel=0.05)
+
+
+def test_measured_concurrency_from_call_logs(tmp_path):
+    records = [
+        {"type": "call", "started_at": "2024-05-01T12:00:00Z", "ended_at": "2024-05-01T12:05:00Z"},
+        {"type": "call", "started_at": 1714564920, "ended_at": 1714565100},
+        {"type": "call", "started_at": "2024-05-01T12:03:00Z"},
+    ]
+    path = tmp_path / "calls.jsonl"
+    path.write_text("\n".join(json.dumps(record) for record in records) + "\nnot json\n")
+    row = measured_concurrency([str(path)])
+    assert row["Peak Concurrent Calls"] == 2
+    assert row["Mean Concurrent Calls"] == pytest.approx((300 + 180) / 300)
+    assert measured_concurrency([]) is None
@@ -0,0 +1,41 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def _export_app():
+    import pandas as pd
+
+    from data_export import register_export_frame, render_export_controls
+
+    register_export_frame("Costs", pd.DataFrame({"Component": ["LLM", "TTS"], "Cost": [1.0, 2.0]}))
+    render_export_controls()
+
+
+@pytest.fixture
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPORT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _prepare_export(export_format):
+    at = AppTest.from_function(_export_app)
+    at.run()
+    at.sidebar.radio(key="export_format").set_value(export_format)
+    at.sidebar.button[0].click()
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_small_export_is_downloaded_and_removed_from_disk(export_dir):
+    at = _prepare_export("Parquet bundle (.zip)")
+    assert not at.info
+    assert list(export_dir.iterdir()) == []
+
+
+def test_large_export_stays_on_the_server(export_dir, monkeypatch):
+    monkeypatch.setattr("data_export.EXPORT_DOWNLOAD_MAX_BYTES", 0)
+    at = _prepare_export("Excel workbook (.xlsx)")
+    [saved] = export_dir.iterdir()
+    assert saved.suffix == ".xlsx"
+    assert str(saved) in at.info[0].value
@@ -0,0 +1,74 @@
+import json
+
+import pandas as pd
+import plotly.express as px
+
+from figure_cache import FigureCache
+
+
+def _frame(values=(1.0, 2.0, 3.0)):
+    return pd.DataFrame({"Month": ["Jan", "Feb", "Mar"], "Revenue": list(values)})
+
+
+def _builder(builds):
+    def build(df):
+        def figure():
+            builds.append(df["Revenue"].tolist())
+            return px.line(df, x="Month", y="Revenue", title="Revenue")
+        return figure
+    return build
+
+
+def test_equal_frames_hit_the_cache():
+    cache, builds = FigureCache(), []
+    build = _builder(builds)
+    first = cache.figure("revenue", build(_frame()), _frame(), "monthly")
+    second = cache.figure("revenue", build(_frame()), _frame(), "monthly")
+    assert builds == [[1.0, 2.0, 3.0]]
+    assert json.loads(second.to_json()) == json.loads(first.to_json())
+    assert second is not first
+
+    stats, size, entries = cache.stats()
+    assert stats.to_dict("records") == [{"Chart": "revenue", "Hits": 1, "Misses": 1, "Hit Rate": 0.5}]
+    assert entries == 1 and size == len(first.to_json())
+
+
+def test_changed_inputs_rebuild_the_figure():
+    cache, builds = FigureCache(), []
+    build = _builder(builds)
+    cache.figure("revenue", build(_frame()), _frame(), "monthly")
+    cache.figure("revenue", build(_frame((1.0, 2.0, 4.0))), _frame((1.0, 2.0, 4.0)), "monthly")
+    cache.figure("revenue", build(_frame()), _frame(), "weekly")
+    # The same values under another dtype or column name are other inputs too
+    cache.figure("revenue", build(_frame()), _frame().astype({"Revenue": "float32"}), "monthly")
+    cache.figure("revenue", build(_frame()), _frame().rename(columns={"Month": "Period"}), "monthly")
+    assert len(builds) == 5
+
+
+def test_least_recently_used_figures_are_evicted_by_size():
+    builds = []
+    build = _builder(builds)
+    frames = [_frame((1.0, 2.0, float(i))) for i in range(3)]
+    size = len(build(frames[0])().to_json())
+    builds.clear()
+    cache = FigureCache(max_bytes=2 * size + size // 2)
+
+    cache.figure("revenue", build(frames[0]), frames[0])
+    cache.figure("revenue", build(frames[1]), frames[1])
+    cache.figure("revenue", build(frames[0]), frames[0])  # Now the most recently used
+    cache.figure("revenue", build(frames[2]), frames[2])  # Evicts frames[1]
+    assert len(builds) == 3
+
+    cache.figure("revenue", build(frames[0]), frames[0])
+    assert len(builds) == 3
+    cache.figure("revenue", build(frames[1]), frames[1])
+    assert len(builds) == 4
+
+
+def test_figures_larger_than_the_cache_are_built_every_time():
+    cache, builds = FigureCache(max_bytes=10), []
+    build = _builder(builds)
+    for _ in range(2):
+        assert cache.figure("revenue", build(_frame()), _frame()).layout.title.text == "Revenue"
+    assert len(builds) == 2
+    assert cache.stats()[2] == 0
@@ -0,0 +1,22 @@
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from cohort_projection import GRANULARITIES
+
+
+def _render_financial_overview():
+    from financial_overview import render_financial_overview
+    from shared_config import build_default_config
+
+    render_financial_overview(build_default_config(), 100, 50, 5.0, 0.05)
+
+
+@pytest.mark.parametrize("granularity", list(GRANULARITIES))
+@pytest.mark.parametrize("horizon", [12, 24, 36, 60])
+def test_cohort_projection_renders_at_every_granularity(granularity, horizon):
+    at = AppTest.from_function(_render_financial_overview, default_timeout=60)
+    at.run()
+    at.radio(key="cohort_granularity").set_value(granularity)
+    at.slider(key="cohort_horizon").set_value(horizon)
+    at.run()
+    assert not at.exception
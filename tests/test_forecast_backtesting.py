@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.stats import norm
+
+from background_jobs import JobRunner
+from batch_forecasting import batch_forecast
+from forecast_backtesting import _forecast_task, rolling_origin_folds, run_backtest, split_folds
+
+
+def _series(num_series=2, length=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return 10_000 + 150 * np.arange(length) + rng.normal(0, 300, size=(num_series, length))
+
+
+def _reference_metrics(series, method, initial, horizon, window):
+    # One fold at a time, straight from the definitions
+    errors, actuals, forecasts, scaled, covered = [], [], [], [], []
+    for train_end in range(initial, len(series) - horizon + 1):
+        train = series[(0 if window == "expanding" else train_end - initial):train_end]
+        actual = series[train_end:train_end + horizon]
+        if method == "naive":
+            forecast = np.full(horizon, train[-1])
+            half_width = norm.ppf(0.975) * np.std(np.diff(train), ddof=1) * np.sqrt(np.arange(1, horizon + 1))
+            lower, upper = forecast - half_width, forecast + half_width
+        else:
+            forecast, lower, upper = (part[0] for part in batch_forecast(train, horizon=horizon, method=method))
+        error = actual - forecast
+        errors.append(error)
+        actuals.append(actual)
+        forecasts.append(forecast)
+        scaled.append(np.mean(np.abs(error)) / np.mean(np.abs(np.diff(train))))
+        covered.append((actual >= lower) & (actual <= upper))
+    errors, actuals, forecasts = np.array(errors), np.array(actuals), np.array(forecasts)
+    return {
+        "MAPE": np.mean(np.abs(errors / actuals)) * 100,
+        "sMAPE": np.mean(2 * np.abs(errors) / (np.abs(actuals) + np.abs(forecasts))) * 100,
+        "MASE": np.mean(scaled),
+        "Coverage": np.mean(covered) * 100,
+    }
+
+
+@pytest.mark.parametrize("window", ["expanding", "sliding"])
+def test_rolling_origin_folds_never_train_on_the_test_period(window):
+    folds = rolling_origin_folds(30, initial=12, horizon=3, step=2, window=window)
+    assert folds
+    for train_start, train_end, test_end in folds:
+        assert 0 <= train_start < train_end < test_end <= 30
+        assert test_end - train_end == 3
+        assert train_end - train_start == (train_end if window == "expanding" else 12)
+
+
+@pytest.mark.parametrize("method", ["naive", "ses", "holt", "arima"])
+def test_forecasts_ignore_observations_after_the_origin(method):
+    series = _series(num_series=1)[0]
+    folds = rolling_origin_folds(len(series), initial=12, horizon=3, step=5)
+    for fold in folds:
+        # Anything from the forecast origin on is replaced, and the fold's forecast must not change
+        tampered = series.copy()
+        tampered[fold[1]:] = 1e9
+        expected = _forecast_task((series, method, [fold], 0.95))
+        for part, tampered_part in zip(expected, _forecast_task((tampered, method, [fold], 0.95))):
+            np.testing.assert_array_equal(part, tampered_part)
+
+
+@pytest.mark.parametrize("window", ["expanding", "sliding"])
+def test_metrics_match_a_sequential_reference(window):
+    Y = _series()
+    df = run_backtest(Y, methods=["naive", "ses", "holt"], window=window, max_workers=1)
+    rows = df.set_index(["Series", "Method"])
+    for i, series in enumerate(Y):
+        for method in ("naive", "ses", "holt"):
+            expected = _reference_metrics(series, method, initial=12, horizon=3, window=window)
+            for metric, value in expected.items():
+                assert rows.loc[(f"Series {i + 1}", method), metric] == pytest.approx(value, rel=1e-9)
+
+
+def test_fold_chunks_cover_every_fold_once_in_order():
+    folds = rolling_origin_folds(30, initial=12, horizon=3)
+    for num_chunks in (1, 4, len(folds), 100):
+        chunks = split_folds(folds, num_chunks)
+        assert len(chunks) == min(num_chunks, len(folds))
+        assert [fold for chunk in chunks for fold in chunk] == folds
+
+
+@pytest.mark.parametrize("window", ["expanding", "sliding"])
+def test_fold_parallel_backtest_matches_sequential(window, process_workers):
+    Y = _series()
+    sequential = run_backtest(Y, window=window, max_workers=1)
+    runner = JobRunner(max_processes=2)
+    try:
+        pooled = run_backtest(Y, window=window, executor=runner.process_pool)
+    finally:
+        runner.process_pool.shutdown(wait=True)
+    pd.testing.assert_frame_equal(pooled, sequential)
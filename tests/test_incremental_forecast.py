@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from cachetools import LRUCache
+
+from forecast_trends import generate_forecast_data
+from incremental_forecast import update_forecast_model
+from shared_config import build_default_config
+
+
+def _revenue(months, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100_000 + 1_000 * np.arange(months) + rng.normal(0, 500, months)
+
+
+def test_growing_history_is_appended():
+    revenue = _revenue(30)
+    cache = {}
+    assert update_forecast_model(cache, "revenue", revenue[:24]).last_update == "fit"
+    model = update_forecast_model(cache, "revenue", revenue[:25])
+    assert model.last_update == "append"
+    np.testing.assert_array_equal(model.history, revenue[:25])
+
+
+def test_sliding_window_is_appended():
+    revenue = _revenue(30)
+    cache = {}
+    update_forecast_model(cache, "revenue", revenue[:24])
+    for end in range(25, 28):
+        model = update_forecast_model(cache, "revenue", revenue[end - 24:end])
+        assert model.last_update == "append"
+        np.testing.assert_array_equal(model.history, revenue[end - 24:end])
+
+
+def test_unchanged_and_rewritten_histories():
+    revenue = _revenue(24)
+    cache = {}
+    update_forecast_model(cache, "revenue", revenue)
+    assert update_forecast_model(cache, "revenue", revenue).last_update == "cached"
+    assert update_forecast_model(cache, "revenue", _revenue(24, seed=1)).last_update == "fit"
+
+
+def test_recorded_revenue_extends_the_cached_model():
+    config = build_default_config()
+    revenue = _revenue(25)
+    dates = pd.date_range("2024-01-31", periods=25, freq="ME")
+    cache = LRUCache(maxsize=8)
+    for window in (slice(0, 24), slice(1, 25)):
+        stored_revenue = pd.DataFrame({"Date": dates[window], "Revenue": revenue[window]})
+        generate_forecast_data(config, 100, 50, 5.0, model_cache=cache, model_key=("recorded", "all"),
+                               stored_revenue=stored_revenue)
+    assert cache[("recorded", "all")].last_update == "append"
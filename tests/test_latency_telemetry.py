@@ -0,0 +1,80 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from latency_telemetry import (
+    NUM_BUCKETS, QUANTILES, LatencyHistograms, bucket_index, histogram_percentiles, parse_event
+)
+
+NOW = time.time() // 3600 * 3600
+
+
+def _event(stage, latency_s, timestamp=NOW, provider="openai"):
+    field = {"stt": "duration", "llm": "ttft", "tts": "ttfb"}[stage]
+    return json.dumps({"timestamp": timestamp, "type": f"{stage}_metrics", "provider": provider, field: latency_s})
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_histogram_percentiles_match_numpy_within_bucket_width(seed):
+    latencies = np.random.default_rng(seed).lognormal(np.log(400), 0.8, 50_000)
+    counts = np.bincount(bucket_index(latencies), minlength=NUM_BUCKETS)
+    expected = np.percentile(latencies, np.array(QUANTILES) * 100, method="inverted_cdf")
+    # Buckets are 1% wide and report their geometric midpoint
+    np.testing.assert_allclose(histogram_percentiles(counts), expected, rtol=0.0051)
+
+
+def test_empty_histograms_have_no_percentiles():
+    assert np.isnan(histogram_percentiles(np.zeros(NUM_BUCKETS, dtype=np.int64))).all()
+
+
+def test_parse_event_reads_the_stage_latency_field():
+    assert parse_event(_event("llm", 0.41)) == ("llm", "openai", NOW, pytest.approx(410.0))
+    override = json.dumps({"timestamp": NOW, "type": "tts_metrics", "ttfb": 1.0, "latency_ms": 7.5})
+    assert parse_event(override) == ("tts", "unknown", NOW, 7.5)
+    for line in ("not json", json.dumps({"type": "vad_metrics", "timestamp": NOW}),
+                 json.dumps({"type": "stt_metrics", "timestamp": NOW})):
+        assert parse_event(line) is None
+
+
+def test_hourly_histograms_merge_into_the_overall_one():
+    rng = np.random.default_rng(0)
+    latencies = rng.lognormal(np.log(0.3), 0.5, 3000)
+    hours = NOW - 3600 * rng.integers(0, 5, 3000)
+    histograms = LatencyHistograms()
+    histograms.ingest([_event("llm", latency, hour + 60) for latency, hour in zip(latencies, hours)])
+    assert len(histograms.counts) == 5
+
+    [(group, counts)] = histograms.merged(by=("stage",)).items()
+    assert group == ("llm",)
+    np.testing.assert_array_equal(counts, np.bincount(bucket_index(latencies * 1000), minlength=NUM_BUCKETS))
+
+    summary = histograms.summary(start=NOW - 3600)
+    assert summary["Requests"].tolist() == [int(np.sum(hours >= NOW - 3600))]
+
+
+def test_tail_reads_only_complete_new_lines(tmp_path):
+    path = tmp_path / "agent.jsonl"
+    histograms = LatencyHistograms()
+    path.write_text(_event("stt", 0.1) + "\n" + _event("llm", 0.2) + "\n" + _event("tts", 0.3)[:20])
+    histograms.tail([str(path)])
+    assert histograms.events == 2
+
+    # The partial line is completed by the next write
+    with open(path, "a") as f:
+        f.write(_event("tts", 0.3)[20:] + "\nnot json\n")
+    histograms.tail([str(path)])
+    histograms.tail([str(path)])
+    assert histograms.events == 3 and histograms.malformed == 1
+
+    # A rotated (truncated) file is read again from the start
+    path.write_text(_event("stt", 0.1) + "\n")
+    histograms.tail([str(path)])
+    assert histograms.events == 4
+
+
+def test_old_hours_are_dropped():
+    histograms = LatencyHistograms(retention_hours=2)
+    histograms.ingest([_event("llm", 0.2, NOW - 10 * 3600), _event("llm", 0.2)])
+    assert [key[2] for key in histograms.counts] == [NOW]
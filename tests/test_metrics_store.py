@@ -0,0 +1,26 @@
+import multiprocessing
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics_store import MetricsStore
+
+
+def _write_in_child(store):
+    inherited = store._connection
+    store.insert_series("calls", [pd.Timestamp("2024-01-02")], [2.0])
+    assert store._connection is not inherited and store._pid == os.getpid()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+def test_forked_children_open_their_own_connection(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.db"))
+    store.insert_series("calls", [pd.Timestamp("2024-01-01")], [1.0])
+    # The child inherits the store, and with it the parent's connection, through the fork
+    child = multiprocessing.get_context("fork").Process(target=_write_in_child, args=(store,))
+    child.start()
+    child.join(timeout=60)
+    assert child.exitcode == 0
+    np.testing.assert_array_equal(store.query("calls")[1], [1.0, 2.0])
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from latency_telemetry import NUM_BUCKETS, bucket_index
+from pipeline_latency import (
+    BIN_MS, PIPELINE_STAGES, STAGE_OPTIONS, convolve_stages, histogram_pmf, parametric_pmf, pipeline_latency,
+    pmf_percentiles
+)
+
+
+def _random_pmfs(rng, options, bins):
+    pmfs = rng.random((options, bins)) ** 4
+    return pmfs / pmfs.sum(axis=1, keepdims=True)
+
+
+def test_fft_convolution_matches_direct_convolution():
+    rng = np.random.default_rng(0)
+    stages = [_random_pmfs(rng, 2, 300), _random_pmfs(rng, 3, 200), _random_pmfs(rng, 2, 250)]
+    total = convolve_stages(*stages)
+    assert total.shape == (2, 3, 2, 300 + 200 + 250 - 2)
+    for i in range(2):
+        for j in range(3):
+            for k in range(2):
+                expected = np.convolve(np.convolve(stages[0][i], stages[1][j]), stages[2][k])
+                np.testing.assert_allclose(total[i, j, k], expected, atol=1e-12)
+
+
+def test_convolved_percentiles_match_simulated_sums():
+    rng = np.random.default_rng(1)
+    medians, p95s = (250, 450, 300), (500, 1100, 700)
+    total = convolve_stages(*(parametric_pmf(median, p95)[None, :] for median, p95 in zip(medians, p95s)))[0, 0, 0]
+
+    sigmas = np.log(np.array(p95s) / medians) / norm.ppf(0.95)
+    samples = sum(rng.lognormal(np.log(median), sigma, 400_000) for median, sigma in zip(medians, sigmas))
+    expected = np.percentile(samples, [50, 95, 99])
+    np.testing.assert_allclose(pmf_percentiles(total, 3), expected, rtol=0.01, atol=2 * BIN_MS)
+
+
+def test_parametric_pmf_hits_its_median_and_p95():
+    pmf = parametric_pmf(300, 700)
+    assert pmf.sum() == pytest.approx(1)
+    np.testing.assert_allclose(pmf_percentiles(pmf, 1, quantiles=(0.5, 0.95)), [300, 700], atol=BIN_MS)
+
+
+def test_histogram_pmf_keeps_measured_percentiles():
+    latencies = np.random.default_rng(2).lognormal(np.log(350), 0.4, 20_000)
+    pmf = histogram_pmf(np.bincount(bucket_index(latencies), minlength=NUM_BUCKETS))
+    np.testing.assert_allclose(
+        pmf_percentiles(pmf, 1), np.percentile(latencies, [50, 95, 99]), rtol=0.01, atol=BIN_MS
+    )
+
+
+def test_measured_providers_replace_assumptions():
+    latencies = np.random.default_rng(3).lognormal(np.log(2000), 0.1, 500)
+    measured = {("llm", "gpt-4o-mini"): np.bincount(bucket_index(latencies), minlength=NUM_BUCKETS),
+                ("tts", "11labs"): np.bincount(bucket_index(latencies[:10]), minlength=NUM_BUCKETS)}
+    combinations, turn_pmfs, stages = pipeline_latency(measured)
+
+    assert len(combinations) == np.prod([len(STAGE_OPTIONS[stage]) for stage in PIPELINE_STAGES])
+    assert turn_pmfs.shape[:3] == (2, 2, 2)
+    sources = stages.set_index(["Stage", "Provider"])["Source"]
+    assert sources[("LLM", "gpt-4oMini")] == "Measured (500 requests)"
+    # Too few requests to stand in for the provider
+    assert sources[("TTS", "elevenlabs")] == "Assumed"
+
+    # The slow measured model now dominates the turns that use it
+    by_llm = combinations.groupby("LLM")["p50 (ms)"].mean()
+    assert by_llm["gpt-4oMini"] > by_llm["gpt-4o"] + 1000
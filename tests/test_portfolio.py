@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+import pytest
+
+from background_jobs import JobRunner
+from financial_overview import calculate_revenue
+from portfolio import DEFAULT_SIMULATION, evaluate_portfolio, load_client_configs
+from shared_config import build_default_config
+
+
+@pytest.fixture
+def client_directory(tmp_path):
+    clients = {
+        "acme.json": {
+            "name": "Acme",
+            "simulation": {"num_agents": 250, "calls_per_day": 40},
+            "financial_metrics": {"price_per_call": 1.1},
+        },
+        "globex.json": {"simulation": {"num_agents": 20, "calls_per_day": 10, "mean_call_duration": 2.0}},
+        "initech.json": {"financial_metrics": {"price_per_call": 0.05}},
+    }
+    for filename, client_config in clients.items():
+        (tmp_path / filename).write_text(json.dumps(client_config))
+    (tmp_path / "notes.txt").write_text("not a client")
+    return tmp_path
+
+
+def test_client_configs_fall_back_to_the_base_config(client_directory):
+    base_config = build_default_config()
+    clients = load_client_configs(str(client_directory), base_config)
+    assert [name for name, _, _ in clients] == ["Acme", "globex", "initech"]
+
+    _, acme_config, acme_simulation = clients[0]
+    assert acme_config["financial_metrics"]["price_per_call"] == 1.1
+    assert acme_config["service_costs"] == base_config["service_costs"]
+    assert acme_simulation == {**DEFAULT_SIMULATION, "num_agents": 250, "calls_per_day": 40}
+    assert clients[2][2] == DEFAULT_SIMULATION
+
+
+def test_portfolio_summarizes_every_client(client_directory):
+    clients = load_client_configs(str(client_directory), build_default_config())
+    df_portfolio, details = evaluate_portfolio(clients, num_simulations=2000)
+
+    assert df_portfolio["Client"].tolist() == ["Acme", "globex", "initech"]
+    for (name, config, simulation), (_, row) in zip(clients, df_portfolio.iterrows()):
+        revenue = calculate_revenue(config, simulation["num_agents"], simulation["calls_per_day"])
+        assert row["Monthly Revenue"] == pytest.approx(revenue)
+        assert row["Monthly Cost"] == pytest.approx(details[name]["costs"]["Monthly Cost ($)"].sum())
+        assert row["Monthly Profit"] == pytest.approx(row["Monthly Revenue"] - row["Monthly Cost"])
+        counts, _ = details[name]["histogram"]
+        assert counts.sum() == 2000
+    # Charging five cents a call loses money on every call
+    assert df_portfolio.set_index("Client").loc["initech", "Monthly Profit"] < 0
+
+
+def test_process_pool_matches_sequential_evaluation(client_directory, process_workers):
+    clients = load_client_configs(str(client_directory), build_default_config())
+    sequential, _ = evaluate_portfolio(clients, num_simulations=2000)
+    runner = JobRunner(max_processes=2)
+    try:
+        pooled, _ = evaluate_portfolio(clients, num_simulations=2000, executor=runner.process_pool)
+    finally:
+        runner.process_pool.shutdown(wait=True)
+
+    deterministic = ["Client", "Agents", "Monthly Revenue", "Monthly Cost", "Monthly Profit", "Optimal Scale"]
+    assert pooled[deterministic].equals(sequential[deterministic])
+    assert np.all(np.isfinite(pooled["Expected Profit (MC)"]))
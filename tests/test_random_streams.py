@@ -0,0 +1,53 @@
+import threading
+
+import numpy as np
+import pytest
+from cachetools import LRUCache
+
+from random_streams import RandomStreams
+
+
+def test_streams_are_reproducible_under_a_seed():
+    first, second = RandomStreams(42), RandomStreams(42)
+    np.testing.assert_array_equal(first.generator("calls").random(100), second.generator("calls").random(100))
+    # Asking for a stream again restarts it
+    np.testing.assert_array_equal(first.generator("calls").random(100), second.generator("calls").random(100))
+    assert not np.array_equal(RandomStreams(43).generator("calls").random(100), first.generator("calls").random(100))
+
+
+def test_named_streams_are_independent():
+    streams = RandomStreams(0)
+    calls = streams.generator("calls").standard_normal(200_000)
+    durations = streams.generator("durations").standard_normal(200_000)
+    assert abs(np.corrcoef(calls, durations)[0, 1]) < 0.01
+    # Drawing from one stream does not move another
+    streams.generator("calls").random(1000)
+    np.testing.assert_array_equal(streams.generator("durations").standard_normal(200_000), durations)
+
+
+def test_unseeded_streams_are_not_shared():
+    first, second = RandomStreams(), RandomStreams()
+    assert RandomStreams(0).shared and not first.shared
+    assert not np.array_equal(first.generator("calls").random(10), second.generator("calls").random(10))
+
+
+@pytest.mark.parametrize("method", ["pseudo-random", "sobol"])
+def test_base_draws_are_cached_read_only_and_shared_by_seed(method):
+    cache = LRUCache(maxsize=1024 ** 2, getsizeof=lambda draws: draws.nbytes), threading.Lock()
+    first, second = RandomStreams(5, cache), RandomStreams(5, cache)
+    draws = first.standard_normal("monte_carlo", 1000, 3, method)
+    assert second.standard_normal("monte_carlo", 1000, 3, method) is draws
+    assert not draws.flags.writeable
+    with pytest.raises(ValueError):
+        draws[0, 0] = 1.0
+    # Evicted draws are regenerated identically from the seed
+    np.testing.assert_array_equal(RandomStreams(5).standard_normal("monte_carlo", 1000, 3, method), draws)
+    assert first.standard_normal("monte_carlo", 1000, 2, method) is not draws
+
+
+def test_draws_larger_than_the_cache_are_not_kept():
+    cache = LRUCache(maxsize=100, getsizeof=lambda draws: draws.nbytes), threading.Lock()
+    streams = RandomStreams(5, cache)
+    draws = streams.standard_normal("monte_carlo", 1000)
+    assert draws.shape == (1000, 1)
+    assert len(cache[0]) == 0
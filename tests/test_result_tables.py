@@ -0,0 +1,74 @@
+import json
+
+import pandas as pd
+import pytest
+from streamlit.testing.v1 import AppTest
+
+
+def _render_tables():
+    import pandas as pd
+
+    from result_tables import CURRENCY, PERCENT, render_table
+
+    render_table(pd.DataFrame({"Service": ["LLM", "TTS"], "Cost": [0.5, 1.5], "Share": [25.0, 75.0]}),
+                 {"Cost": CURRENCY, "Share": PERCENT})
+
+
+def _render_tabs():
+    from financial_overview import render_financial_overview
+    from risk_assessment import calculate_total_cost_per_minute
+    from scalability_analysis import render_scalability_analysis
+    from service_performance import render_service_performance
+    from shared_config import build_default_config
+
+    config = build_default_config()
+    total_cost_per_minute = calculate_total_cost_per_minute(config)
+    render_financial_overview(config, 100, 50, 5.0, total_cost_per_minute)
+    render_service_performance(config, total_cost_per_minute)
+    render_scalability_analysis(config, 100, 50, 5.0, total_cost_per_minute)
+
+
+def _formats(dataframe):
+    return {
+        column: settings["type_config"]["format"]
+        for column, settings in json.loads(dataframe.proto.columns).items()
+        if "format" in settings.get("type_config", {})
+    }
+
+
+def test_tables_are_sent_numeric_with_their_formats():
+    at = AppTest.from_function(_render_tables)
+    at.run()
+    [table] = at.dataframe
+    pd.testing.assert_frame_equal(
+        table.value.reset_index(drop=True),
+        pd.DataFrame({"Service": ["LLM", "TTS"], "Cost": [0.5, 1.5], "Share": [25.0, 75.0]}),
+    )
+    assert _formats(table) == {"Cost": "$%.2f", "Share": "%.2f%%"}
+
+
+@pytest.fixture(scope="module")
+def tab_tables():
+    at = AppTest.from_function(_render_tabs, default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at.dataframe
+
+
+def test_formatted_columns_of_every_tab_stay_numeric(tab_tables):
+    formatted = 0
+    for table in tab_tables:
+        for column in _formats(table):
+            assert pd.api.types.is_numeric_dtype(table.value[column]), column
+            formatted += 1
+    assert formatted >= 10
+
+
+def test_percentages_are_stored_on_a_0_to_100_scale(tab_tables):
+    percent_columns = [
+        table.value[column] for table in tab_tables for column, number_format in _formats(table).items()
+        if number_format.endswith("%%") and column in ("Percentage", "Percentage of Total Cost")
+    ]
+    assert percent_columns
+    for values in percent_columns:
+        assert values.sum() == pytest.approx(100)
@@ -0,0 +1,107 @@
+import glob
+import os
+
+import numpy as np
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from random_streams import RandomStreams
+from risk_assessment import adaptive_monte_carlo_simulation, monte_carlo_inputs, monte_carlo_statistics
+from shared_config import build_default_config
+from snapshot_store import SnapshotStore, get_snapshot_store
+
+
+def _simulate_in_session():
+    import numpy as np
+    import streamlit as st
+
+    from random_streams import get_random_streams
+    from risk_assessment import load_monte_carlo_results
+    from shared_config import build_default_config
+
+    profits, _ = load_monte_carlo_results(build_default_config(), 100, 50, 5.0, {"num_simulations": 500},
+                                          streams=get_random_streams())
+    st.write(f"{np.mean(profits):.6f}")
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_DIR", str(tmp_path))
+    get_snapshot_store.clear()
+    yield tmp_path
+    get_snapshot_store.clear()
+
+
+def _run_fresh_session():
+    at = AppTest.from_function(_simulate_in_session, default_timeout=60)
+    at.run()
+    assert not at.exception
+    return at.markdown[0].value
+
+
+def test_fresh_sessions_share_one_snapshot(snapshot_dir, monkeypatch):
+    monkeypatch.delenv("RANDOM_SEED", raising=False)
+    assert _run_fresh_session() == _run_fresh_session()
+    assert len(glob.glob(os.path.join(snapshot_dir, "monte_carlo-*.npz"))) == 1
+
+
+def test_per_session_seeds_stay_out_of_the_snapshot_store(snapshot_dir, monkeypatch):
+    monkeypatch.setenv("RANDOM_SEED", "session")
+    assert _run_fresh_session() != _run_fresh_session()
+    assert not glob.glob(os.path.join(snapshot_dir, "monte_carlo-*.npz"))
+
+
+def test_monte_carlo_snapshots_are_keyed_by_seed(tmp_path):
+    store = SnapshotStore(root=str(tmp_path))
+    config = build_default_config()
+
+    def key(seed):
+        return store.make_key("monte_carlo", *monte_carlo_inputs(config, 100, 50, 5.0, streams=RandomStreams(seed)))
+
+    assert key(1) == key(1)
+    assert key(1) != key(2)
+
+
+def test_monte_carlo_statistics():
+    profits = np.arange(1.0, 101.0)
+    mean, value_at_risk, conditional_value_at_risk = monte_carlo_statistics(profits, var_level=5)
+    assert mean == 50.5
+    assert value_at_risk == np.percentile(profits, 5)
+    assert conditional_value_at_risk == profits[profits <= value_at_risk].mean()
+
+
+def test_adaptive_simulation_stops_once_the_tolerance_is_met():
+    profits, diagnostics = adaptive_monte_carlo_simulation(
+        build_default_config(), 100, 50, 5.0, relative_tolerance=0.05, batch_size=256, min_batches=10,
+        streams=RandomStreams(0),
+    )
+    assert diagnostics["converged"]
+    # Convergence is first checked once min_batches batches are in
+    assert diagnostics["paths"] == len(profits) >= 10 * 256
+    assert diagnostics["paths"] % 256 == 0
+    assert diagnostics["paths"] < 1_000_000
+    for statistic in ("mean", "var", "cvar"):
+        assert diagnostics[f"{statistic}_relative_error"] <= 0.05
+    np.testing.assert_allclose(
+        [diagnostics["mean"], diagnostics["var"], diagnostics["cvar"]], monte_carlo_statistics(profits)
+    )
+
+
+def test_adaptive_simulation_reports_an_unmet_tolerance():
+    profits, diagnostics = adaptive_monte_carlo_simulation(
+        build_default_config(), 100, 50, 5.0, relative_tolerance=1e-9, batch_size=256, min_batches=2,
+        max_simulations=2048, streams=RandomStreams(0),
+    )
+    assert not diagnostics["converged"]
+    assert diagnostics["paths"] == len(profits) == 2048
+
+
+def test_adaptive_simulation_is_reproducible_under_a_seed():
+    def run(seed):
+        return adaptive_monte_carlo_simulation(
+            build_default_config(), 100, 50, 5.0, relative_tolerance=1e-9, batch_size=256, max_simulations=1024,
+            streams=RandomStreams(seed),
+        )[0]
+
+    np.testing.assert_array_equal(run(3), run(3))
+    assert not np.array_equal(run(3), run(4))
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+from scipy.stats import kendalltau
+
+from risk_sampling import (
+    SAMPLING_METHODS, _cholesky_factor, cholesky_factor, draws_per_path, sample_risk_factors, standard_normal_draws
+)
+
+CORRELATION = np.array([
+    [1.0, 0.6, -0.3],
+    [0.6, 1.0, 0.2],
+    [-0.3, 0.2, 1.0],
+])
+
+
+def _factors(copula, num_simulations=100_000, seed=0, **kwargs):
+    draws = standard_normal_draws(num_simulations, draws_per_path(3, copula), rng=np.random.default_rng(seed))
+    return sample_risk_factors(draws, [100.0, 50.0, 5.0], [10.0, 5.0, 1.0], CORRELATION, copula, **kwargs)
+
+
+def _tail_dependence(x, y, quantile=0.01):
+    # Probability that y is in its lower tail given that x is
+    x_tail, y_tail = x <= np.quantile(x, quantile), y <= np.quantile(y, quantile)
+    return np.mean(y_tail[x_tail])
+
+
+def test_gaussian_copula_reproduces_the_correlation():
+    factors = _factors("gaussian")
+    np.testing.assert_allclose(np.corrcoef(factors, rowvar=False), CORRELATION, atol=0.01)
+
+
+@pytest.mark.parametrize("copula", ["gaussian", "t"])
+def test_rank_correlation_matches_the_elliptical_copula(copula):
+    # Kendall's tau of both elliptical copulas is 2 / pi * arcsin(rho), whatever the marginals
+    marginals = [{"distribution": "lognormal"}, {"distribution": "normal"}, {"distribution": "lognormal"}]
+    factors = _factors(copula, num_simulations=20_000, marginals=marginals)
+    for i, j in ((0, 1), (0, 2), (1, 2)):
+        tau = kendalltau(factors[:, i], factors[:, j])[0]
+        assert tau == pytest.approx(2 / np.pi * np.arcsin(CORRELATION[i, j]), abs=0.02)
+
+
+def test_t_copula_has_heavier_joint_tails():
+    gaussian, student = _factors("gaussian", 400_000), _factors("t", 400_000)
+    assert _tail_dependence(student[:, 0], student[:, 1]) > _tail_dependence(gaussian[:, 0], gaussian[:, 1]) + 0.05
+
+
+def test_t_copula_keeps_the_marginals():
+    marginals = [{"distribution": "lognormal"}, {}, {"distribution": "empirical", "samples": [3.0, 4.0, 5.0, 9.0]}]
+    factors = _factors("t", marginals=marginals)
+    assert factors[:, 0].mean() == pytest.approx(100.0, rel=0.01)
+    assert factors[:, 0].std() == pytest.approx(10.0, rel=0.02)
+    assert factors[:, 1].mean() == pytest.approx(50.0, rel=0.01)
+    assert factors[:, 1].std() == pytest.approx(5.0, rel=0.02)
+    assert factors[:, 2].min() >= 3.0 and factors[:, 2].max() <= 9.0
+
+
+def test_cholesky_factor_is_cached():
+    _cholesky_factor.cache_clear()
+    factor = cholesky_factor(CORRELATION)
+    np.testing.assert_allclose(factor @ factor.T, CORRELATION)
+    assert cholesky_factor(CORRELATION.copy()) is factor
+    assert _cholesky_factor.cache_info().hits == 1
+
+
+@pytest.mark.parametrize("correlation, message", [
+    ([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]], "positive definite"),
+    ([[1.0, 1.0], [1.0, 1.0]], "positive definite"),
+    ([[1.0, 0.5], [0.4, 1.0]], "symmetric"),
+    ([[2.0, 0.5], [0.5, 1.0]], "unit diagonal"),
+])
+def test_invalid_correlation_matrices_are_rejected(correlation, message):
+    cached = _cholesky_factor.cache_info().currsize
+    with pytest.raises(ValueError, match=message):
+        cholesky_factor(correlation)
+    # A rejected matrix leaves nothing behind in the cache
+    assert _cholesky_factor.cache_info().currsize == cached
+
+
+def test_copulas_reject_a_non_positive_definite_correlation():
+    draws = standard_normal_draws(10, draws_per_path(3, "t"), rng=np.random.default_rng(0))
+    correlation = [[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]]
+    with pytest.raises(ValueError, match="positive definite"):
+        sample_risk_factors(draws, [1.0] * 3, [0.1] * 3, correlation, "t")
+
+
+@pytest.mark.parametrize("method", SAMPLING_METHODS)
+def test_draws_are_standard_normal_and_reproducible(method):
+    draws = standard_normal_draws(4096, 3, method, rng=np.random.default_rng(1))
+    assert draws.shape == (4096, 3)
+    np.testing.assert_allclose(draws.mean(axis=0), 0, atol=0.05)
+    np.testing.assert_allclose(draws.std(axis=0), 1, atol=0.05)
+    np.testing.assert_array_equal(draws, standard_normal_draws(4096, 3, method, rng=np.random.default_rng(1)))
+
+
+def test_antithetic_draws_come_in_mirrored_pairs():
+    draws = standard_normal_draws(10, 2, "antithetic", rng=np.random.default_rng(0))
+    np.testing.assert_array_equal(draws[:5], -draws[5:])
@@ -0,0 +1,69 @@
+import copy
+import pickle
+
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from shared_config import FrozenDict, LayeredConfig, build_default_config, freeze, get_default_config
+
+
+def _override_in_session():
+    import streamlit as st
+
+    from shared_config import get_session_config, set_config_value
+
+    price = st.number_input("Price", value=1.0, key="price")
+    set_config_value(["financial_metrics", "price_per_call"], price)
+    config = get_session_config()
+    st.write(f"{config['financial_metrics']['price_per_call']}")
+    st.write(f"{st.session_state.config_overrides}")
+
+
+def test_layered_config_reads_overrides_over_the_defaults():
+    base = freeze(build_default_config())
+    config = LayeredConfig(base, {"financial_metrics": {"price_per_call": 2.0}, "new_section": {"a": 1}})
+    assert config["financial_metrics"]["price_per_call"] == 2.0
+    # Sibling leaves still come from the defaults
+    assert config["financial_metrics"]["target_margin"] == base["financial_metrics"]["target_margin"]
+    assert config["service_costs"] is base["service_costs"]
+    assert list(config) == list(base) + ["new_section"]
+    assert len(config) == len(base) + 1
+    assert base["financial_metrics"]["price_per_call"] == 1.0
+
+
+def test_copies_of_a_layered_config_are_plain_and_mutable():
+    config = LayeredConfig(freeze(build_default_config()), {"financial_metrics": {"price_per_call": 2.0}})
+    for copied in (copy.deepcopy(config), pickle.loads(pickle.dumps(config)), config.to_dict()):
+        assert type(copied) is dict and type(copied["market_data"]["competitors"]) is list
+        assert copied["financial_metrics"]["price_per_call"] == 2.0
+        copied["financial_metrics"]["price_per_call"] = 3.0
+    assert config["financial_metrics"]["price_per_call"] == 2.0
+
+
+def test_shared_defaults_are_read_only():
+    defaults = freeze(build_default_config())
+    assert isinstance(defaults["financial_metrics"], FrozenDict)
+    assert isinstance(defaults["market_data"]["competitors"], tuple)
+    with pytest.raises(TypeError, match="read-only"):
+        defaults["financial_metrics"]["price_per_call"] = 2.0
+    with pytest.raises(TypeError, match="read-only"):
+        defaults["financial_metrics"].update(price_per_call=2.0)
+
+
+def test_sessions_override_the_defaults_copy_on_write():
+    first, second = AppTest.from_function(_override_in_session), AppTest.from_function(_override_in_session)
+    first.run()
+    second.run()
+    first.number_input(key="price").set_value(2.5).run()
+    assert not first.exception and not second.exception
+
+    assert first.markdown[0].value == "2.5"
+    assert first.markdown[1].value == "{'financial_metrics': {'price_per_call': 2.5}}"
+    # The other session and the shared defaults are untouched
+    second.run()
+    assert second.markdown[0].value == "1.0"
+    assert get_default_config()["financial_metrics"]["price_per_call"] == 1.0
+
+    # Setting a value back to its default drops the override again
+    first.number_input(key="price").set_value(1.0).run()
+    assert first.markdown[1].value == "{}"
@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from simulation_paths import PathSet, SimulationPathStore
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Queries must give the same answers when they span many chunks
+    monkeypatch.setattr(PathSet.chunks, "__defaults__", (1000,))
+
+
+def _write_run(store, key, num_paths=10_000, seed=0, batch_size=2500):
+    rng = np.random.default_rng(seed)
+    values = {"profit": rng.normal(100, 30, num_paths), "agents": rng.integers(80, 120, num_paths).astype(float)}
+    writer = store.writer(key, list(values), capacity=num_paths)
+    for start in range(0, num_paths, batch_size):
+        writer.append({column: array[start:start + batch_size] for column, array in values.items()})
+    writer.close()
+    return values
+
+
+def _run_bytes(num_paths=10_000, num_columns=2):
+    return num_paths * num_columns * 8
+
+
+def test_stored_paths_answer_queries_like_the_arrays(tmp_path, small_chunks):
+    store = SimulationPathStore(str(tmp_path))
+    values = _write_run(store, "run")
+    paths = store.open("run")
+    assert len(paths) == 10_000
+
+    def in_tail(chunk):
+        return chunk["profit"] < 50
+
+    tail = values["profit"] < 50
+    assert paths.count_where(in_tail) == np.count_nonzero(tail)
+    pd.testing.assert_frame_equal(
+        paths.select(in_tail), pd.DataFrame({"profit": values["profit"][tail], "agents": values["agents"][tail]})
+    )
+    assert len(paths.select(in_tail, columns=["profit"], limit=7)) == 7
+    np.testing.assert_allclose(paths.column_means(in_tail),
+                               [values["profit"][tail].mean(), values["agents"][tail].mean()])
+
+    counts, edges = paths.histogram("profit", bins=20, predicate=in_tail)
+    expected, expected_edges = np.histogram(values["profit"][tail], bins=20,
+                                            range=(values["profit"].min(), values["profit"].max()))
+    np.testing.assert_array_equal(counts, expected)
+    np.testing.assert_allclose(edges, expected_edges)
+
+
+def test_closed_files_are_truncated_to_the_written_paths(tmp_path):
+    store = SimulationPathStore(str(tmp_path))
+    writer = store.writer("run", ["profit"], capacity=1000)
+    writer.append({"profit": np.arange(10.0)})
+    writer.close()
+    assert os.path.getsize(tmp_path / "run" / "profit.bin") == 10 * 8
+    np.testing.assert_array_equal(store.open("run").columns["profit"], np.arange(10.0))
+
+
+def test_incomplete_and_discarded_runs_cannot_be_opened(tmp_path):
+    store = SimulationPathStore(str(tmp_path))
+    writer = store.writer("run", ["profit"], capacity=100)
+    writer.append({"profit": np.ones(10)})
+    assert store.open("run") is None
+    writer.discard()
+    assert not (tmp_path / "run").exists()
+    assert store.open("missing") is None
+
+
+def test_least_recently_opened_runs_are_evicted_first(tmp_path):
+    # Room for three runs and their metadata
+    store = SimulationPathStore(str(tmp_path), max_bytes=3 * _run_bytes() + 1000)
+    for last_used, key in enumerate(["first", "second", "third"]):
+        _write_run(store, key)
+        os.utime(tmp_path / key / "meta.json", (1_000_000 + last_used,) * 2)
+
+    # Opening a run marks it as recently used
+    assert store.open("first") is not None
+
+    # A fourth run makes room for itself by evicting the least recently opened one
+    _write_run(store, "fourth")
+    assert sorted(os.listdir(tmp_path)) == ["first", "fourth", "third"]
+
+
+def test_runs_being_written_are_not_evicted(tmp_path):
+    store = SimulationPathStore(str(tmp_path), max_bytes=_run_bytes())
+    writer = store.writer("in-progress", ["profit", "agents"], capacity=10_000)
+    _write_run(store, "finished")
+    assert (tmp_path / "in-progress").exists()
+    writer.discard()